@@ -1,13 +1,13 @@
-import re
 import traceback
 from characters.interviewer import Interviewer
 from llm.interview_agent import LLMInterviewAgent
-from flask import Flask, request, jsonify, redirect
+from flask import Flask, request, jsonify, redirect, Response, stream_with_context
 from flask_cors import CORS
 from datetime import datetime
 from dotenv import load_dotenv
 import os
 import secrets
+import threading
 import hashlib
 import base64
 from services.profile_service import ProfileService
@@ -15,6 +15,10 @@ from services.resume_service import ResumeService
 from services.storage_service import StorageService
 from services.config_service import ConfigService
 from services.chat_history_service import ChatHistoryService
+from services.analysis_queue import AnalysisQueue
+from services.turn_assessor import TurnAssessor, TURN_ASSESSMENT_ENABLED
+from services.session_registry import SessionRegistry, SessionStore, approximate_size
+from services.translation_catalog import TranslationCatalog
 from utils.error_handlers import handle_bad_request
 from utils.validation_utils import validate_file
 from llm.llm_graph import LLMGraph
@@ -26,7 +30,7 @@ from utils.text_2_speech import text_to_speech
 from utils.speech_2_text import speech_to_text
 import json
 from llm.llm_interface import LLMInterface
-import time
+from llm.llm_utils import clean_good_response, generate_good_response_prompt
 from services.elo_calculator import SupabaseEloService
 from openai import OpenAI
 
@@ -53,14 +57,78 @@ resume_service = ResumeService()
 storage_service = StorageService(supabase_url, supabase_key)
 config_service = ConfigService(supabase_url, supabase_key)
 authorization_service = AuthorizationService(supabase_url, supabase_key)
-chat_history_service = ChatHistoryService(supabase_url, supabase_key)
-llm_graph = LLMGraph()
-supabase = create_client(supabase_url, supabase_key)
-
-active_interviews = {}
 
-# Initialize the ELO service
+# Initialize the ELO service and load the in-memory leaderboard
 elo_service = SupabaseEloService()
+try:
+    elo_service.rebuild_leaderboard()
+except Exception as e:
+    print(f"Error building leaderboard index: {e}")
+
+# Per-turn answer assessment (TURN_ASSESSMENT=true) spreads analysis over the interview
+turn_assessor = TurnAssessor() if TURN_ASSESSMENT_ENABLED else None
+chat_history_service = ChatHistoryService(supabase_url, supabase_key, elo_service=elo_service, turn_assessor=turn_assessor)
+
+# Local SQLite files live in DATA_DIR unless their own *_PATH variable is set.
+# They are created on first use, not at import.
+data_dir = os.getenv("DATA_DIR", ".")
+
+def _data_path(env_name, filename):
+    return os.getenv(env_name) or os.path.join(data_dir, filename)
+
+# Interview analysis runs on background workers instead of the save request.
+# The workers are started by the first request each process serves, so that
+# importing the app (tests, CLI tools, gunicorn's master before forking) starts
+# no threads; ANALYSIS_WORKERS=0 keeps a process from running any.
+analysis_queue = AnalysisQueue(chat_history_service.save_analysis, path=_data_path("ANALYSIS_QUEUE_PATH", "analysis_queue.db"))
+_workers_started = False
+_workers_lock = threading.Lock()
+
+@app.before_request
+def _start_analysis_workers():
+    global _workers_started
+    if _workers_started:
+        return
+    with _workers_lock:
+        if not _workers_started:
+            analysis_queue.start()
+            _workers_started = True
+
+llm_graph = LLMGraph(state_path=_data_path("INTERVIEW_STATE_PATH", "interview_state.db"))
+supabase = create_client(supabase_url, supabase_key)
+
+# Welcome and closing messages, translated once per language. The catalog
+# uses its own deterministic model (TRANSLATION_MODEL at temperature 0), not
+# the interviewer's, since each translation is stored and reused
+translation_catalog = TranslationCatalog(path=_data_path("TRANSLATION_CATALOG_PATH", "translation_catalog.db"))
+
+def _session_bytes(agent):
+    return approximate_size(agent.conversation) + approximate_size(llm_graph.get_messages(agent.thread_id))
+
+def _discard_assessments(thread_id, agent):
+    # Assessments of a finished interview are dropped once it is analyzed;
+    # those of an abandoned one when its session is evicted or expires
+    if turn_assessor:
+        turn_assessor.discard(thread_id)
+
+# Live interview agents by thread_id, bounded by count and idle time. With
+# LLM_CHECKPOINT_MODE=sqlite, sessions are shared with other worker processes
+# through the same state file as the graph checkpoints.
+if llm_graph.checkpoint_mode == "sqlite":
+    active_interviews = SessionRegistry(
+        on_release=lambda thread_id, agent: llm_graph.release(thread_id),
+        on_evict=_discard_assessments,
+        sizer=_session_bytes,
+        store=SessionStore(llm_graph.state_path),
+        snapshot=lambda agent: agent.to_state(),
+        restore=lambda state: LLMInterviewAgent.from_state(state, llm_graph, turn_assessor, translation_catalog)
+    )
+else:
+    active_interviews = SessionRegistry(
+        on_release=lambda thread_id, agent: llm_graph.release(thread_id),
+        on_evict=_discard_assessments,
+        sizer=_session_bytes
+    )
 
 @app.route('/api/profile', methods=['GET'])
 def profile():
@@ -404,7 +472,7 @@ def auth_callback():
 @app.route("/api/new_chat", methods=["POST"])
 def new_chat():
     import uuid
-    from langchain_core.messages import HumanMessage
+    from langchain_core.messages import AIMessage, SystemMessage
 
     data = request.get_json()
     email = data.get("email")
@@ -413,6 +481,10 @@ def new_chat():
     if not email or not name:
         return jsonify({"error": "Missing 'email' or 'name' in request."}), 400
     
+    # Refuse before doing any LLM work if no session slot is free
+    if not active_interviews.can_admit():
+        return jsonify({"error": "Too many interviews in progress. Please try again shortly."}), 503, {"Retry-After": "60"}
+    
     config_row = config_service.get_single_config(name=name, email=email)
     if not config_row:
         return jsonify({"error": "No config found for given name and email."}), 404
@@ -488,19 +560,27 @@ def new_chat():
     # Create a new LLMInterviewAgent session
     # -------------------------------------------
     thread_id = str(uuid.uuid4())
-    agent = LLMInterviewAgent(llm_graph=llm_graph, question_threshold=5, thread_id=thread_id)
+    agent = LLMInterviewAgent(
+        llm_graph=llm_graph,
+        question_threshold=5,
+        thread_id=thread_id,
+        turn_assessor=turn_assessor,
+        translation_catalog=translation_catalog
+    )
     agent.initialize(interviewer)
 
     # -------------------------------------------
-    # Build the initial welcome message
+    # Build the initial welcome message and the instructions that seed the
+    # thread; they are written to its state without calling the model
     # -------------------------------------------
-    welcome_message = ""
+    welcome_template = "welcome"
+    setup_messages = []
     if question_type == "behavioral":
-        welcome_message = f"Welcome to your behavioral interview for {interview_name} at {company_name}. I'll be asking questions about how you've handled various situations in your past experiences. Let's start by having you introduce yourself briefly."
+        welcome_template = "welcome_behavioral"
         # Inform LLM this is a behavioral interview
-        agent.llm_graph.invoke(HumanMessage(content=f"This is a BEHAVIORAL interview. Focus on asking behavioral questions following the STAR format."), thread_id=thread_id)
+        setup_messages.append(SystemMessage(content=f"This is a BEHAVIORAL interview. Focus on asking behavioral questions following the STAR format."))
     elif question_type == "technical":
-        welcome_message = f"Welcome to your technical interview for {interview_name} at {company_name}. I'll be focusing on your technical expertise based on your background and experience. Let's begin with a brief introduction about yourself."
+        welcome_template = "welcome_technical"
         
         # Create experience-focused prompt
         tech_skills_prompt = """TECHNICAL INTERVIEW GUIDELINES:
@@ -552,38 +632,33 @@ The candidate's resume contains these experiences:"""
                     if description:
                         tech_skills_prompt += f"\nDetails: {description}"
 
-        agent.llm_graph.invoke(HumanMessage(content=tech_skills_prompt), thread_id=thread_id)
-    else:
-        welcome_message = (
-            f"Welcome to your interview for {interview_name} at {company_name}. "
-            "I'm excited to learn more about your skills and experience. "
-            "Could you please start by telling me a bit about yourself and your background?"
-        )
+        setup_messages.append(SystemMessage(content=tech_skills_prompt))
 
     # -------------------------------------------
-    # If not English, translate the welcome message
-    # AND instruct the LLM to continue in that language
+    # The welcome message comes from the translation catalog, so it is only
+    # translated the first time a language is used. If not English, also
+    # instruct the LLM to continue in that language
     # -------------------------------------------
+    welcome_message = translation_catalog.render(
+        welcome_template, language, interview_name=interview_name, company_name=company_name
+    )
     if language.lower() != "english":
-        # 1) Translate the welcome message
-        translation_resp = agent.llm_graph.invoke(
-            HumanMessage(content=f"Translate the following text to {language}:\n\n{welcome_message}"),
-            thread_id=thread_id
-        )
-        welcome_translated = translation_resp["messages"][-1].content.strip()
-        if welcome_translated:
-            welcome_message = welcome_translated
-
-        # 2) Tell the LLM to continue the entire interview in that language
-        agent.llm_graph.invoke(
-            HumanMessage(content=f"IMPORTANT: Please conduct the entire interview in {language}."),
-            thread_id=thread_id
-        )
+        setup_messages.append(SystemMessage(content=f"IMPORTANT: Please conduct the entire interview in {language}."))
+
+    # The model sees the welcome as its own opening question, and answers to
+    # it are assessed against the text the candidate was actually sent
+    setup_messages.append(AIMessage(content=welcome_message))
+    agent.llm_graph.seed(setup_messages, thread_id=thread_id)
+    agent.set_welcome(welcome_message)
 
     # -------------------------------------------
     # Store the agent in active_interviews
     # -------------------------------------------
-    active_interviews[thread_id] = agent
+    if not active_interviews.admit(thread_id, agent):
+        # The registry filled up while the thread was being seeded; drop its
+        # checkpointed state, as no session will ever release it
+        agent.llm_graph.release(thread_id)
+        return jsonify({"error": "Too many interviews in progress. Please try again shortly."}), 503, {"Retry-After": "60"}
 
     # Return the thread_id + the final welcome message
     return jsonify({
@@ -608,81 +683,205 @@ def chat():
     if not thread_id:
         return jsonify({"error": "Missing 'thread_id' in request."}), 400
 
-    if thread_id not in active_interviews:
+    agent = active_interviews.get(thread_id)
+    if agent is None:
         return jsonify({"error": "Invalid thread_id or session expired."}), 404
-    agent = active_interviews[thread_id]
     # Next question from the agent
     next_ai_response = agent.next_question(user_input)
     
     # Check if interview is ended
     if agent.is_end(next_ai_response):
-        # We can optionally remove the agent from active_interviews
-        # or keep it if you want to retrieve the conversation later
         wrap_up_message = agent.end_interview()
+        # The interview is over; free its session slot
+        active_interviews.release(thread_id)
         return jsonify({"response": wrap_up_message, "ended": True})
     else:
+        active_interviews.persist(thread_id, agent)
         return jsonify({"response": next_ai_response, "ended": False})
 
 
+def _sse(payload):
+    return f"data: {json.dumps(payload)}\n\n"
+
+
+@app.route("/api/chat/stream", methods=["POST"])
+def chat_stream():
+    """
+    Streaming variant of /api/chat, sent as Server-Sent Events.
+
+    Each event's data is a JSON object:
+      {"type": "token", "text": ...}   a piece of the next question, as generated
+      {"type": "done", "response": ..., "ended": bool}
+                                       the full reply; if ended, it is the wrap-up
+                                       message and replaces the streamed text
+      {"type": "error", "error": ...}
+    """
+    data = request.get_json()
+    thread_id = data.get("thread_id")
+    user_input = data.get("message", "")
+
+    if not thread_id:
+        return jsonify({"error": "Missing 'thread_id' in request."}), 400
+
+    agent = active_interviews.get(thread_id)
+    if agent is None:
+        return jsonify({"error": "Invalid thread_id or session expired."}), 404
+
+    def generate():
+        try:
+            for text in agent.stream_question(user_input):
+                yield _sse({"type": "token", "text": text})
+
+            next_ai_response = agent.last_question()
+            if agent.is_end(next_ai_response):
+                wrap_up_message = agent.end_interview()
+                # The interview is over; free its session slot
+                active_interviews.release(thread_id)
+                yield _sse({"type": "done", "response": wrap_up_message, "ended": True})
+            else:
+                active_interviews.persist(thread_id, agent)
+                yield _sse({"type": "done", "response": next_ai_response, "ended": False})
+        except Exception as e:
+            print(f"Error streaming chat response: {e}")
+            yield _sse({"type": "error", "error": "Failed to generate a response."})
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @app.route("/api/chat_history", methods=["POST"])
 def save_chat_history():
+    """
+    Save an interview transcript.
+
+    Clients send either the whole conversation in "messages", or, with
+    "base_count", only the messages after the first base_count, which are
+    appended to the stored log. The response carries the stored
+    "message_count" to use as the next base_count. A 409 means base_count is
+    ahead of what is stored; resend from the returned message_count.
+    """
     data = request.get_json()
     thread_id = data.get("thread_id")
     user_email = data.get("email")
     messages = data.get("messages")
     config_name = data.get("config_name", "Interview Session")
     config_id = data.get("config_id")
+    base_count = data.get("base_count")
     
-    if not thread_id or not user_email or not messages:
+    if not thread_id or not user_email or messages is None or (base_count is None and not messages):
         return jsonify({"error": "Missing required parameters"}), 400
+    if base_count is not None and (not isinstance(base_count, int) or base_count < 0):
+        return jsonify({"error": "base_count must be a non-negative integer"}), 400
     
     # Check if there's only a welcome message, if so skip saving
-    if len(messages) == 1 and messages[0].get('sender') == 'ai':
+    if not base_count and len(messages) == 1 and messages[0].get('sender') == 'ai':
         return jsonify({"success": True, "skipped": True, "reason": "only_welcome_message"})
     
-    # Check existing record's message count
-    try:
-        existing_log = None
-        result = supabase.table('interview_logs').select('*').eq('thread_id', thread_id).execute()
-        
-        if result.data and len(result.data) > 0:
-            existing_log = result.data[0]
-            config_name = existing_log.get('config_name', config_name)
-            if not config_id and 'config_id' in existing_log:
-                config_id = existing_log.get('config_id')
-                
-            # Check if existing record has more messages
-            existing_messages = existing_log.get('log')
-            if existing_messages:
-                if isinstance(existing_messages, str):
-                    import json
-                    existing_messages = json.loads(existing_messages)
-                    
-                if len(existing_messages) > len(messages):
-                    return jsonify({"success": True, "skipped": True, "reason": "existing_log_longer"})
-    except Exception as e:
-        print(f"Error checking existing log: {e}")
+    if base_count is not None and not messages:
+        return jsonify({"success": True, "skipped": True, "reason": "no_new_messages"})
     
-    chat_history_result = chat_history_service.save_chat_history(thread_id, user_email, messages, config_name, config_id)
+    # One write: new messages are appended, ones already stored are skipped,
+    # and the stored record (without its transcript) comes back
+    chat_history_result = chat_history_service.save_chat_history(thread_id, user_email, messages, config_name, config_id, base_count=base_count)
     
+    if chat_history_result.get('conflict'):
+        return jsonify({
+            "error": chat_history_result.get('error'),
+            "message_count": chat_history_result.get('message_count')
+        }), 409
     
     if not chat_history_result.get('success'):
         return jsonify({"error": "Failed to save chat history"}), 500
     
+    message_count = chat_history_result.get('message_count')
+    if chat_history_result.get('skipped'):
+        reason = "existing_log_longer" if base_count is None and message_count > len(messages) else "no_new_messages"
+        return jsonify({"success": True, "skipped": True, "reason": reason, "message_count": message_count})
+    
     interview_id = chat_history_result.get('interview_id')
     if not interview_id:
         return jsonify({"error": "Failed to get interview ID"}), 500
     
-    analysis_result = chat_history_service.save_analysis(interview_id, user_email, messages, config_name, config_id, session_id=thread_id)
+    # Analyze under the config the interview was stored with
+    stored = chat_history_result.get('data') or {}
+    config_name = stored.get('config_name') or config_name
+    config_id = stored.get('config_id') or config_id
+    
+    # A delta holds only the newest messages; the analysis loads the stored transcript
+    if base_count is not None:
+        messages = None
     
+    # Queue the analysis; GET /api/analysis_status/<interview_id> reports progress
     try:
-        result = supabase.table('interview_logs').select('*').eq('thread_id', thread_id).execute()
-        if result.data and len(result.data) > 0:
-            return jsonify({"success": True, "data": result.data[0]}), 200
+        analysis_status = analysis_queue.enqueue(interview_id, user_email, messages, config_name, config_id, session_id=thread_id)["status"]
     except Exception as e:
-        print(f"Error getting updated log: {e}")
+        print(f"Error queueing analysis, running it inline: {e}")
+        analysis_result = chat_history_service.save_analysis(interview_id, user_email, messages, config_name, config_id, session_id=thread_id)
+        analysis_status = "done" if analysis_result.get("success") else "failed"
+    
+    return jsonify({
+        "success": True,
+        "data": stored,
+        "message_count": message_count,
+        "analysis_status": analysis_status
+    }), 200
+
+
+@app.route('/api/analysis_cache/stats', methods=['GET'])
+def get_analysis_cache_stats():
+    """
+    Report hit, miss and eviction counts for the interview analysis cache
+    """
+    return jsonify({
+        "success": True,
+        "data": chat_history_service.analysis_cache.stats()
+    })
+
+
+@app.route('/api/sessions/stats', methods=['GET'])
+def get_session_stats():
+    """
+    Report live interview sessions, approximate bytes held and admission counts
+    """
+    return jsonify({
+        "success": True,
+        "data": active_interviews.stats()
+    })
+
+
+@app.route('/api/analysis_status/<interview_id>', methods=['GET'])
+def get_analysis_status(interview_id):
+    """
+    Report the background analysis status of an interview
     
-    return jsonify({"success": True})
+    Parameters:
+    - interview_id: Interview ID returned when the chat history was saved (path parameter)
+    
+    Returns "queued", "running", "done" or "failed". Interviews analyzed before
+    the queue existed report "done" if their scores are stored.
+    """
+    try:
+        job = analysis_queue.status(interview_id)
+        if job:
+            return jsonify({"success": True, "data": job})
+        
+        result = supabase.table('interview_performance').select('interview_id').eq('interview_id', interview_id).execute()
+        if result.data:
+            return jsonify({"success": True, "data": {"interview_id": int(interview_id), "status": "done"}})
+        
+        return jsonify({"success": False, "message": "No analysis found for this interview"}), 404
+    
+    except ValueError:
+        return jsonify({"success": False, "message": "interview_id must be an integer"}), 400
+    except Exception as e:
+        app.logger.error(f"Error fetching analysis status: {str(e)}")
+        return jsonify({
+            "success": False,
+            "message": f"Error fetching analysis status: {str(e)}"
+        }), 500
 
 
 @app.route('/api/get_interview_configs/<email>', methods=['GET'])
@@ -824,104 +1023,47 @@ def delete_chat_history_by_id(id):
         return jsonify({"error": "Failed to delete interview log", "message": str(e)}), 500
 
 
-@app.route('/api/chat_history/<int:chat_id>', methods=['GET'])
-def get_chat_history_by_id(chat_id):
+def _chat_history_response(lookups):
     """
-    Retrieves a single interview log record from Supabase
-    by its numeric primary key (id), then merges 'log' + 'audio_metadata'
-    into a single list of messages.
+    Answer with the first interview log matching one of the (column, value) lookups.
+    The stored JSONB transcript is passed through as-is; if the raw read fails
+    (e.g. before migration 008), the record is decoded and merged instead.
     """
     try:
-        # 1) Query your 'interview_logs' table in Supabase
-        result = supabase.table('interview_logs').select('*').eq('id', chat_id).execute()
-        if not result.data or len(result.data) == 0:
-            return jsonify({"error": "Interview log not found"}), 404
-        
-        row = result.data[0]
-
-        # 2) Parse the "log" column (text messages)
-        text_messages = []
-        if row.get('log'):
-            text_messages = json.loads(row['log'])  # e.g., a list of { text, sender, ... }
-
-        # 3) Parse the "audio_metadata" column (audio info)
-        audio_metadata = []
-        if row.get('audio_metadata'):
-            audio_metadata = json.loads(row['audio_metadata'])
-            # e.g. [ { "audioUrl": "https://...", "storagePath": "..." }, ... ]
-
-        # 4) Merge them by index, if they line up 1-to-1
-        combined_messages = []
-        for i, txt_msg in enumerate(text_messages):
-            audio_info = audio_metadata[i] if i < len(audio_metadata) else {}
-            combined_messages.append({
-                **txt_msg,
-                "audioUrl": audio_info.get("audioUrl", txt_msg.get("audioUrl")),
-                "storagePath": audio_info.get("storagePath", txt_msg.get("storagePath"))
-            })
-
-        return jsonify({
-            "id": row["id"],
-            "messages": combined_messages
-        }), 200
+        for column, value in lookups:
+            body = chat_history_service.stream_chat_history_json(column, value)
+            if body is not None:
+                return Response(body, status=200, mimetype='application/json')
+        return jsonify({"error": "Interview log not found"}), 404
+    except Exception as e:
+        print(f"Raw chat history read failed, decoding instead: {e}")
 
+    try:
+        for column, value in lookups:
+            record = chat_history_service.get_chat_history_record(column, value)
+            if record is not None:
+                return jsonify(record), 200
+        return jsonify({"error": "Interview log not found"}), 404
     except Exception as e:
         return jsonify({"error": "Failed to retrieve chat history", "message": str(e)}), 500
 
 
+@app.route('/api/chat_history/<int:chat_id>', methods=['GET'])
+def get_chat_history_by_id(chat_id):
+    """
+    Retrieves a single interview log record from Supabase
+    by its numeric primary key (id), with its messages and their audio fields.
+    """
+    return _chat_history_response([('id', chat_id)])
+
+
 @app.route('/api/chat_history/<identifier>', methods=['GET'])
 def get_chat_history(identifier):
     """
     Unified GET: identifier may be the numeric PK (id) or the UUID thread_id.
     """
-    try:
-        # Try numeric lookup first
-        row = None
-        try:
-            chat_id = int(identifier)
-            result = supabase.table('interview_logs') \
-                             .select('*') \
-                             .eq('id', chat_id) \
-                             .execute()
-            if result.data:
-                row = result.data[0]
-        except ValueError:
-            # not an integer, fall through to thread_id
-            pass
-
-        # If no row yet, try thread_id lookup
-        if not row:
-            result = supabase.table('interview_logs') \
-                             .select('*') \
-                             .eq('thread_id', identifier) \
-                             .execute()
-            if result.data:
-                row = result.data[0]
-
-        if not row:
-            return jsonify({"error": "Interview log not found"}), 404
-
-        # Merge text + audio metadata
-        text_msgs  = json.loads(row.get('log') or '[]')
-        audio_meta = json.loads(row.get('audio_metadata') or '[]')
-
-        messages = []
-        for i, txt in enumerate(text_msgs):
-            audio = audio_meta[i] if i < len(audio_meta) else {}
-            messages.append({
-                **txt,
-                "audioUrl":   audio.get("audioUrl",   txt.get("audioUrl")),
-                "storagePath":audio.get("storagePath",txt.get("storagePath"))
-            })
-
-        return jsonify({
-            "id":        row.get("id"),
-            "thread_id": row.get("thread_id"),
-            "messages":  messages
-        }), 200
-
-    except Exception as e:
-        return jsonify({"error": "Failed to retrieve chat history", "message": str(e)}), 500
+    lookups = [('id', int(identifier))] if identifier.isdigit() else []
+    return _chat_history_response(lookups + [('thread_id', identifier)])
     
 
 
@@ -1052,110 +1194,12 @@ def generate_good_response():
     if not user_message:
          return jsonify({"error": "Missing message"}), 400
 
-    time.sleep(3)
-
-    # Build a prompt that adapts to question type
-    prompt = f"""As an expert interview coach, your task is to create an improved interview answer.
-
-INTERVIEW CONTEXT:
-Interviewer's Question: "{ai_question if ai_question else 'Not provided'}"
-
-Candidate's Original Answer:
-"{user_message}"
-
-INSTRUCTIONS:
-Analyze the type of question (behavioral, technical, situational, or general), but DO NOT include this analysis in your response.
-
-Create an improved answer following the appropriate guidelines for that question type:
-
-FOR BEHAVIORAL QUESTIONS:
-- Use the STAR format (Situation, Task, Action, Results)
-- Include specific details about the context
-- Focus on YOUR actions and contributions 
-- Quantify results when possible
-- End with lessons learned
-
-FOR TECHNICAL QUESTIONS:
-- Start with a clear definition or explanation of the concept
-- Provide examples that demonstrate understanding
-- Explain any relevant trade-offs or alternatives
-- Connect the concept to real-world applications
-- Show both theoretical knowledge and practical experience
-
-FOR SITUATIONAL QUESTIONS:
-- Outline your approach step-by-step
-- Explain your reasoning for each decision
-- Demonstrate problem-solving skills and critical thinking
-- Focus on collaboration and communication strategies
-- Consider multiple perspectives or solutions
-
-FOR GENERAL QUESTIONS:
-- Be concise and focused
-- Highlight relevant experiences and skills
-- Align your answer with the job requirements
-- Show enthusiasm and genuine interest
-- Demonstrate self-awareness and growth mindset
-
-GENERAL GUIDELINES:
-- Be concise but thorough
-- Use professional but natural language
-- Show confidence without arrogance
-- Address the specific question directly
-- Avoid clichés and generic statements
-- Structure the answer with clear beginning, middle, and end
-
-RESPONSE FORMAT REQUIREMENTS:
-- Start directly with the improved answer content
-- DO NOT include any classification of the question type
-- DO NOT include phrases like "Improved Answer:" or "This is a technical question"
-- DO NOT include any meta-commentary about the answer
-- Provide ONLY the answer itself
-
-Your response:"""
-
-    # Initialize the LLM interface and call the model.
+    # One generation, written directly in the target language
+    prompt = generate_good_response_prompt(user_message, ai_question, target_language)
     llm_interface = LLMInterface()
-    messages = [HumanMessage(content=prompt)]
-    response = llm_interface.invoke(messages)
+    response = llm_interface.invoke([HumanMessage(content=prompt)])
 
-    # Retrieve the last message's content as the enhanced response.
-    good_response = response[-1].content
-    
-    clean_prefixes = [
-        "This is a behavioral question.", 
-        "This is a technical question.", 
-        "This is a situational question.", 
-        "This is a general question.",
-        "This is a behavioral question:", 
-        "This is a technical question:", 
-        "This is a situational question:", 
-        "This is a general question:",
-        "Improved Answer:", 
-        "IMPROVED ANSWER:"
-    ]
-    
-    for prefix in clean_prefixes:
-        if good_response.startswith(prefix):
-            good_response = good_response[len(prefix):].strip()
-    
-    patterns = [
-        r'^This is an? \w+ question\.\s*',
-        r'^This is an? \w+ question:\s*',
-        r'^Improved answer:\s*',
-        r'^Here\'s an improved answer:\s*',
-        r'^Here is an improved answer:\s*',
-    ]
-    
-    for pattern in patterns:
-        good_response = re.sub(pattern, '', good_response, flags=re.IGNORECASE)
-
-    if target_language.lower() != 'english':
-        translation_prompt = f"Translate the following interview answer into {target_language}:\n\n{good_response}"
-        translation_response = llm_interface.invoke([HumanMessage(content=translation_prompt)])
-        translated_response = translation_response[-1].content.strip()
-        return jsonify({"response": translated_response})
-    
-    return jsonify({"response": good_response.strip()})
+    return jsonify({"response": clean_good_response(response[-1].content)})
 
 
 # service that returns the scores of the interview
@@ -1223,13 +1267,23 @@ def get_overall_scores(id=None, email=None):
         return jsonify({"error": "Failed to get overall scores", "message": str(e)}), 500
 
 
+def _analysis_pending(interview_id):
+    """202 response for an interview whose analysis is still queued or running, else None.
+
+    Clients poll GET /api/analysis_status/<interview_id> until it is done.
+    """
+    if str(interview_id).isdigit() and analysis_queue.is_pending(interview_id):
+        return jsonify({"status": "pending"}), 202
+    return None
+
+
 @app.route('/api/interview_scores/<interview_id>', methods=['GET'])
 def get_interview_scores(interview_id: int):                 
     # get the scores of the interview from the database
     try:
         result = supabase.table('interview_performance').select('*').eq('interview_id', interview_id).execute()
         if not result.data:
-            return jsonify({"error": "Interview scores not found"}), 404
+            return _analysis_pending(interview_id) or (jsonify({"error": "Interview scores not found"}), 404)
         return jsonify({"scores": {
             "confidence": result.data[0].get('confidence_score'),
             "communication": result.data[0].get('communication_score'),
@@ -1247,7 +1301,7 @@ def get_interview_feedback_strengths(interview_id: int):
     try:
         result = supabase.table('interview_performance').select('*').eq('interview_id', interview_id).execute()
         if not result.data:
-            return jsonify({"error": "Interview feedback not found"}), 404
+            return _analysis_pending(interview_id) or (jsonify({"error": "Interview feedback not found"}), 404)
         return jsonify({"strengths": result.data[0].get('strengths')}), 200
     except Exception as e:
         return jsonify({"error": "Failed to get interview feedback strengths", "message": str(e)}), 500
@@ -1258,7 +1312,7 @@ def get_interview_feedback_improvement_areas(interview_id: int):
     try:
         result = supabase.table('interview_performance').select('*').eq('interview_id', interview_id).execute()
         if not result.data:
-            return jsonify({"error": "Interview feedback not found"}), 404
+            return _analysis_pending(interview_id) or (jsonify({"error": "Interview feedback not found"}), 404)
         return jsonify({"improvement_areas": result.data[0].get('areas_for_improvement')}), 200
     except Exception as e:
         return jsonify({"error": "Failed to get interview feedback improvement areas", "message": str(e)}), 500
@@ -1269,7 +1323,7 @@ def get_interview_feedback_specific_feedback(interview_id: int):
     try:
         result = supabase.table('interview_performance').select('*').eq('interview_id', interview_id).execute()
         if not result.data:
-            return jsonify({"error": "Interview feedback not found"}), 404
+            return _analysis_pending(interview_id) or (jsonify({"error": "Interview feedback not found"}), 404)
         return jsonify({"specific_feedback": result.data[0].get('specific_feedback')}), 200
     except Exception as e:
         return jsonify({"error": "Failed to get interview feedback specific feedback", "message": str(e)}), 500
@@ -1536,6 +1590,46 @@ def update_elo_score():
             "message": f"Error updating ELO score: {str(e)}"
         }), 500
 
+@app.route('/api/elo/update_batch', methods=['POST'])
+def update_elo_batch():
+    """
+    Update ELO scores for many interview results in one request
+    
+    Required fields:
+    - results: List of objects with "email" and "score" (0-100), and
+      optional "difficulty" ("easy", "medium", "hard") and "name"
+    
+    Entries that fail validation are skipped and reported under "errors".
+    """
+    data = request.json
+    
+    # Validate required fields
+    if not data or not isinstance(data.get('results'), list) or not data['results']:
+        return jsonify({
+            "success": False,
+            "message": "A non-empty 'results' list is required"
+        }), 400
+    
+    try:
+        result = elo_service.update_elo_batch(data['results'])
+        
+        return jsonify({
+            "success": True,
+            "data": result
+        })
+    
+    except ValueError as e:
+        return jsonify({
+            "success": False,
+            "message": str(e)
+        }), 400
+    except Exception as e:
+        app.logger.error(f"Error updating ELO scores in batch: {str(e)}")
+        return jsonify({
+            "success": False,
+            "message": f"Error updating ELO scores in batch: {str(e)}"
+        }), 500
+
 @app.route('/api/elo/history/<email>', methods=['GET'])
 def get_elo_history(email):
     """
@@ -1544,19 +1638,27 @@ def get_elo_history(email):
     Parameters:
     - email: User's email address (path parameter)
     - limit: Maximum number of history entries to return (query parameter)
+    - bucket: Optional day, week or month; returns one point per bucket with
+      its last, min and max score (query parameter)
     """
     try:
-        # Get optional limit parameter
+        # Get optional limit and bucket parameters
         limit = request.args.get('limit', default=90, type=int)
+        bucket = request.args.get('bucket')
         
         # Get user's ELO history
-        history = elo_service.get_user_elo_history(email, limit)
+        history = elo_service.get_user_elo_history(email, limit, bucket)
         
         return jsonify({
             "success": True,
             "data": history
         })
     
+    except ValueError as e:
+        return jsonify({
+            "success": False,
+            "message": str(e)
+        }), 400
     except Exception as e:
         app.logger.error(f"Error fetching ELO history: {str(e)}")
         return jsonify({
@@ -1634,6 +1736,70 @@ def get_leaderboard():
             "message": f"Error fetching leaderboard: {str(e)}"
         }), 500
 
+@app.route('/api/elo/rank/<email>', methods=['GET'])
+def get_elo_rank(email):
+    """
+    Get a user's position on the leaderboard
+    
+    Parameters:
+    - email: User's email address (path parameter)
+    """
+    try:
+        entry = elo_service.get_user_rank(email)
+        if not entry:
+            return jsonify({
+                "success": False,
+                "message": "User is not ranked"
+            }), 404
+        
+        return jsonify({
+            "success": True,
+            "data": entry
+        })
+    
+    except Exception as e:
+        app.logger.error(f"Error fetching ELO rank: {str(e)}")
+        return jsonify({
+            "success": False,
+            "message": f"Error fetching ELO rank: {str(e)}"
+        }), 500
+
+# Most users returned on each side by /api/elo/around
+MAX_AROUND_RADIUS = 50
+
+@app.route('/api/elo/around/<email>', methods=['GET'])
+def get_users_around(email):
+    """
+    Get the users ranked just above and below a user
+    
+    Parameters:
+    - email: User's email address (path parameter)
+    - radius: Number of users to include on each side, 1 to 50 (query parameter, default 5)
+    """
+    try:
+        # Parsed by hand: type=int would turn a malformed value into the default
+        raw_radius = request.args.get('radius', default='5')
+        radius = int(raw_radius) if raw_radius.strip().lstrip('-').isdigit() else None
+        if radius is None or not 1 <= radius <= MAX_AROUND_RADIUS:
+            return jsonify({
+                "success": False,
+                "message": f"radius must be an integer between 1 and {MAX_AROUND_RADIUS}"
+            }), 400
+        
+        neighbours = elo_service.get_users_around(email, radius)
+        
+        return jsonify({
+            "success": True,
+            "data": neighbours
+        })
+    
+    except Exception as e:
+        app.logger.error(f"Error fetching nearby users: {str(e)}")
+        return jsonify({
+            "success": False,
+            "message": f"Error fetching nearby users: {str(e)}"
+        }), 500
+
 # Add a health check endpoint
 @app.route('/api/health', methods=['GET'])
 def health_check():
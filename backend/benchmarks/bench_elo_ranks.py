@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Benchmark for ELO rank maintenance.
+
+Compares the old per-user rank update loop against the set-based paths in
+SupabaseEloService._update_all_ranks: the recompute_elo_ranks function and
+the paged read plus chunked upsert used when it is not installed.
+
+By default the Supabase client is replaced with an in-process fake, so the
+benchmark runs offline. Offline mode counts round trips only; the CPU time it
+prints is the Python side of each path and includes no database work.
+
+With --live the paths run against the database at SUPABASE_URL (a local
+`supabase start` stack with the migrations applied) and the wall-clock time of
+each is measured. The benchmark adds its own users to elo_scores (ids from
+--id-start, emails ending in @bench.invalid) and deletes them afterwards, but
+every path also rewrites the ranks of the users already there, so it refuses
+to run against a non-local URL unless --allow-remote is given.
+
+Usage:
+    python benchmarks/bench_elo_ranks.py --sizes 1000 10000 100000 1000000
+    python benchmarks/bench_elo_ranks.py --live --sizes 1000 10000 --legacy-max 1000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from types import SimpleNamespace
+from urllib.parse import urlparse
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from services import elo_calculator
+from services.elo_calculator import SupabaseEloService
+
+BENCH_EMAIL_DOMAIN = "bench.invalid"
+
+
+class _FakeQuery:
+    """Chainable query that records one round trip per execute()."""
+
+    def __init__(self, client, rows=None):
+        self.client = client
+        self.rows = rows
+
+    def range(self, start, end):
+        return _FakeQuery(self.client, self.rows[start:end + 1])
+
+    def __getattr__(self, _name):
+        return lambda *args, **kwargs: self
+
+    def execute(self):
+        self.client.round_trips += 1
+        return SimpleNamespace(data=self.rows)
+
+
+class _FakeClient:
+    def __init__(self, users, rpc_installed):
+        self.users = users
+        self.rpc_installed = rpc_installed
+        self.round_trips = 0
+
+    def table(self, _name):
+        return _FakeTable(self)
+
+    def rpc(self, _name, _params=None):
+        if not self.rpc_installed:
+            raise Exception("function recompute_elo_ranks() does not exist")
+        return _FakeQuery(self)
+
+
+class _FakeTable:
+    def __init__(self, client):
+        self.client = client
+
+    def select(self, *_args, **_kwargs):
+        return _FakeQuery(self.client, self.client.users)
+
+    def update(self, *_args, **_kwargs):
+        return _FakeQuery(self.client)
+
+    def upsert(self, rows, **_kwargs):
+        return _FakeQuery(self.client, rows)
+
+
+class _WithoutRpc:
+    """A live client whose rpc() fails, to exercise the upsert fallback."""
+
+    def __init__(self, client):
+        self.client = client
+
+    def rpc(self, _name, _params=None):
+        raise Exception("recompute_elo_ranks disabled for the benchmark")
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+
+def _legacy_update_all_ranks(supabase):
+    """The original implementation: one read, then one UPDATE per user."""
+    users = supabase.table("elo_scores").select("id, eloscore").order("eloscore", desc=True).execute()
+    for rank, user in enumerate(users.data, 1):
+        supabase.table("elo_scores").update({"rank": rank}).eq("id", user["id"]).execute()
+
+
+def _make_users(n, id_start=1):
+    rng = random.Random(n)
+    users = [
+        {"id": i, "name": f"user{i}", "email": f"user{i}@{BENCH_EMAIL_DOMAIN}", "eloscore": rng.randint(600, 2400)}
+        for i in range(id_start, id_start + n)
+    ]
+    users.sort(key=lambda u: u["eloscore"], reverse=True)
+    return users
+
+
+def _set_based(service):
+    def run(client):
+        service.supabase = client
+        service._update_all_ranks()
+    return run
+
+
+def _run_offline(args):
+    service = SupabaseEloService.__new__(SupabaseEloService)
+    set_based = _set_based(service)
+
+    print("offline: round trips against an in-process fake; no database time is measured")
+    print(f"{'users':>10}  {'path':<8} {'round trips':>12} {'python cpu ms':>14}")
+    for n in args.sizes:
+        users = _make_users(n)
+        runs = [("rpc", set_based, _FakeClient(users, rpc_installed=True)),
+                ("upsert", set_based, _FakeClient(users, rpc_installed=False))]
+        if n <= args.legacy_max:
+            runs.append(("legacy", _legacy_update_all_ranks, _FakeClient(users, rpc_installed=True)))
+        for label, fn, client in runs:
+            start = time.perf_counter()
+            fn(client)
+            cpu_ms = (time.perf_counter() - start) * 1000
+            print(f"{n:>10}  {label:<8} {client.round_trips:>12} {cpu_ms:>14.1f}")
+
+
+def _run_live(args):
+    host = urlparse(elo_calculator.SUPABASE_URL or "").hostname
+    if host not in ("localhost", "127.0.0.1") and not args.allow_remote:
+        sys.exit(f"Refusing to rewrite ranks on {host}; point SUPABASE_URL at a local stack or pass --allow-remote")
+
+    service = SupabaseEloService()
+    client = service.supabase
+    set_based = _set_based(service)
+
+    print(f"live: wall-clock time against {elo_calculator.SUPABASE_URL}")
+    print(f"{'users':>10}  {'path':<8} {'wall ms':>10}")
+    for n in args.sizes:
+        service.bulk_upsert_scores(_make_users(n, args.id_start))
+        try:
+            runs = [("rpc", set_based, client), ("upsert", set_based, _WithoutRpc(client))]
+            if n <= args.legacy_max:
+                runs.append(("legacy", _legacy_update_all_ranks, client))
+            for label, fn, target in runs:
+                start = time.perf_counter()
+                fn(target)
+                wall_ms = (time.perf_counter() - start) * 1000
+                print(f"{n:>10}  {label:<8} {wall_ms:>10.1f}")
+        finally:
+            client.table("elo_scores").delete().like("email", f"%@{BENCH_EMAIL_DOMAIN}").execute()
+    service.supabase = client
+    service._update_all_ranks()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ELO rank recomputation")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument(
+        "--legacy-max",
+        type=int,
+        default=100_000,
+        help="Largest user count to run the legacy loop for",
+    )
+    parser.add_argument("--live", action="store_true", help="Run against the database at SUPABASE_URL")
+    parser.add_argument("--allow-remote", action="store_true", help="Allow --live against a non-local URL")
+    parser.add_argument("--id-start", type=int, default=900_000_000, help="First elo_scores id used with --live")
+    args = parser.parse_args()
+
+    if args.live:
+        _run_live(args)
+    else:
+        _run_offline(args)
+
+
+if __name__ == "__main__":
+    main()
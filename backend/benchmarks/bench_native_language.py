@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Benchmark for /api/generate_good_response in languages other than English.
+
+Compares the old path, which generated the answer in English and then made a
+second call to translate it, with the current one, which asks for the target
+language in the single generation prompt.
+
+By default tokens are estimated offline with utils.transcript.count_tokens,
+taking the translated answer to be as long as the English sample answer. With
+--live both paths call the model, and the latency and reported token usage of
+each are measured.
+
+Usage:
+    python benchmarks/bench_native_language.py --languages Spanish French Japanese
+    python benchmarks/bench_native_language.py --languages Spanish --live --runs 3
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.transcript import count_tokens
+
+QUESTION = "Tell me about a time you had to improve the performance of a slow service."
+ANSWER = ("We had an API that took two seconds per request. I profiled it, found repeated database "
+          "queries in a loop and replaced them with one batched query, which brought it to 200 ms.")
+SAMPLE_OUTPUT = (
+    "In my last role, our order-history API averaged two seconds per request and customers were "
+    "abandoning the page. I was asked to bring it under 300 ms without changing the client. I "
+    "profiled the endpoint, found that it issued one database query per order inside a loop, and "
+    "replaced that with a single batched query plus an index on the customer column. I also added "
+    "a short-lived cache for the most frequent lookups. Latency dropped to about 200 ms at the 95th "
+    "percentile and database load fell by 60 percent. I learned to measure before optimizing and "
+    "to look for N+1 query patterns early in code review."
+)
+
+
+def _translation_prompt(answer, language):
+    return f"Translate the following interview answer into {language}:\n\n{answer}"
+
+
+def _estimate(language):
+    from llm.llm_utils import generate_good_response_prompt
+    english_prompt = generate_good_response_prompt(ANSWER, QUESTION, "English")
+    native_prompt = generate_good_response_prompt(ANSWER, QUESTION, language)
+    output = count_tokens(SAMPLE_OUTPUT)
+
+    two_step = {
+        "calls": 2,
+        "input": count_tokens(english_prompt) + count_tokens(_translation_prompt(SAMPLE_OUTPUT, language)),
+        "output": 2 * output,
+    }
+    native = {"calls": 1, "input": count_tokens(native_prompt), "output": output}
+    return two_step, native
+
+
+def _usage(message):
+    usage = getattr(message, "usage_metadata", None) or {}
+    return usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+
+
+def _measure(language, runs):
+    from langchain_core.messages import HumanMessage
+    from llm.llm_interface import LLMInterface
+    from llm.llm_utils import clean_good_response, generate_good_response_prompt
+
+    llm_interface = LLMInterface()
+    results = {"two_step": [], "native": []}
+    for _ in range(runs):
+        started = time.perf_counter()
+        first = llm_interface.invoke([HumanMessage(content=generate_good_response_prompt(ANSWER, QUESTION))])[-1]
+        answer = clean_good_response(first.content)
+        second = llm_interface.invoke([HumanMessage(content=_translation_prompt(answer, language))])[-1]
+        elapsed = time.perf_counter() - started
+        (in1, out1), (in2, out2) = _usage(first), _usage(second)
+        results["two_step"].append((elapsed, in1 + in2, out1 + out2))
+
+        started = time.perf_counter()
+        native = llm_interface.invoke([
+            HumanMessage(content=generate_good_response_prompt(ANSWER, QUESTION, language))
+        ])[-1]
+        elapsed = time.perf_counter() - started
+        results["native"].append((elapsed, *_usage(native)))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark language-native answer generation")
+    parser.add_argument("--languages", nargs="+", default=["Spanish", "French", "Chinese"])
+    parser.add_argument("--live", action="store_true", help="Call the model and measure latency")
+    parser.add_argument("--runs", type=int, default=3, help="Runs per path with --live")
+    args = parser.parse_args()
+
+    if not args.live:
+        print(f"{'language':>10} {'path':>9} {'calls':>6} {'input tokens':>13} {'output tokens':>14}")
+        for language in args.languages:
+            two_step, native = _estimate(language)
+            for path, row in (("two-step", two_step), ("native", native)):
+                print(f"{language:>10} {path:>9} {row['calls']:>6} {row['input']:>13} {row['output']:>14}")
+        return
+
+    print(f"{'language':>10} {'path':>9} {'median s':>9} {'input tokens':>13} {'output tokens':>14}")
+    for language in args.languages:
+        results = _measure(language, args.runs)
+        for path, label in (("two_step", "two-step"), ("native", "native")):
+            rows = results[path]
+            latency = statistics.median(row[0] for row in rows)
+            input_tokens = statistics.mean(row[1] for row in rows)
+            output_tokens = statistics.mean(row[2] for row in rows)
+            print(f"{language:>10} {label:>9} {latency:>9.2f} {input_tokens:>13.0f} {output_tokens:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
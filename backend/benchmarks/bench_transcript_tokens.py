@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Benchmark for analysis prompt size.
+
+Compares the tokens save_analysis used to send per prompt, the conversation as
+json.dumps(conversation, indent=2), with utils.transcript.render_transcript at
+the configured budget. Conversations are synthetic: a welcome message
+repeated by the frontend, then alternating questions and answers of growing
+length.
+
+Usage:
+    python benchmarks/bench_transcript_tokens.py --turns 5 10 20 40 --budget 6000
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.transcript import count_tokens, render_transcript
+
+WELCOME = ("Welcome to your interview for a position at Acme. I'm excited to learn more about your "
+           "skills and experience. Could you please start by telling me a bit about yourself?")
+WORDS = ("system cache latency database queue service deploy team design tradeoff scale "
+         "index shard replica metric incident review python api client").split()
+
+
+def _make_conversation(turns, rng):
+    conversation = [{"role": "assistant", "content": WELCOME}, {"role": "assistant", "content": WELCOME}]
+    for turn in range(turns):
+        question = " ".join(rng.choice(WORDS) for _ in range(25)) + "?"
+        answer = " ".join(rng.choice(WORDS) for _ in range(80 + turn * 30))
+        conversation.append({"role": "user", "content": answer})
+        conversation.append({"role": "assistant", "content": question})
+    return conversation
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark analysis transcript tokens")
+    parser.add_argument("--turns", type=int, nargs="+", default=[5, 10, 20, 40])
+    parser.add_argument("--budget", type=int, default=6000)
+    args = parser.parse_args()
+
+    print(f"{'turns':>6} {'json tokens':>12} {'compact tokens':>15} {'x5 prompts saved':>17}")
+    for turns in args.turns:
+        conversation = _make_conversation(turns, random.Random(turns))
+        before = count_tokens(json.dumps(conversation, indent=2))
+        after = count_tokens(render_transcript(conversation, args.budget))
+        print(f"{turns:>6} {before:>12} {after:>15} {5 * (before - after):>17}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+# checkpointer.py
+import sqlite3
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.memory import MemorySaver
+
+
+class LatestCheckpointSaver(MemorySaver):
+    """
+    MemorySaver that keeps only the newest checkpoint of each thread.
+
+    MemorySaver stores a checkpoint, with the full message list, for every
+    step of every invoke and never deletes any, so memory per thread grows
+    roughly quadratically with the number of turns. Here each put drops the
+    thread's older checkpoints, their pending writes and any channel values
+    the new checkpoint no longer references. Only the current state can be
+    read back; history and time travel are not available.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # (thread_id, checkpoint_ns) -> channel versions of the latest checkpoint
+        self._latest_versions = {}
+        self._thread_namespaces = defaultdict(set)
+        self._lock = threading.RLock()
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        with self._lock:
+            next_config = super().put(config, checkpoint, metadata, new_versions)
+            thread_id = next_config["configurable"]["thread_id"]
+            checkpoint_ns = next_config["configurable"]["checkpoint_ns"]
+            self._prune(thread_id, checkpoint_ns, checkpoint["id"], dict(checkpoint["channel_versions"]))
+            return next_config
+
+    def put_writes(self, config, writes, task_id, task_path=""):
+        with self._lock:
+            # Writes for a checkpoint already superseded are dropped
+            thread_id = config["configurable"]["thread_id"]
+            checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+            if config["configurable"]["checkpoint_id"] not in self.storage[thread_id][checkpoint_ns]:
+                return
+            super().put_writes(config, writes, task_id, task_path)
+
+    def _prune(self, thread_id, checkpoint_ns, checkpoint_id, channel_versions):
+        checkpoints = self.storage[thread_id][checkpoint_ns]
+        for old_id in [cid for cid in checkpoints if cid != checkpoint_id]:
+            del checkpoints[old_id]
+            self.writes.pop((thread_id, checkpoint_ns, old_id), None)
+
+        key = (thread_id, checkpoint_ns)
+        for channel, version in self._latest_versions.get(key, {}).items():
+            if channel_versions.get(channel) != version:
+                self.blobs.pop((thread_id, checkpoint_ns, channel, version), None)
+        self._latest_versions[key] = channel_versions
+        self._thread_namespaces[thread_id].add(checkpoint_ns)
+
+    def release(self, thread_id):
+        """Delete everything stored for a thread."""
+        with self._lock:
+            namespaces = self._thread_namespaces.pop(thread_id, set())
+            for checkpoint_ns in namespaces:
+                for checkpoint_id in self.storage[thread_id][checkpoint_ns]:
+                    self.writes.pop((thread_id, checkpoint_ns, checkpoint_id), None)
+                for channel, version in self._latest_versions.pop((thread_id, checkpoint_ns), {}).items():
+                    self.blobs.pop((thread_id, checkpoint_ns, channel, version), None)
+            self.storage.pop(thread_id, None)
+
+
+class SqliteCheckpointSaver(BaseCheckpointSaver):
+    """
+    Checkpointer keeping the latest checkpoint of each thread in a SQLite file.
+
+    Several processes (e.g. gunicorn workers) can share one file, so any of
+    them can continue a thread another one started, and threads survive a
+    restart. The file is opened in WAL mode so readers do not block the
+    writer. Like LatestCheckpointSaver, only the current state is kept.
+    """
+
+    def __init__(self, path, serde=None):
+        """
+        Args:
+            path (str): SQLite file holding the checkpoints.
+            serde: Serializer for checkpoints and writes; LangGraph's default if omitted.
+        """
+        super().__init__(serde=serde)
+        self.path = path
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS checkpoints (
+                    thread_id TEXT NOT NULL,
+                    checkpoint_ns TEXT NOT NULL DEFAULT '',
+                    checkpoint_id TEXT NOT NULL,
+                    parent_checkpoint_id TEXT,
+                    checkpoint_type TEXT NOT NULL,
+                    checkpoint BLOB NOT NULL,
+                    metadata_type TEXT NOT NULL,
+                    metadata BLOB NOT NULL,
+                    PRIMARY KEY (thread_id, checkpoint_ns)
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS writes (
+                    thread_id TEXT NOT NULL,
+                    checkpoint_ns TEXT NOT NULL DEFAULT '',
+                    checkpoint_id TEXT NOT NULL,
+                    task_id TEXT NOT NULL,
+                    idx INTEGER NOT NULL,
+                    channel TEXT NOT NULL,
+                    value_type TEXT NOT NULL,
+                    value BLOB NOT NULL,
+                    task_path TEXT NOT NULL DEFAULT '',
+                    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+                )
+            """)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            yield conn
+        finally:
+            conn.close()
+
+    def get_tuple(self, config):
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = get_checkpoint_id(config)
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT checkpoint_id, parent_checkpoint_id, checkpoint_type, checkpoint, metadata_type, metadata "
+                "FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?",
+                (thread_id, checkpoint_ns)
+            ).fetchone()
+            if row is None or (checkpoint_id and row[0] != checkpoint_id):
+                return None
+            writes = conn.execute(
+                "SELECT task_id, channel, value_type, value FROM writes "
+                "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? ORDER BY task_id, idx",
+                (thread_id, checkpoint_ns, row[0])
+            ).fetchall()
+
+        checkpoint_id, parent_checkpoint_id = row[0], row[1]
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            },
+            checkpoint=self.serde.loads_typed((row[2], row[3])),
+            metadata=self.serde.loads_typed((row[4], row[5])),
+            pending_writes=[
+                (task_id, channel, self.serde.loads_typed((value_type, value)))
+                for task_id, channel, value_type, value in writes
+            ],
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "checkpoint_ns": checkpoint_ns,
+                        "checkpoint_id": parent_checkpoint_id,
+                    }
+                }
+                if parent_checkpoint_id
+                else None
+            ),
+        )
+
+    def list(self, config, *, filter=None, before=None, limit=None):
+        # Only the latest checkpoint is kept, so there is at most one per thread
+        if config is None:
+            return
+        checkpoint = self.get_tuple(config)
+        if checkpoint is None or limit == 0:
+            return
+        if before and checkpoint.config["configurable"]["checkpoint_id"] >= get_checkpoint_id(before):
+            return
+        if filter and any(checkpoint.metadata.get(k) != v for k, v in filter.items()):
+            return
+        yield checkpoint
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_type, checkpoint_data = self.serde.dumps_typed(checkpoint)
+        metadata_type, metadata_data = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("""
+                INSERT INTO checkpoints
+                    (thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id,
+                     checkpoint_type, checkpoint, metadata_type, metadata)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (thread_id, checkpoint_ns) DO UPDATE SET
+                    checkpoint_id = excluded.checkpoint_id,
+                    parent_checkpoint_id = excluded.parent_checkpoint_id,
+                    checkpoint_type = excluded.checkpoint_type,
+                    checkpoint = excluded.checkpoint,
+                    metadata_type = excluded.metadata_type,
+                    metadata = excluded.metadata
+            """, (
+                thread_id, checkpoint_ns, checkpoint["id"], config["configurable"].get("checkpoint_id"),
+                checkpoint_type, checkpoint_data, metadata_type, metadata_data
+            ))
+            conn.execute(
+                "DELETE FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id != ?",
+                (thread_id, checkpoint_ns, checkpoint["id"])
+            )
+            conn.execute("COMMIT")
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(self, config, writes, task_id, task_path=""):
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        rows = []
+        for idx, (channel, value) in enumerate(writes):
+            value_type, value_data = self.serde.dumps_typed(value)
+            rows.append((
+                thread_id, checkpoint_ns, checkpoint_id, task_id, WRITES_IDX_MAP.get(channel, idx),
+                channel, value_type, value_data, task_path
+            ))
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            # Special writes (negative idx) replace earlier ones; regular ones are written once
+            for verb, batch in (
+                ("INSERT OR REPLACE", [row for row in rows if row[4] < 0]),
+                ("INSERT OR IGNORE", [row for row in rows if row[4] >= 0]),
+            ):
+                conn.executemany(
+                    f"{verb} INTO writes (thread_id, checkpoint_ns, checkpoint_id, task_id, idx, "
+                    "channel, value_type, value, task_path) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    batch
+                )
+            conn.execute("COMMIT")
+
+    def release(self, thread_id):
+        """Delete everything stored for a thread."""
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM checkpoints WHERE thread_id = ?", (thread_id,))
+            conn.execute("DELETE FROM writes WHERE thread_id = ?", (thread_id,))
+            conn.execute("COMMIT")
+
+    def delete_thread(self, thread_id):
+        self.release(thread_id)
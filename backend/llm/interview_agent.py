@@ -17,11 +17,14 @@ class LLMInterviewAgent:
          or an LLM signal (e.g., a special token).
     """
 
-    def __init__(self, llm_graph: LLMGraph, question_threshold: int = 10, thread_id = "default_thread"):
+    def __init__(self, llm_graph: LLMGraph, question_threshold: int = 10, thread_id = "default_thread", turn_assessor=None, translation_catalog=None):
         """
         Args:
             llm_graph (LLMGraph): The LLM wrapper (with memory saver) to manage conversation.
             question_threshold (int): Max number of questions to ask before auto-ending.
+            turn_assessor (TurnAssessor): Optional; if set, each answer is assessed in the background.
+            translation_catalog (TranslationCatalog): Optional; if set, the closing remarks are
+                taken from it instead of being translated by the interview's LLM.
         """
         self.llm_graph = llm_graph
         self.question_threshold = question_threshold
@@ -29,6 +32,8 @@ class LLMInterviewAgent:
         self.interviewer = None
         self.conversation = []
         self.thread_id = thread_id
+        self.turn_assessor = turn_assessor
+        self.translation_catalog = translation_catalog
 
     def initialize(self, interviewer: Interviewer):
         """
@@ -78,12 +83,23 @@ class LLMInterviewAgent:
             f"9) Automatically end the interview if there have been {self.question_threshold} questions.\n"
         )
 
-        # Insert the system message to seed the context
-        self.llm_graph.invoke(SystemMessage(content=system_message_content), thread_id=self.thread_id)
+        # Seed the context with the system message; no model call is needed
+        self.llm_graph.seed([SystemMessage(content=system_message_content)], thread_id=self.thread_id)
 
         welcome_message = f"Welcome to your interview for a position at {interviewer.company_name}. I'm excited to learn more about your skills and experience. Could you please start by telling me a bit about yourself and your background?"
         self.conversation.append({"role": "assistant", "content": welcome_message})
 
+    def set_welcome(self, welcome_message: str):
+        """
+        Replace the default English welcome with the one the candidate was actually
+        sent (e.g. translated), so the first answer is assessed against it.
+        """
+        for msg in self.conversation:
+            if msg["role"] == "assistant":
+                msg["content"] = welcome_message
+                return
+        self.conversation.append({"role": "assistant", "content": welcome_message})
+
     def greet(self) -> str:
         """
         Use the LLM to produce a greeting and prompt the candidate for self-introduction.
@@ -113,10 +129,51 @@ class LLMInterviewAgent:
             f"implementations, technical decisions, or challenges they faced."
         )
         
+        self._assess_answer(user_response)
+
         # Send the analysis prompt to the LLM
         response = self.llm_graph.invoke(HumanMessage(content=user_response), thread_id=self.thread_id)
         ai_message = response["messages"][-1]
-        next_q = ai_message.content
+        return self._record_question(ai_message.content)
+
+    def stream_question(self, user_response: str):
+        """
+        Like next_question, but yield the next question's text as the LLM generates it.
+        The END_INTERVIEW token is never yielded; once the generator is exhausted,
+        check last_question() with is_end as usual.
+        """
+        self._assess_answer(user_response)
+
+        end_token = "END_INTERVIEW"
+        text = ""
+        sent = 0
+        for chunk in self.llm_graph.stream(HumanMessage(content=user_response), thread_id=self.thread_id):
+            text += chunk
+            if end_token in text:
+                continue
+            # Hold back a tail that could be the start of the end token
+            held = next((n for n in range(len(end_token) - 1, 0, -1) if text.endswith(end_token[:n])), 0)
+            if len(text) - held > sent:
+                yield text[sent:len(text) - held]
+                sent = len(text) - held
+        if end_token not in text and len(text) > sent:
+            yield text[sent:]
+
+        self._record_question(text)
+
+    def last_question(self) -> str:
+        """Return the interviewer's latest message."""
+        return next((msg["content"] for msg in reversed(self.conversation) if msg["role"] == "assistant"), "")
+
+    def _assess_answer(self, user_response: str):
+        # Assess the answer in the background while the next question is generated
+        if self.turn_assessor:
+            try:
+                self.turn_assessor.submit(self.thread_id, self.last_question(), user_response)
+            except Exception as e:
+                print(f"Error queueing turn assessment: {e}")
+
+    def _record_question(self, next_q: str) -> str:
         self.conversation.append({"role": "assistant", "content": next_q})
 
         # Count this as a new question only if the LLM hasn't ended the interview
@@ -140,6 +197,37 @@ class LLMInterviewAgent:
 
         return False
     
+    def to_state(self) -> dict:
+        """
+        Return the agent's own state as a JSON-serializable dict.
+        The conversation held by the LLM graph is checkpointed separately.
+        """
+        return {
+            "thread_id": self.thread_id,
+            "question_threshold": self.question_threshold,
+            "question_count": self.question_count,
+            "conversation": self.conversation,
+            "interviewer": vars(self.interviewer) if self.interviewer else None,
+        }
+
+    @classmethod
+    def from_state(cls, state: dict, llm_graph: LLMGraph, turn_assessor=None, translation_catalog=None) -> "LLMInterviewAgent":
+        """
+        Rebuild an agent saved with to_state, without calling the LLM.
+        """
+        agent = cls(
+            llm_graph=llm_graph,
+            question_threshold=state["question_threshold"],
+            thread_id=state["thread_id"],
+            turn_assessor=turn_assessor,
+            translation_catalog=translation_catalog
+        )
+        agent.question_count = state["question_count"]
+        agent.conversation = state["conversation"]
+        if state.get("interviewer") is not None:
+            agent.interviewer = Interviewer(**state["interviewer"])
+        return agent
+
     def record_conversation_to_json(self, filename="conversation.json"):
         """
         Saves the entire conversation to a JSON file for later review.
@@ -156,7 +244,9 @@ class LLMInterviewAgent:
         closing_remarks = "Thank you for your time. The interview has concluded."
 
         # If the interviewer's language is not English, try to translate the closing remarks
-        if self.interviewer and self.interviewer.language and self.interviewer.language.lower() != "english":
+        if self.translation_catalog and self.interviewer:
+            closing_remarks = self.translation_catalog.render("closing", self.interviewer.language)
+        elif self.interviewer and self.interviewer.language and self.interviewer.language.lower() != "english":
             
 
             # Ask the model to translate the final remarks
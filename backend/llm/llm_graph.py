@@ -1,41 +1,257 @@
 # llm_graph.py
+import os
+from langchain_core.messages import HumanMessage, SystemMessage
 from langgraph.graph import START, MessagesState, StateGraph
 from langgraph.checkpoint.memory import MemorySaver
+from utils.transcript import render_transcript
+from .checkpointer import LatestCheckpointSaver, SqliteCheckpointSaver
 from .llm_interface import LLMInterface
 
+# "latest" keeps one checkpoint per thread in memory; "full" keeps every checkpoint
+# (MemorySaver default); "sqlite" keeps the latest one in a file shared by all workers
+CHECKPOINT_MODES = ("latest", "full", "sqlite")
+CHECKPOINT_MODE = os.getenv("LLM_CHECKPOINT_MODE", "latest")
+INTERVIEW_STATE_PATH = os.getenv("INTERVIEW_STATE_PATH", "interview_state.db")
+
+# What the model sees each turn, besides the pinned context: "full" sends every
+# message, "window" only the last LLM_MEMORY_TURNS turns, "summary" those turns
+# plus a rolling summary of the older ones. "full" is the default; the others
+# change what the interviewer remembers and are opted into with LLM_MEMORY_MODE
+MEMORY_MODES = ("full", "window", "summary")
+MEMORY_MODE = os.getenv("LLM_MEMORY_MODE", "full")
+MEMORY_TURNS = int(os.getenv("LLM_MEMORY_TURNS", "6"))
+SUMMARY_MODEL = os.getenv("LLM_SUMMARY_MODEL", "gpt-4o-mini")
+# Tag on summary model runs, so their tokens are not streamed as the reply
+SUMMARY_TAG = "memory_summary"
+
+SUMMARY_PROMPT = (
+    "You keep a running summary of a job interview for the interviewer. Update the summary "
+    "with the new exchanges below. Keep the questions already asked, the candidate's key "
+    "claims, experiences and technologies, and any notable strengths or gaps. Write plain "
+    "prose, under 200 words, and reply with the summary only.\n\n"
+    "Current summary:\n{summary}\n\nNew exchanges:\n{exchanges}"
+)
+
+
+class InterviewState(MessagesState):
+    # Leading messages always sent to the model (system prompt and setup instructions)
+    pinned: int
+    # Whether the message being invoked, and its reply, should be pinned
+    pin: bool
+    # Summary of the turns before messages[summarized]
+    summary: str
+    summarized: int
+
 
 class LLMGraph:
-    def __init__(self):
+    def __init__(self, checkpoint_mode=None, state_path=INTERVIEW_STATE_PATH, memory_mode=None, memory_turns=None):
+        """
+        Args:
+            checkpoint_mode (str): "latest" keeps only each thread's newest checkpoint,
+                "full" keeps them all, "sqlite" keeps the newest one in state_path so
+                several processes can share threads; defaults to the LLM_CHECKPOINT_MODE env var.
+            state_path (str): SQLite file used by the "sqlite" mode.
+            memory_mode (str): "full", "window" or "summary" (see MEMORY_MODES);
+                defaults to the LLM_MEMORY_MODE env var.
+            memory_turns (int): Recent turns sent verbatim, at least 1; defaults to LLM_MEMORY_TURNS.
+        """
         self.llm_interface = LLMInterface()
-        self.workflow = StateGraph(state_schema=MessagesState)
+        self.checkpoint_mode = checkpoint_mode or CHECKPOINT_MODE
+        self.state_path = state_path
+        if self.checkpoint_mode not in CHECKPOINT_MODES:
+            raise ValueError(f"checkpoint_mode must be one of {', '.join(CHECKPOINT_MODES)}")
+        self.memory_mode = memory_mode or MEMORY_MODE
+        self.memory_turns = MEMORY_TURNS if memory_turns is None else memory_turns
+        if self.memory_mode not in MEMORY_MODES:
+            raise ValueError(f"memory_mode must be one of {', '.join(MEMORY_MODES)}")
+        if not isinstance(self.memory_turns, int) or self.memory_turns < 1:
+            raise ValueError("memory_turns must be an integer of at least 1")
+        self.summary_interface = (
+            LLMInterface(model_name=SUMMARY_MODEL, temperature=0, tags=[SUMMARY_TAG]) if self.memory_mode == "summary" else None
+        )
+        self.workflow = StateGraph(state_schema=InterviewState)
         self._setup_workflow()
 
     def _setup_workflow(self):
         """Set up the LangGraph workflow."""
 
-        def call_model(state: MessagesState):
+        def call_model(state: InterviewState):
             # state["messages"] contains the entire conversation so far
-            response = self.llm_interface.invoke(state["messages"])
-            return {"messages": response}
+            messages = state["messages"]
+            pinned = state.get("pinned") or _leading_system_messages(messages)
+            pin = state.get("pin") or isinstance(messages[-1], SystemMessage)
+            update = {}
+            if pin:
+                prompt = messages
+            else:
+                prompt, update = self._select_context(state, messages, pinned)
+
+            response = self.llm_interface.invoke(prompt)
+            if pin:
+                pinned = len(messages) + len(response)
+            return {"messages": response, "pinned": pinned, **update}
 
         # Single node in the graph
         self.workflow.add_node("model", call_model)
         self.workflow.add_edge(START, "model")
 
-        # MemorySaver to persist conversation
-        self.memory = MemorySaver()
+        # Checkpointer to persist conversation
+        if self.checkpoint_mode == "sqlite":
+            self.memory = SqliteCheckpointSaver(self.state_path)
+        elif self.checkpoint_mode == "latest":
+            self.memory = LatestCheckpointSaver()
+        else:
+            self.memory = MemorySaver()
         self.chat_app = self.workflow.compile(checkpointer=self.memory)
 
-    def invoke(self, input_message, thread_id="default_thread"):
+    def _select_context(self, state, messages, pinned):
+        """
+        Choose the messages sent to the model under the memory mode.
+
+        The pinned context always goes first. In "summary" mode, once 2 * memory_turns
+        turns are unsummarized, all but the last memory_turns are folded into the
+        summary, so the prompt holds between memory_turns and 2 * memory_turns turns.
+
+        Returns:
+            tuple: (prompt messages, state updates)
+        """
+        if self.memory_mode == "full":
+            return messages, {}
+
+        # A turn starts at each human message after the pinned context
+        starts = [i for i in range(pinned, len(messages)) if isinstance(messages[i], HumanMessage)]
+        if self.memory_mode == "window":
+            window_start = starts[-self.memory_turns] if len(starts) > self.memory_turns else pinned
+            return messages[:pinned] + messages[window_start:], {}
+
+        summary = state.get("summary", "")
+        summarized = max(state.get("summarized", 0), pinned)
+        unsummarized = [i for i in starts if i >= summarized]
+        update = {}
+        if len(unsummarized) >= 2 * self.memory_turns:
+            fold_end = unsummarized[-self.memory_turns]
+            try:
+                summary = self._summarize(summary, messages[summarized:fold_end])
+                summarized = fold_end
+                update = {"summary": summary, "summarized": summarized}
+            except Exception as e:
+                # Send the turns verbatim and try again next turn
+                print(f"Error summarizing conversation: {e}")
+
+        prompt = messages[:pinned]
+        if summary:
+            prompt.append(SystemMessage(content=f"Summary of the interview so far:\n{summary}"))
+        return prompt + messages[summarized:], update
+
+    def _summarize(self, summary, messages):
+        """Fold messages into the running summary with the summary model."""
+        exchanges = render_transcript(
+            [
+                {"role": "user" if isinstance(msg, HumanMessage) else "assistant", "content": msg.content}
+                for msg in messages
+            ],
+            token_budget=None
+        )
+        response = self.summary_interface.invoke([
+            HumanMessage(content=SUMMARY_PROMPT.format(summary=summary or "(none yet)", exchanges=exchanges))
+        ])
+        return response[-1].content.strip()
+
+    def invoke(self, input_message, thread_id="default_thread", pin=False):
         """
         Invoke the LangGraph application with a new message.
         
         Args:
             input_message (HumanMessage): The user's input message.
             thread_id (str): The thread ID for persistent memory.
+            pin (bool): Keep this message and the reply in the context sent every turn,
+                with everything before them. System messages are always pinned.
         
         Returns:
             dict: Output from the LangGraph application.
         """
         config = {"configurable": {"thread_id": thread_id}}
-        return self.chat_app.invoke({"messages": [input_message]}, config)
\ No newline at end of file
+        return self.chat_app.invoke({"messages": [input_message], "pin": pin}, config)
+
+    def seed(self, messages, thread_id="default_thread"):
+        """
+        Add context messages to a thread without calling the model.
+
+        The messages are written straight into the thread's state and pinned
+        with everything before them, like messages invoked with pin=True.
+        
+        Args:
+            messages (list): System or instruction messages, and optionally the
+                interviewer's opening AIMessage.
+            thread_id (str): The thread ID for persistent memory.
+        """
+        config = {"configurable": {"thread_id": thread_id}}
+        existing = self.get_messages(thread_id)
+        self.chat_app.update_state(
+            config,
+            {"messages": list(messages), "pinned": len(existing) + len(messages)},
+            as_node="model"
+        )
+
+    def stream(self, input_message, thread_id="default_thread", pin=False):
+        """
+        Invoke the LangGraph application with a new message, yielding the reply as it is generated.
+        
+        Args:
+            input_message (HumanMessage): The user's input message.
+            thread_id (str): The thread ID for persistent memory.
+            pin (bool): As for invoke.
+        
+        Yields:
+            str: Pieces of the reply's text, in order.
+        """
+        config = {"configurable": {"thread_id": thread_id}}
+        streamed = False
+        final = None
+        for mode, event in self.chat_app.stream(
+            {"messages": [input_message], "pin": pin}, config, stream_mode=["messages", "values"]
+        ):
+            if mode == "values":
+                final = event
+                continue
+            chunk, metadata = event
+            if SUMMARY_TAG in (metadata.get("tags") or []) or not isinstance(chunk.content, str):
+                continue
+            if chunk.content:
+                streamed = True
+                yield chunk.content
+        # Models that do not stream still produce the whole reply at the end
+        if not streamed and final and final.get("messages"):
+            yield final["messages"][-1].content
+
+    def get_messages(self, thread_id="default_thread"):
+        """
+        Return the messages checkpointed for a thread.
+        
+        Args:
+            thread_id (str): The thread ID for persistent memory.
+        
+        Returns:
+            list: The thread's messages, empty if it has none.
+        """
+        config = {"configurable": {"thread_id": thread_id}}
+        return self.chat_app.get_state(config).values.get("messages", [])
+
+    def release(self, thread_id):
+        """
+        Free everything checkpointed for a thread once its conversation is over.
+        
+        Args:
+            thread_id (str): The thread ID to forget.
+        """
+        if hasattr(self.memory, "release"):
+            self.memory.release(thread_id)
+        else:
+            self.memory.delete_thread(thread_id)
+
+
+def _leading_system_messages(messages):
+    count = 0
+    while count < len(messages) and isinstance(messages[count], SystemMessage):
+        count += 1
+    return count
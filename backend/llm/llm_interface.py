@@ -3,8 +3,14 @@ from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage
 
 class LLMInterface:
-    def __init__(self, model_name="gpt-4", temperature=0.7):
-        self.model = ChatOpenAI(model_name=model_name, temperature=temperature)
+    def __init__(self, model_name="gpt-4", temperature=0.7, tags=None):
+        """
+        Args:
+            model_name (str): OpenAI chat model.
+            temperature (float): Sampling temperature.
+            tags (list): Callback tags for the model's runs, e.g. to tell them apart when streaming.
+        """
+        self.model = ChatOpenAI(model_name=model_name, temperature=temperature, tags=tags)
 
     def invoke(self, messages):
         """
@@ -75,4 +75,127 @@ def extract_json_from_response(response_content: str) -> dict:
     try:
         return json.loads(match.group(1))
     except json.JSONDecodeError:
-        raise ValueError("Failed to parse JSON from the model's response.")
\ No newline at end of file
+        raise ValueError("Failed to parse JSON from the model's response.")
+
+
+def generate_good_response_prompt(user_message: str, ai_question: str = "", language: str = "English") -> str:
+    """
+    Generates a prompt for the LLM to write an improved version of a candidate's answer.
+
+    Args:
+        user_message (str): The candidate's original answer.
+        ai_question (str): The interviewer's question, if known.
+        language (str): Language to write the improved answer in.
+
+    Returns:
+        str: Prompt for the LLM.
+    """
+    # Asking for the target language up front replaces a second translation call
+    language_requirements = ""
+    if language and language.strip().lower() != "english":
+        language_requirements = f"""LANGUAGE REQUIREMENTS:
+- Write the entire answer in {language}, as a fluent native speaker would
+- Keep technical terms, product names and code in their usual form
+
+"""
+
+    return f"""As an expert interview coach, your task is to create an improved interview answer.
+
+INTERVIEW CONTEXT:
+Interviewer's Question: "{ai_question if ai_question else 'Not provided'}"
+
+Candidate's Original Answer:
+"{user_message}"
+
+INSTRUCTIONS:
+Analyze the type of question (behavioral, technical, situational, or general), but DO NOT include this analysis in your response.
+
+Create an improved answer following the appropriate guidelines for that question type:
+
+FOR BEHAVIORAL QUESTIONS:
+- Use the STAR format (Situation, Task, Action, Results)
+- Include specific details about the context
+- Focus on YOUR actions and contributions 
+- Quantify results when possible
+- End with lessons learned
+
+FOR TECHNICAL QUESTIONS:
+- Start with a clear definition or explanation of the concept
+- Provide examples that demonstrate understanding
+- Explain any relevant trade-offs or alternatives
+- Connect the concept to real-world applications
+- Show both theoretical knowledge and practical experience
+
+FOR SITUATIONAL QUESTIONS:
+- Outline your approach step-by-step
+- Explain your reasoning for each decision
+- Demonstrate problem-solving skills and critical thinking
+- Focus on collaboration and communication strategies
+- Consider multiple perspectives or solutions
+
+FOR GENERAL QUESTIONS:
+- Be concise and focused
+- Highlight relevant experiences and skills
+- Align your answer with the job requirements
+- Show enthusiasm and genuine interest
+- Demonstrate self-awareness and growth mindset
+
+GENERAL GUIDELINES:
+- Be concise but thorough
+- Use professional but natural language
+- Show confidence without arrogance
+- Address the specific question directly
+- Avoid clichés and generic statements
+- Structure the answer with clear beginning, middle, and end
+
+RESPONSE FORMAT REQUIREMENTS:
+- Start directly with the improved answer content
+- DO NOT include any classification of the question type
+- DO NOT include phrases like "Improved Answer:" or "This is a technical question"
+- DO NOT include any meta-commentary about the answer
+- Provide ONLY the answer itself
+
+{language_requirements}Your response:"""
+
+
+def clean_good_response(response_content: str) -> str:
+    """
+    Strips question-type labels and "Improved answer:" style prefixes from a generated answer.
+
+    Args:
+        response_content (str): Response content from the LLM.
+
+    Returns:
+        str: The answer alone.
+    """
+    good_response = response_content
+
+    clean_prefixes = [
+        "This is a behavioral question.", 
+        "This is a technical question.", 
+        "This is a situational question.", 
+        "This is a general question.",
+        "This is a behavioral question:", 
+        "This is a technical question:", 
+        "This is a situational question:", 
+        "This is a general question:",
+        "Improved Answer:", 
+        "IMPROVED ANSWER:"
+    ]
+    
+    for prefix in clean_prefixes:
+        if good_response.startswith(prefix):
+            good_response = good_response[len(prefix):].strip()
+    
+    patterns = [
+        r'^This is an? \w+ question\.\s*',
+        r'^This is an? \w+ question:\s*',
+        r'^Improved answer:\s*',
+        r'^Here\'s an improved answer:\s*',
+        r'^Here is an improved answer:\s*',
+    ]
+    
+    for pattern in patterns:
+        good_response = re.sub(pattern, '', good_response, flags=re.IGNORECASE)
+
+    return good_response.strip()
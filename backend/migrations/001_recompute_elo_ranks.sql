@@ -0,0 +1,21 @@
+-- Recompute every rank in elo_scores with a single set-based UPDATE.
+--
+-- Called from SupabaseEloService._update_all_ranks via
+--   supabase.rpc("recompute_elo_ranks").execute()
+-- Users with the same eloscore share a rank (1, 2, 2, 4, ...).
+
+CREATE INDEX IF NOT EXISTS elo_scores_eloscore_idx ON elo_scores (eloscore DESC);
+
+CREATE OR REPLACE FUNCTION recompute_elo_ranks()
+RETURNS void
+LANGUAGE sql
+AS $$
+    UPDATE elo_scores AS e
+    SET rank = r.new_rank
+    FROM (
+        SELECT id, RANK() OVER (ORDER BY eloscore DESC) AS new_rank
+        FROM elo_scores
+    ) AS r
+    WHERE e.id = r.id
+      AND e.rank IS DISTINCT FROM r.new_rank;
+$$;
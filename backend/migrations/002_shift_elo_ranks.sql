@@ -0,0 +1,36 @@
+-- Incremental rank maintenance for a single ELO change.
+--
+-- Called from SupabaseEloService._shift_ranks via
+--   supabase.rpc("shift_elo_ranks", {...}).execute()
+-- Ranks follow the same rule as recompute_elo_ranks(): one plus the number
+-- of users with a strictly higher eloscore. When a user moves from old_elo to
+-- new_elo only the users whose score lies in between change rank, so a single
+-- range UPDATE of rank +/- 1 keeps the column correct. p_old_elo is NULL for
+-- a user who was just inserted.
+--
+-- recompute_elo_ranks() remains the periodic repair job for any drift caused
+-- by concurrent updates.
+
+CREATE OR REPLACE FUNCTION shift_elo_ranks(p_user_id bigint, p_old_elo integer, p_new_elo integer)
+RETURNS integer
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_rank integer;
+BEGIN
+    IF p_old_elo IS NULL THEN
+        UPDATE elo_scores SET rank = rank + 1
+        WHERE id <> p_user_id AND eloscore < p_new_elo;
+    ELSIF p_new_elo > p_old_elo THEN
+        UPDATE elo_scores SET rank = rank + 1
+        WHERE id <> p_user_id AND eloscore >= p_old_elo AND eloscore < p_new_elo;
+    ELSIF p_new_elo < p_old_elo THEN
+        UPDATE elo_scores SET rank = rank - 1
+        WHERE id <> p_user_id AND eloscore >= p_new_elo AND eloscore < p_old_elo;
+    END IF;
+
+    SELECT count(*) + 1 INTO v_rank FROM elo_scores WHERE eloscore > p_new_elo;
+    UPDATE elo_scores SET rank = v_rank WHERE id = p_user_id;
+    RETURN v_rank;
+END;
+$$;
@@ -0,0 +1,81 @@
+-- Single-round-trip ELO update.
+--
+-- Called from SupabaseEloService.update_elo_score via
+--   supabase.rpc("apply_elo_result", {...}).execute()
+-- Reads the user's current score, applies the ELO formula, upserts the score,
+-- maintains ranks and appends exactly one elo_history row, all in one
+-- transaction. A per-email advisory lock serializes concurrent updates for the
+-- same user so none are lost. The rating constants are passed in by the caller
+-- so services/elo_calculator.py stays the single source of truth.
+
+CREATE UNIQUE INDEX IF NOT EXISTS elo_scores_email_key ON elo_scores (email);
+
+CREATE OR REPLACE FUNCTION apply_elo_result(
+    p_email text,
+    p_name text,
+    p_actual_result double precision,
+    p_benchmark_elo integer,
+    p_base_elo integer,
+    p_k_default integer,
+    p_k_high integer,
+    p_k_low integer,
+    p_high_rated_elo integer,
+    p_low_rated_elo integer,
+    p_incremental_ranks boolean DEFAULT true
+)
+RETURNS TABLE (user_id bigint, old_elo integer, new_elo integer, rank integer, created_at timestamptz)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_id bigint;
+    v_old integer;
+    v_new integer;
+    v_k integer;
+    v_rank integer;
+    v_now timestamptz := now();
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext('elo_scores:' || p_email));
+
+    SELECT e.id, e.eloscore INTO v_id, v_old
+    FROM elo_scores AS e
+    WHERE e.email = p_email
+    FOR UPDATE;
+
+    IF v_id IS NULL THEN
+        v_old := p_base_elo;
+    END IF;
+
+    v_k := CASE
+        WHEN v_old > p_high_rated_elo THEN p_k_high
+        WHEN v_old < p_low_rated_elo THEN p_k_low
+        ELSE p_k_default
+    END;
+
+    -- round(double precision) rounds half to even, like Python's round()
+    v_new := round(
+        v_old + v_k * (p_actual_result - 1 / (1 + power(10::double precision, (p_benchmark_elo - v_old) / 400.0::double precision)))
+    )::integer;
+
+    IF v_id IS NULL THEN
+        PERFORM pg_advisory_xact_lock(hashtext('elo_scores:next_id'));
+        SELECT coalesce(max(e.id), 0) + 1 INTO v_id FROM elo_scores AS e;
+        INSERT INTO elo_scores (id, name, email, eloscore, rank)
+        VALUES (v_id, p_name, p_email, v_new, 1);
+        v_old := NULL;
+    ELSE
+        UPDATE elo_scores SET eloscore = v_new WHERE id = v_id;
+    END IF;
+
+    IF p_incremental_ranks THEN
+        v_rank := shift_elo_ranks(v_id, v_old, v_new);
+    ELSE
+        PERFORM recompute_elo_ranks();
+        SELECT e.rank INTO v_rank FROM elo_scores AS e WHERE e.id = v_id;
+    END IF;
+
+    INSERT INTO elo_history (name, email, eloscore, created_at)
+    VALUES (p_name, p_email, v_new, v_now);
+
+    RETURN QUERY SELECT v_id, coalesce(v_old, p_base_elo), v_new, v_rank, v_now;
+END;
+$$;
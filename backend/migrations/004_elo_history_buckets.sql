@@ -0,0 +1,31 @@
+-- Per-bucket ELO history for the progress chart.
+--
+-- Called from SupabaseEloService.get_user_elo_history via
+--   supabase.rpc("elo_history_buckets", {"p_email": ..., "p_bucket": ..., "p_limit": ...}).execute()
+-- Returns one row per day, week or month (newest first) with the bucket's last,
+-- lowest and highest score, so the payload is bounded by p_limit no matter how
+-- many interviews the user has done.
+
+CREATE INDEX IF NOT EXISTS elo_history_email_created_at_idx ON elo_history (email, created_at);
+
+CREATE OR REPLACE FUNCTION elo_history_buckets(
+    p_email text,
+    p_bucket text,
+    p_limit integer DEFAULT 90
+)
+RETURNS TABLE (bucket_date date, last_score integer, min_score integer, max_score integer, entries bigint)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT
+        date_trunc(p_bucket, h.created_at)::date AS bucket_date,
+        ((array_agg(h.eloscore ORDER BY h.created_at DESC))[1])::integer AS last_score,
+        min(h.eloscore)::integer AS min_score,
+        max(h.eloscore)::integer AS max_score,
+        count(*) AS entries
+    FROM elo_history AS h
+    WHERE h.email = p_email
+    GROUP BY 1
+    ORDER BY 1 DESC
+    LIMIT p_limit;
+$$;
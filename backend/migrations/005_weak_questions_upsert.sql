@@ -0,0 +1,62 @@
+-- Single-request weak-question writes.
+--
+-- Called from ChatHistoryService._save_weak_questions via
+--   supabase.rpc("upsert_weak_questions", {...}).execute()
+-- Questions are keyed on (email, session_id, question_key), where question_key
+-- is the question text with whitespace collapsed and lower-cased, matching
+-- question_key() in services/chat_history_service.py. New questions are
+-- inserted as weak; existing ones only get is_weak set, so favourites and
+-- saved answers are kept.
+
+ALTER TABLE interview_questions
+    ADD COLUMN IF NOT EXISTS question_key text
+    GENERATED ALWAYS AS (lower(btrim(regexp_replace(question_text, '\s+', ' ', 'g')))) STORED;
+
+-- Merge rows that already share a key into the oldest one before adding the
+-- unique index
+UPDATE interview_questions q
+SET is_weak = d.any_weak,
+    is_favorite = d.any_favorite
+FROM (
+    SELECT min(id) AS keep_id,
+           bool_or(coalesce(is_weak, false)) AS any_weak,
+           bool_or(coalesce(is_favorite, false)) AS any_favorite
+    FROM interview_questions
+    GROUP BY email, session_id, question_key
+    HAVING count(*) > 1
+) d
+WHERE q.id = d.keep_id;
+
+DELETE FROM interview_questions q
+USING interview_questions k
+WHERE k.email IS NOT DISTINCT FROM q.email
+  AND k.session_id IS NOT DISTINCT FROM q.session_id
+  AND k.question_key IS NOT DISTINCT FROM q.question_key
+  AND k.id < q.id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS interview_questions_email_session_key
+    ON interview_questions (email, session_id, question_key) NULLS NOT DISTINCT;
+
+CREATE OR REPLACE FUNCTION upsert_weak_questions(
+    p_email text,
+    p_session_id text,
+    p_questions text[]
+)
+RETURNS integer
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_count integer;
+BEGIN
+    INSERT INTO interview_questions (question_text, session_id, email, is_weak, created_at)
+    SELECT DISTINCT ON (lower(btrim(regexp_replace(q, '\s+', ' ', 'g'))))
+           btrim(q), p_session_id, p_email, true, now()
+    FROM unnest(p_questions) AS q
+    WHERE btrim(coalesce(q, '')) <> ''
+    ON CONFLICT (email, session_id, question_key) DO UPDATE
+        SET is_weak = true;
+
+    GET DIAGNOSTICS v_count = ROW_COUNT;
+    RETURN v_count;
+END;
+$$;
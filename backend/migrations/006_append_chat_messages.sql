@@ -0,0 +1,105 @@
+-- Append-only chat history saves.
+--
+-- Called from ChatHistoryService.save_chat_history via
+--   supabase.rpc("append_chat_messages", {...}).execute()
+-- The client sends only the messages after p_base_count, the number it knows
+-- are already stored. They are appended to log and audio_metadata in place and
+-- message_count is kept up to date, so a save never sends or rewrites the
+-- whole transcript from the application. A full message list with
+-- p_base_count = 0 still works: messages already stored are skipped. If the
+-- client is ahead of what is stored (p_base_count > message_count) nothing is
+-- written and the stored count is returned so it can resend from there.
+-- A per-thread advisory lock serializes concurrent saves of one interview.
+
+ALTER TABLE interview_logs ADD COLUMN IF NOT EXISTS message_count integer NOT NULL DEFAULT 0;
+
+UPDATE interview_logs
+SET message_count = jsonb_array_length(log::jsonb)
+WHERE log IS NOT NULL AND log <> '';
+
+CREATE INDEX IF NOT EXISTS interview_logs_thread_id_idx ON interview_logs (thread_id);
+
+CREATE OR REPLACE FUNCTION append_chat_messages(
+    p_thread_id text,
+    p_email text,
+    p_config_name text,
+    p_config_id text,
+    p_base_count integer,
+    p_messages jsonb
+)
+RETURNS TABLE (interview_id bigint, message_count integer, appended integer)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_id bigint;
+    v_count integer := 0;
+    v_log jsonb;
+    v_audio jsonb;
+    v_new integer;
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext('interview_logs:' || p_thread_id));
+
+    SELECT l.id, l.message_count INTO v_id, v_count
+    FROM interview_logs AS l
+    WHERE l.thread_id = p_thread_id
+    ORDER BY l.id
+    LIMIT 1;
+    v_count := coalesce(v_count, 0);
+
+    -- Rows written without the counter (before this migration's backfill ran
+    -- on them, or by the application fallback) are counted once here
+    IF v_id IS NOT NULL AND v_count = 0 THEN
+        SELECT coalesce(jsonb_array_length(nullif(l.log, '')::jsonb), 0) INTO v_count
+        FROM interview_logs AS l WHERE l.id = v_id;
+    END IF;
+
+    IF p_base_count > v_count THEN
+        RETURN QUERY SELECT v_id, v_count, 0;
+        RETURN;
+    END IF;
+
+    -- Skip messages the client sent again that are already stored
+    SELECT
+        coalesce(jsonb_agg(
+            jsonb_build_object('text', coalesce(t.m -> 'text', '""'::jsonb), 'sender', t.m -> 'sender')
+            ORDER BY t.i), '[]'::jsonb),
+        coalesce(jsonb_agg(
+            jsonb_build_object('audioUrl', t.m -> 'audioUrl', 'storagePath', t.m -> 'storagePath')
+            ORDER BY t.i)
+            FILTER (WHERE nullif(t.m ->> 'audioUrl', '') IS NOT NULL OR nullif(t.m ->> 'storagePath', '') IS NOT NULL),
+            '[]'::jsonb),
+        count(*)
+    INTO v_log, v_audio, v_new
+    FROM jsonb_array_elements(coalesce(p_messages, '[]'::jsonb)) WITH ORDINALITY AS t(m, i)
+    WHERE t.i > v_count - p_base_count;
+
+    IF v_new = 0 THEN
+        RETURN QUERY SELECT v_id, v_count, 0;
+        RETURN;
+    END IF;
+
+    IF v_id IS NULL THEN
+        INSERT INTO interview_logs
+            (thread_id, email, config_name, config_id, log, audio_metadata, message_count, created_at, updated_at)
+        VALUES (
+            p_thread_id, p_email, p_config_name, p_config_id, v_log::text,
+            CASE WHEN jsonb_array_length(v_audio) > 0 THEN v_audio::text END,
+            v_new, now(), now()
+        )
+        RETURNING id INTO v_id;
+    ELSE
+        UPDATE interview_logs AS l SET
+            log = (coalesce(nullif(l.log, ''), '[]')::jsonb || v_log)::text,
+            audio_metadata = CASE
+                WHEN jsonb_array_length(v_audio) > 0
+                THEN (coalesce(nullif(l.audio_metadata, ''), '[]')::jsonb || v_audio)::text
+                ELSE l.audio_metadata
+            END,
+            message_count = v_count + v_new,
+            updated_at = now()
+        WHERE l.id = v_id;
+    END IF;
+
+    RETURN QUERY SELECT v_id, v_count + v_new, v_new;
+END;
+$$;
@@ -0,0 +1,104 @@
+-- append_chat_messages also returns the stored row's metadata.
+--
+-- POST /api/chat_history answers with the saved record; returning it from the
+-- append saves the route a second select of the row (and its whole log).
+-- The transcript itself is not returned. Same behaviour as 006 otherwise.
+
+DROP FUNCTION IF EXISTS append_chat_messages(text, text, text, text, integer, jsonb);
+
+CREATE OR REPLACE FUNCTION append_chat_messages(
+    p_thread_id text,
+    p_email text,
+    p_config_name text,
+    p_config_id text,
+    p_base_count integer,
+    p_messages jsonb
+)
+RETURNS TABLE (
+    interview_id bigint,
+    message_count integer,
+    appended integer,
+    thread_id text,
+    email text,
+    config_name text,
+    config_id text,
+    created_at text,
+    updated_at text
+)
+LANGUAGE plpgsql
+AS $$
+#variable_conflict use_column
+DECLARE
+    v_id bigint;
+    v_count integer := 0;
+    v_log jsonb;
+    v_audio jsonb;
+    v_new integer := 0;
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext('interview_logs:' || p_thread_id));
+
+    SELECT l.id, l.message_count INTO v_id, v_count
+    FROM interview_logs AS l
+    WHERE l.thread_id = p_thread_id
+    ORDER BY l.id
+    LIMIT 1;
+    v_count := coalesce(v_count, 0);
+
+    -- Rows written without the counter (before this migration's backfill ran
+    -- on them, or by the application fallback) are counted once here
+    IF v_id IS NOT NULL AND v_count = 0 THEN
+        SELECT coalesce(jsonb_array_length(nullif(l.log, '')::jsonb), 0) INTO v_count
+        FROM interview_logs AS l WHERE l.id = v_id;
+    END IF;
+
+    IF p_base_count <= v_count THEN
+        -- Skip messages the client sent again that are already stored
+        SELECT
+            coalesce(jsonb_agg(
+                jsonb_build_object('text', coalesce(t.m -> 'text', '""'::jsonb), 'sender', t.m -> 'sender')
+                ORDER BY t.i), '[]'::jsonb),
+            coalesce(jsonb_agg(
+                jsonb_build_object('audioUrl', t.m -> 'audioUrl', 'storagePath', t.m -> 'storagePath')
+                ORDER BY t.i)
+                FILTER (WHERE nullif(t.m ->> 'audioUrl', '') IS NOT NULL OR nullif(t.m ->> 'storagePath', '') IS NOT NULL),
+                '[]'::jsonb),
+            count(*)
+        INTO v_log, v_audio, v_new
+        FROM jsonb_array_elements(coalesce(p_messages, '[]'::jsonb)) WITH ORDINALITY AS t(m, i)
+        WHERE t.i > v_count - p_base_count;
+    END IF;
+
+    IF v_new > 0 AND v_id IS NULL THEN
+        INSERT INTO interview_logs
+            (thread_id, email, config_name, config_id, log, audio_metadata, message_count, created_at, updated_at)
+        VALUES (
+            p_thread_id, p_email, p_config_name, p_config_id, v_log::text,
+            CASE WHEN jsonb_array_length(v_audio) > 0 THEN v_audio::text END,
+            v_new, now(), now()
+        )
+        RETURNING id INTO v_id;
+    ELSIF v_new > 0 THEN
+        UPDATE interview_logs AS l SET
+            log = (coalesce(nullif(l.log, ''), '[]')::jsonb || v_log)::text,
+            audio_metadata = CASE
+                WHEN jsonb_array_length(v_audio) > 0
+                THEN (coalesce(nullif(l.audio_metadata, ''), '[]')::jsonb || v_audio)::text
+                ELSE l.audio_metadata
+            END,
+            message_count = v_count + v_new,
+            updated_at = now()
+        WHERE l.id = v_id;
+    END IF;
+
+    IF v_id IS NULL THEN
+        RETURN QUERY SELECT NULL::bigint, 0, 0, NULL::text, NULL::text, NULL::text, NULL::text, NULL::text, NULL::text;
+        RETURN;
+    END IF;
+
+    RETURN QUERY
+    SELECT v_id, v_count + v_new, v_new, l.thread_id::text, l.email::text, l.config_name::text,
+           l.config_id::text, l.created_at::text, l.updated_at::text
+    FROM interview_logs AS l
+    WHERE l.id = v_id;
+END;
+$$;
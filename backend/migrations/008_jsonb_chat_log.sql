@@ -0,0 +1,119 @@
+-- Store interview transcripts as one JSONB array.
+--
+-- interview_logs.log becomes jsonb, and each message carries its own audio
+-- fields ("audioUrl", "storagePath") instead of a separate audio_metadata
+-- array matched up by index. GET /api/chat_history/<id> then returns the
+-- stored array as-is (PostgREST selects it as "messages"), with nothing to
+-- decode, merge or re-encode in the application. audio_metadata is kept for
+-- old rows but no longer written.
+
+CREATE OR REPLACE FUNCTION pg_temp.merge_log_audio(p_log text, p_audio text)
+RETURNS jsonb
+LANGUAGE sql
+IMMUTABLE
+AS $$
+    SELECT coalesce(jsonb_agg(
+        CASE WHEN jsonb_typeof(t.m) = 'object'
+             THEN t.m || jsonb_strip_nulls(jsonb_build_object(
+                    'audioUrl', nullif(a.a -> 'audioUrl', '""'::jsonb),
+                    'storagePath', nullif(a.a -> 'storagePath', '""'::jsonb)))
+             ELSE t.m
+        END
+        ORDER BY t.i), '[]'::jsonb)
+    FROM jsonb_array_elements(coalesce(nullif(p_log, ''), '[]')::jsonb) WITH ORDINALITY AS t(m, i)
+    LEFT JOIN jsonb_array_elements(coalesce(nullif(p_audio, ''), '[]')::jsonb) WITH ORDINALITY AS a(a, j)
+        ON a.j = t.i;
+$$;
+
+ALTER TABLE interview_logs
+    ALTER COLUMN log DROP DEFAULT,
+    ALTER COLUMN log TYPE jsonb USING pg_temp.merge_log_audio(log, audio_metadata),
+    ALTER COLUMN log SET DEFAULT '[]'::jsonb;
+
+COMMENT ON COLUMN interview_logs.audio_metadata IS
+    'Deprecated: audio fields are stored on each message in log since migration 008';
+
+-- Same contract as 007, appending to the jsonb log
+CREATE OR REPLACE FUNCTION append_chat_messages(
+    p_thread_id text,
+    p_email text,
+    p_config_name text,
+    p_config_id text,
+    p_base_count integer,
+    p_messages jsonb
+)
+RETURNS TABLE (
+    interview_id bigint,
+    message_count integer,
+    appended integer,
+    thread_id text,
+    email text,
+    config_name text,
+    config_id text,
+    created_at text,
+    updated_at text
+)
+LANGUAGE plpgsql
+AS $$
+#variable_conflict use_column
+DECLARE
+    v_id bigint;
+    v_count integer := 0;
+    v_log jsonb;
+    v_new integer := 0;
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext('interview_logs:' || p_thread_id));
+
+    SELECT l.id, l.message_count INTO v_id, v_count
+    FROM interview_logs AS l
+    WHERE l.thread_id = p_thread_id
+    ORDER BY l.id
+    LIMIT 1;
+    v_count := coalesce(v_count, 0);
+
+    -- Rows written without the counter are counted once here
+    IF v_id IS NOT NULL AND v_count = 0 THEN
+        SELECT coalesce(jsonb_array_length(l.log), 0) INTO v_count
+        FROM interview_logs AS l WHERE l.id = v_id;
+    END IF;
+
+    IF p_base_count <= v_count THEN
+        -- Skip messages the client sent again that are already stored
+        SELECT
+            coalesce(jsonb_agg(
+                jsonb_build_object('text', coalesce(t.m -> 'text', '""'::jsonb), 'sender', t.m -> 'sender')
+                || jsonb_strip_nulls(jsonb_build_object(
+                    'audioUrl', nullif(t.m -> 'audioUrl', '""'::jsonb),
+                    'storagePath', nullif(t.m -> 'storagePath', '""'::jsonb)))
+                ORDER BY t.i), '[]'::jsonb),
+            count(*)
+        INTO v_log, v_new
+        FROM jsonb_array_elements(coalesce(p_messages, '[]'::jsonb)) WITH ORDINALITY AS t(m, i)
+        WHERE t.i > v_count - p_base_count;
+    END IF;
+
+    IF v_new > 0 AND v_id IS NULL THEN
+        INSERT INTO interview_logs
+            (thread_id, email, config_name, config_id, log, message_count, created_at, updated_at)
+        VALUES (p_thread_id, p_email, p_config_name, p_config_id, v_log, v_new, now(), now())
+        RETURNING id INTO v_id;
+    ELSIF v_new > 0 THEN
+        UPDATE interview_logs AS l SET
+            log = coalesce(l.log, '[]'::jsonb) || v_log,
+            message_count = v_count + v_new,
+            updated_at = now()
+        WHERE l.id = v_id;
+    END IF;
+
+    IF v_id IS NULL THEN
+        RETURN QUERY SELECT NULL::bigint, 0, 0, NULL::text, NULL::text, NULL::text, NULL::text, NULL::text, NULL::text;
+        RETURN;
+    END IF;
+
+    RETURN QUERY
+    SELECT v_id, v_count + v_new, v_new, l.thread_id::text, l.email::text, l.config_name::text,
+           l.config_id::text, l.created_at::text, l.updated_at::text
+    FROM interview_logs AS l
+    WHERE l.id = v_id;
+END;
+$$;
@@ -0,0 +1,7 @@
+-- Index for leaderboard index syncing.
+--
+-- SupabaseEloService._sync_leaderboard asks every few seconds for elo_history
+-- rows newer than the last one it applied, and rebuild_leaderboard reads the
+-- newest created_at, so both need an index on created_at alone.
+
+CREATE INDEX IF NOT EXISTS elo_history_created_at_idx ON elo_history (created_at);
@@ -0,0 +1,12 @@
+-- Replay key for elo_history.
+--
+-- EloReplayEngine writes one history row per interview and tags it with the
+-- interview's id, upserting on it via
+--   supabase.table("elo_history").upsert(rows, on_conflict="interview_id")
+-- so a page re-applied after a crash replaces its rows instead of duplicating
+-- them. Rows written by the live path leave interview_id NULL, which the
+-- unique index does not constrain.
+
+ALTER TABLE elo_history ADD COLUMN IF NOT EXISTS interview_id bigint;
+
+CREATE UNIQUE INDEX IF NOT EXISTS elo_history_interview_id_key ON elo_history (interview_id);
@@ -0,0 +1,8 @@
+-- Row id for leaderboard index syncing.
+--
+-- SupabaseEloService._sync_leaderboard rereads elo_history rows from shortly
+-- before the newest one it applied (created_at >= mark - lookback), so rows
+-- sharing a timestamp or committed late are not missed, and skips the rows it
+-- has already applied by id. Tables created without an id column get one.
+
+ALTER TABLE elo_history ADD COLUMN IF NOT EXISTS id bigint GENERATED BY DEFAULT AS IDENTITY;
@@ -0,0 +1,302 @@
+"""
+Background queue for interview analysis.
+
+POST /api/chat_history stores the transcript and enqueues its analysis here
+instead of running ChatHistoryService.save_analysis inside the request. Jobs
+are kept in a local SQLite file so queued work survives a restart, and a small
+pool of worker threads drains it. Workers claim a job with a lease, so several
+processes can share one queue file and a job held by a crashed worker is
+picked up again once its lease expires. Each claim gets its own token, and
+a worker can only record the result of the claim it still holds, so a worker
+that outlives its lease cannot overwrite the job's newer run.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+ANALYSIS_QUEUE_PATH = os.getenv("ANALYSIS_QUEUE_PATH", "analysis_queue.db")
+ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", "2"))
+
+MAX_ATTEMPTS = 3
+RETRY_DELAY_SECONDS = 30  # Doubled after each failed attempt
+LEASE_SECONDS = 600  # A running job older than this is assumed abandoned
+POLL_INTERVAL_SECONDS = 2.0
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+PENDING_STATUSES = (STATUS_QUEUED, STATUS_RUNNING)
+
+
+class AnalysisQueue:
+    """Persistent job queue that runs interview analyses on worker threads."""
+
+    def __init__(
+        self,
+        analyze: Callable[..., Dict[str, Any]],
+        path: str = ANALYSIS_QUEUE_PATH,
+        workers: int = ANALYSIS_WORKERS,
+        max_attempts: int = MAX_ATTEMPTS
+    ):
+        """
+        Args:
+            analyze: Called as analyze(interview_id, user_email, messages, config_name,
+                config_id, session_id=...); normally ChatHistoryService.save_analysis
+            path: SQLite file holding the jobs
+            workers: Number of worker threads started by start()
+            max_attempts: Attempts before a job is marked failed
+        """
+        self.analyze = analyze
+        self.path = path
+        self.workers = workers
+        self.max_attempts = max_attempts
+
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._schema_ready = False
+        self.logger = logging.getLogger(__name__)
+
+    def _create_schema(self, conn: sqlite3.Connection):
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS analysis_jobs (
+                interview_id INTEGER PRIMARY KEY,
+                user_email TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                requeued INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                available_at REAL NOT NULL,
+                claimed_at REAL,
+                claim_token TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        # Files created before claim tokens were added
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(analysis_jobs)")}
+        if "claim_token" not in columns:
+            conn.execute("ALTER TABLE analysis_jobs ADD COLUMN claim_token TEXT")
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS analysis_jobs_status_idx ON analysis_jobs (status, available_at)"
+        )
+
+    @contextmanager
+    def _connect(self):
+        # The file and table are created on first use, not when the queue is
+        # constructed, so importing the app does not touch the disk
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            if not self._schema_ready:
+                self._create_schema(conn)
+                self._schema_ready = True
+            yield conn
+        finally:
+            conn.close()
+
+    # ------------------------------------------------------------------
+    # Producer side
+    # ------------------------------------------------------------------
+    def enqueue(
+        self,
+        interview_id: int,
+        user_email: str,
+        messages: Optional[List[Dict[str, Any]]],
+        config_name: str = "Interview Session",
+        config_id: str = None,
+        session_id: str = "Test"
+    ) -> Dict[str, Any]:
+        """Queue an interview for analysis.
+
+        Each interview has at most one job. Enqueuing it again replaces the
+        transcript; if the job is already running it is run once more with the
+        new transcript after the current run finishes. With messages=None the
+        analysis loads the stored transcript when it runs.
+
+        Returns:
+            Dict[str, Any]: The job's status, as returned by status()
+        """
+        payload = json.dumps({
+            "messages": messages,
+            "config_name": config_name,
+            "config_id": config_id,
+            "session_id": session_id,
+        })
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("""
+                INSERT INTO analysis_jobs
+                    (interview_id, user_email, payload, status, available_at, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (interview_id) DO UPDATE SET
+                    user_email = excluded.user_email,
+                    payload = excluded.payload,
+                    status = CASE WHEN status = 'running' THEN 'running' ELSE 'queued' END,
+                    requeued = CASE WHEN status = 'running' THEN 1 ELSE 0 END,
+                    attempts = CASE WHEN status = 'running' THEN attempts ELSE 0 END,
+                    error = NULL,
+                    available_at = excluded.available_at,
+                    updated_at = excluded.updated_at
+            """, (int(interview_id), user_email, payload, STATUS_QUEUED, now, now, now))
+        self._wake.set()
+        return self.status(interview_id)
+
+    def status(self, interview_id: int) -> Optional[Dict[str, Any]]:
+        """Return the job for an interview, or None if it was never queued."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT interview_id, status, attempts, error, created_at, updated_at "
+                "FROM analysis_jobs WHERE interview_id = ?",
+                (int(interview_id),)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "interview_id": row["interview_id"],
+            "status": row["status"],
+            "attempts": row["attempts"],
+            "error": row["error"],
+            "created_at": _isoformat(row["created_at"]),
+            "updated_at": _isoformat(row["updated_at"]),
+        }
+
+    def is_pending(self, interview_id: int) -> bool:
+        """True if the interview's analysis is queued or running."""
+        job = self.status(interview_id)
+        return job is not None and job["status"] in PENDING_STATUSES
+
+    # ------------------------------------------------------------------
+    # Consumer side
+    # ------------------------------------------------------------------
+    def _claim(self) -> Optional[Dict[str, Any]]:
+        """Atomically take the oldest runnable job, or return None.
+
+        The returned job carries the claim_token that _finish must present.
+        """
+        now = time.time()
+        token = uuid.uuid4().hex
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("""
+                SELECT * FROM analysis_jobs
+                WHERE (status = 'queued' AND available_at <= ?)
+                   OR (status = 'running' AND claimed_at < ?)
+                ORDER BY available_at
+                LIMIT 1
+            """, (now, now - LEASE_SECONDS)).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE analysis_jobs SET status = 'running', requeued = 0, claimed_at = ?, "
+                    "claim_token = ?, attempts = attempts + 1, updated_at = ? WHERE interview_id = ?",
+                    (now, token, now, row["interview_id"])
+                )
+            conn.execute("COMMIT")
+            return None if row is None else dict(row, claim_token=token)
+
+    def _finish(self, job: Dict[str, Any], error: Optional[str]) -> bool:
+        """Record a run's result, unless another worker has since claimed the job.
+
+        Returns:
+            False if the claim was lost and nothing was written
+        """
+        now = time.time()
+        attempts = job["attempts"] + 1
+        with self._connect() as conn:
+            if error is None:
+                cursor = conn.execute("""
+                    UPDATE analysis_jobs SET
+                        status = CASE WHEN requeued = 1 THEN 'queued' ELSE 'done' END,
+                        attempts = CASE WHEN requeued = 1 THEN 0 ELSE attempts END,
+                        requeued = 0, error = NULL, claimed_at = NULL, claim_token = NULL, updated_at = ?
+                    WHERE interview_id = ? AND claim_token = ?
+                """, (now, job["interview_id"], job["claim_token"]))
+            else:
+                retry = attempts < self.max_attempts
+                cursor = conn.execute("""
+                    UPDATE analysis_jobs SET
+                        status = CASE WHEN requeued = 1 OR ? THEN 'queued' ELSE 'failed' END,
+                        attempts = CASE WHEN requeued = 1 THEN 0 ELSE attempts END,
+                        available_at = ?, requeued = 0, error = ?, claimed_at = NULL, claim_token = NULL,
+                        updated_at = ?
+                    WHERE interview_id = ? AND claim_token = ?
+                """, (retry, now + RETRY_DELAY_SECONDS * 2 ** (attempts - 1), error, now,
+                      job["interview_id"], job["claim_token"]))
+        return cursor.rowcount > 0
+
+    def run_once(self) -> bool:
+        """Claim and run one job.
+
+        Returns:
+            True if a job was run, False if none was ready
+        """
+        job = self._claim()
+        if job is None:
+            return False
+
+        payload = json.loads(job["payload"])
+        error = None
+        try:
+            result = self.analyze(
+                job["interview_id"],
+                job["user_email"],
+                payload["messages"],
+                payload["config_name"],
+                payload["config_id"],
+                session_id=payload["session_id"]
+            )
+            if not result.get("success"):
+                error = result.get("error") or "Analysis failed"
+        except Exception as e:
+            error = str(e)
+
+        if error:
+            self.logger.error(f"Analysis job for interview_id {job['interview_id']} failed: {error}")
+        if not self._finish(job, error):
+            self.logger.warning(
+                f"Analysis job for interview_id {job['interview_id']} outlived its lease; "
+                "its result was left to the worker that reclaimed it"
+            )
+        return True
+
+    def _work(self):
+        while not self._stop.is_set():
+            try:
+                if self.run_once():
+                    continue
+            except Exception as e:
+                self.logger.error(f"Analysis worker error: {str(e)}")
+            self._wake.wait(POLL_INTERVAL_SECONDS)
+            self._wake.clear()
+
+    def start(self):
+        """Start the worker threads."""
+        for i in range(self.workers - len(self._threads)):
+            thread = threading.Thread(target=self._work, name=f"analysis-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 5.0):
+        """Ask the worker threads to exit after their current job."""
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        self._stop.clear()
+
+
+def _isoformat(timestamp: Optional[float]) -> Optional[str]:
+    if timestamp is None:
+        return None
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(timestamp))
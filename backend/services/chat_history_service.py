@@ -1,136 +1,258 @@
 from supabase import create_client
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+import hashlib
 import json
+import os
+import time
 import traceback
 import datetime
 import logging
 from openai import OpenAI
 from pydantic import BaseModel
 from services.elo_calculator import SupabaseEloService as EloCalculator
+from utils.lru_cache import LRUCache
+from utils.transcript import ANALYSIS_TOKEN_BUDGET, render_transcript
+
+# Seconds allowed for each save_analysis LLM call, measured from dispatch
+ANALYSIS_CALL_TIMEOUT = 60
+
+# Used when the matching analysis call fails or times out
+DEFAULT_STRENGTHS = ["Good communication skills", "Demonstrated technical knowledge"]
+DEFAULT_WEAKNESSES = ["Could provide more specific examples", "Should structure responses more clearly"]
+DEFAULT_SPECIFIC_FEEDBACK = "Overall satisfactory performance with room for improvement in specific areas."
+
+# How save_analysis calls the LLM: "parallel" makes five concurrent calls,
+# "fused" asks for everything in one structured-output call
+ANALYSIS_MODES = ("parallel", "fused")
+ANALYSIS_MODE = os.getenv("ANALYSIS_MODE", "parallel")
+FUSED_ANALYSIS_MODEL = "gpt-4.5-preview"
+
+# Analysis results are cached by conversation hash so re-saving an unchanged
+# transcript does not repeat the LLM calls
+ANALYSIS_CACHE_SIZE = int(os.getenv("ANALYSIS_CACHE_SIZE", "512"))
+ANALYSIS_CACHE_TTL_SECONDS = 24 * 60 * 60
+
+
+def conversation_hash(conversation: List[Dict[str, str]], config_name: str) -> str:
+    """Hash a conversation for the analysis cache.
+    
+    Whitespace is collapsed and empty messages are dropped, so transcripts
+    that differ only in formatting share a hash.
+    """
+    normalized = [
+        [msg["role"], " ".join((msg["content"] or "").split())]
+        for msg in conversation
+    ]
+    normalized = [msg for msg in normalized if msg[1]]
+    key = json.dumps({"config_name": config_name, "conversation": normalized}, sort_keys=True)
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+# Columns of an interview_logs row returned by save_chat_history (the transcript is left out)
+STORED_RECORD_FIELDS = ("thread_id", "email", "config_name", "config_id", "created_at", "updated_at")
+
+
+# PostgREST select for stream_chat_history_json: the log is returned as "messages"
+CHAT_HISTORY_JSON_SELECT = "id,thread_id,messages:log"
+
+
+def stored_message(msg: Dict[str, Any]) -> Dict[str, Any]:
+    """Shape a client message for the log: text and sender, plus audio fields if it has any.
+    
+    Mirrors append_chat_messages in migrations/008_jsonb_chat_log.sql.
+    """
+    stored = {"text": msg.get('text', ''), "sender": msg.get('sender')}
+    for key in ("audioUrl", "storagePath"):
+        if msg.get(key):
+            stored[key] = msg[key]
+    return stored
+
+
+def question_key(question_text: str) -> str:
+    """Normalize a question for matching: collapsed whitespace, lower case.
+
+    Mirrors the question_key column in migrations/005_weak_questions_upsert.sql.
+    """
+    return " ".join(question_text.split()).lower()
 
 class ChatHistoryService:
-    def __init__(self, supabase_url, supabase_key):
-        """Initialize chat history service with Supabase connection"""
+    def __init__(self, supabase_url, supabase_key, elo_service: Optional[EloCalculator] = None, analysis_mode: Optional[str] = None, turn_assessor=None):
+        """Initialize chat history service with Supabase connection
+        
+        Args:
+            supabase_url: Supabase project URL
+            supabase_key: Supabase API key
+            elo_service: Shared ELO service; a new one is created per analysis if omitted
+            analysis_mode: "parallel" or "fused"; defaults to the ANALYSIS_MODE env var
+            turn_assessor: Optional TurnAssessor whose per-turn results are aggregated
+                instead of analyzing the whole transcript
+        """
         self.supabase = create_client(supabase_url, supabase_key)
         self.table_name = 'interview_logs'
+        self.elo_service = elo_service
+        self.analysis_mode = analysis_mode or ANALYSIS_MODE
+        if self.analysis_mode not in ANALYSIS_MODES:
+            raise ValueError(f"analysis_mode must be one of {', '.join(ANALYSIS_MODES)}")
+        self.analysis_cache = LRUCache(ANALYSIS_CACHE_SIZE, ANALYSIS_CACHE_TTL_SECONDS)
+        self.turn_assessor = turn_assessor
         
         logging.basicConfig(level=logging.INFO)
         self.logger = logging.getLogger(__name__)
 
-    def save_chat_history(self, thread_id: str, user_email: str, messages: List[Dict[str, Any]], config_name: str = "Interview Session", config_id: str = None) -> Dict[str, Any]:
-        """Save or update chat history with separated text and audio metadata
+    def save_chat_history(self, thread_id: str, user_email: str, messages: List[Dict[str, Any]], config_name: str = "Interview Session", config_id: str = None, base_count: Optional[int] = None) -> Dict[str, Any]:
+        """Append new messages to the chat history, keeping text and audio metadata separate
+        
+        Only messages after base_count are sent and stored; the stored log is
+        never read back or rewritten. Without base_count, messages is taken to
+        be the whole conversation and the ones already stored are skipped.
         
         Args:
             thread_id: Unique session identifier
             user_email: User's email address
-            messages: List of chat messages
+            messages: Chat messages after base_count, or all of them
             config_name: Interview configuration name
             config_id: Interview configuration ID
+            base_count: Number of messages the client knows are already stored
             
         Returns:
             Dictionary with:
             - success: Boolean status
             - interview_id: ID of created/updated record
+            - message_count: Number of messages stored after the save
+            - appended: Number of messages added by this save
+            - skipped: True if nothing new was stored
+            - data: The stored record without its transcript (id, thread_id,
+              email, config_name, config_id, message_count, created_at, updated_at)
+            - conflict: True if base_count is ahead of the stored messages;
+              the client should resend from message_count
             - error: Error message if failed
         """
         try:
             self.logger.info(f"Saving chat history for thread_id: {thread_id}")
             
             # Skip saving if only contains welcome message
-            if len(messages) == 1 and messages[0].get('sender') == 'ai':
+            if not base_count and len(messages) == 1 and messages[0].get('sender') == 'ai':
                 self.logger.info("Skipping save - only welcome message")
                 return {"success": True, "skipped": True}
-                
-            # Check existing record to prevent overwriting longer histories
-            interview_id = None
-            existing_message_count = 0
             
+            base_count = base_count or 0
             try:
-                existing = self.supabase.table(self.table_name) \
-                    .select('id,log,audio_metadata') \
-                    .eq('thread_id', thread_id) \
-                    .execute()
-                    
-                if existing.data and len(existing.data) > 0:
-                    existing_record = existing.data[0]
-                    interview_id = existing_record.get('id')
-                    
-                    # Check message count in existing log
-                    existing_log = existing_record.get('log')
-                    if existing_log:
-                        if isinstance(existing_log, str):
-                            existing_log = json.loads(existing_log)
-                        existing_message_count = len(existing_log)
-                        
-                        # Skip update if existing has more messages
-                        if existing_message_count > len(messages):
-                            self.logger.info(
-                                f"Skipping update - existing has {existing_message_count} messages, "
-                                f"new has {len(messages)}"
-                            )
-                            return {
-                                "success": True, 
-                                "skipped": True, 
-                                "interview_id": interview_id
-                            }
+                result = self.supabase.rpc("append_chat_messages", {
+                    "p_thread_id": thread_id,
+                    "p_email": user_email,
+                    "p_config_name": config_name,
+                    "p_config_id": config_id or None,
+                    "p_base_count": base_count,
+                    "p_messages": messages,
+                }).execute()
+                stored = result.data[0]
             except Exception as e:
-                self.logger.warning(f"Error checking existing log: {e}")
+                self.logger.warning(f"append_chat_messages RPC unavailable, rewriting log: {str(e)}")
+                stored = self._append_chat_messages_rewrite(thread_id, user_email, messages, config_name, config_id, base_count)
             
-            # Process data for storage
-            text_messages = []
-            audio_metadata = []
+            interview_id = stored.get('interview_id')
+            message_count = stored.get('message_count') or 0
+            if base_count > message_count:
+                self.logger.info(f"Save for {thread_id} starts at message {base_count}, only {message_count} stored")
+                return {
+                    "success": False,
+                    "conflict": True,
+                    "interview_id": interview_id,
+                    "message_count": message_count,
+                    "error": f"Only {message_count} messages are stored; resend from there"
+                }
             
-            for idx, msg in enumerate(messages):
-                # Store "text" and "sender" in log
-                text_messages.append({
-                    "text": msg.get('text', ''),
-                    "sender": msg.get('sender')
-                })
-                
-                # Store "audioUrl" and "storagePath" in audio metadata
-                if msg.get('audioUrl') or msg.get('storagePath'):
-                    audio_metadata.append({
-                        "audioUrl": msg.get('audioUrl'),
-                        "storagePath": msg.get('storagePath')
-                    })
-            
-            current_time = datetime.datetime.now().isoformat()
-            
-            # Prepare data for insert/update
-            data = {
-                'thread_id': thread_id,
-                'email': user_email,
-                'config_name': config_name,
-                'log': json.dumps(text_messages),
-                'updated_at': current_time,
-                'audio_metadata': json.dumps(audio_metadata) if audio_metadata else None
+            response = {
+                "success": True,
+                "interview_id": interview_id,
+                "message_count": message_count,
+                "appended": stored.get('appended') or 0
             }
-            
-            if config_id:
-                data['config_id'] = config_id
-                
-            # Update existing or create new record
             if interview_id:
-                self.supabase.table(self.table_name) \
-                    .update(data) \
-                    .eq('id', interview_id) \
-                    .execute()
-                self.logger.info(f"Updated chat history for {thread_id}")
+                response["data"] = {
+                    "id": interview_id,
+                    **{key: stored.get(key) for key in STORED_RECORD_FIELDS},
+                    "message_count": message_count
+                }
+            if not response["appended"]:
+                self.logger.info(f"Nothing new to save for {thread_id} ({message_count} messages stored)")
+                response["skipped"] = True
             else:
-                data['created_at'] = current_time
-                result = self.supabase.table(self.table_name) \
-                    .insert(data) \
-                    .execute()
-                if result.data:
-                    interview_id = result.data[0].get('id')
-                self.logger.info(f"Created new chat history for {thread_id}")
-            
-            return {"success": True, "interview_id": interview_id}
+                self.logger.info(f"Appended {response['appended']} messages to chat history for {thread_id}")
+            return response
             
         except Exception as e:
             self.logger.error(f"Error saving chat history: {str(e)}", exc_info=True)
             return {"success": False, "error": str(e)}
 
+    def _append_chat_messages_rewrite(self, thread_id: str, user_email: str, messages: List[Dict[str, Any]], config_name: str, config_id: Optional[str], base_count: int) -> Dict[str, Any]:
+        """Fallback for append_chat_messages when the RPC is missing: same result, full rewrite.
+        
+        Returns:
+            Dict with interview_id, message_count, appended and the record's
+            STORED_RECORD_FIELDS, like the RPC
+        """
+        existing = self.supabase.table(self.table_name) \
+            .select('*') \
+            .eq('thread_id', thread_id) \
+            .execute()
+        record = existing.data[0] if existing.data else {}
+        
+        text_messages = record.get('log') or []
+        if isinstance(text_messages, str):
+            text_messages = json.loads(text_messages)
+        
+        stored_count = len(text_messages)
+        new_messages = messages[max(stored_count - base_count, 0):] if base_count <= stored_count else []
+        if not new_messages:
+            return {
+                **{key: record.get(key) for key in STORED_RECORD_FIELDS},
+                "interview_id": record.get('id'),
+                "message_count": stored_count,
+                "appended": 0
+            }
+        
+        text_messages.extend(stored_message(msg) for msg in new_messages)
+        
+        current_time = datetime.datetime.now().isoformat()
+        data = {
+            'thread_id': thread_id,
+            'email': user_email,
+            'config_name': config_name,
+            'log': text_messages,
+            'updated_at': current_time
+        }
+        if config_id:
+            data['config_id'] = config_id
+        # Keep the counter in step if the column exists
+        if 'message_count' in record:
+            data['message_count'] = len(text_messages)
+        
+        interview_id = record.get('id')
+        if interview_id:
+            # An existing record keeps the config it was created with
+            data.pop('config_name')
+            data.pop('config_id', None)
+            self.supabase.table(self.table_name) \
+                .update(data) \
+                .eq('id', interview_id) \
+                .execute()
+            data = {**record, **data}
+        else:
+            data['created_at'] = current_time
+            result = self.supabase.table(self.table_name) \
+                .insert(data) \
+                .execute()
+            if result.data:
+                interview_id = result.data[0].get('id')
+        
+        return {
+            **{key: data.get(key) for key in STORED_RECORD_FIELDS},
+            "interview_id": interview_id,
+            "message_count": len(text_messages),
+            "appended": len(new_messages)
+        }
+
     
     def get_chat_history(self, thread_id: str) -> Optional[List[Dict[str, Any]]]:
         """Get chat history for a specific session
@@ -164,6 +286,85 @@ class ChatHistoryService:
             self.logger.error(f"Error retrieving chat history: {e}", exc_info=True)
             return None
     
+    def stream_chat_history_json(self, column: str, value: Any) -> Optional[Iterator[bytes]]:
+        """Stream a stored transcript as the JSON bytes PostgREST sends, without decoding it
+        
+        The body is {"id", "thread_id", "messages"}, with messages being the
+        stored log as-is, so it can be passed to the client unchanged. The
+        status is read before returning; the body is read in chunks as the
+        iterator is consumed, and the connection is closed when it is
+        exhausted or closed.
+        
+        Args:
+            column: "id" or "thread_id"
+            value: Value to match
+            
+        Returns:
+            Optional[Iterator[bytes]]: The JSON body in chunks, or None if no record matches
+        """
+        session = self.supabase.postgrest.session
+        request = session.build_request(
+            "GET",
+            self.table_name,
+            params={
+                "select": CHAT_HISTORY_JSON_SELECT,
+                column: f"eq.{value}",
+                "order": "id",
+                "limit": 1,
+            },
+            headers={"Accept": "application/vnd.pgrst.object+json"}
+        )
+        response = session.send(request, stream=True)
+        try:
+            # PostgREST answers 406 when a single object was asked for and no row matched
+            if response.status_code == 406:
+                response.close()
+                return None
+            response.raise_for_status()
+        except Exception:
+            response.close()
+            raise
+
+        def chunks():
+            try:
+                yield from response.iter_bytes()
+            finally:
+                response.close()
+
+        return chunks()
+    
+    def get_chat_history_record(self, column: str, value: Any) -> Optional[Dict[str, Any]]:
+        """Get a stored transcript as {"id", "thread_id", "messages"}, decoded
+        
+        Rows saved before migration 008 hold the log as a JSON string with
+        audio fields in a separate audio_metadata array; both are merged here.
+        
+        Args:
+            column: "id" or "thread_id"
+            value: Value to match
+            
+        Returns:
+            Optional[Dict[str, Any]]: The record, or None if none matches
+        """
+        result = self.supabase.table(self.table_name).select('*').eq(column, value).execute()
+        if not result.data:
+            return None
+        row = result.data[0]
+        
+        messages = row.get('log') or []
+        if isinstance(messages, str):
+            messages = json.loads(messages)
+        audio_metadata = row.get('audio_metadata') or []
+        if isinstance(audio_metadata, str):
+            audio_metadata = json.loads(audio_metadata)
+        if audio_metadata:
+            messages = [
+                {**msg, **{key: value for key, value in audio.items() if value}}
+                for msg, audio in zip(messages, audio_metadata + [{}] * (len(messages) - len(audio_metadata)))
+            ]
+        
+        return {"id": row.get("id"), "thread_id": row.get("thread_id"), "messages": messages}
+    
     def delete_chat_history(self, thread_id: str) -> bool:
         """Delete chat history for a specific session
         
@@ -183,22 +384,41 @@ class ChatHistoryService:
             return False 
         
         
-    def save_analysis(self, interview_id: int, user_email: str, messages: List[Dict[str, Any]], config_name: str = "Interview Session", config_id: str = None, session_id: str = "Test") -> Dict[str, Any]:
+    def save_analysis(self, interview_id: int, user_email: str, messages: Optional[List[Dict[str, Any]]], config_name: str = "Interview Session", config_id: str = None, session_id: str = "Test", analysis_mode: Optional[str] = None) -> Dict[str, Any]:
         """
         Analyze interview conversation and save performance metrics
         
+        In "parallel" mode the five analysis calls run concurrently and the
+        total latency is roughly that of the slowest call. A call that fails
+        or times out falls back to its default, except the score call, whose
+        failure fails the analysis. In "fused" mode a single structured-output
+        call returns everything, sending the conversation once instead of five
+        times; if it fails, the parallel calls are used instead.
+        
+        If a turn assessor scored every answer during the interview
+        (session_id is the interview thread), those results are aggregated
+        and no transcript-wide calls are made.
+        
+        Results are cached by conversation hash. Re-saving an unchanged
+        transcript for the same interview is a no-op, and an identical
+        transcript for another interview reuses the cached analysis.
+        
         Args:
             interview_id: Interview ID
             user_email: User email
-            messages: List of messages
+            messages: List of messages; None loads the stored transcript for session_id
             config_name: Configuration name
             config_id: Configuration ID
+            session_id: Interview thread ID
+            analysis_mode: Overrides the service's analysis mode for this call
             
         Returns:
             Dict[str, Any]: Result with success status
         """
         try:
             client = OpenAI()
+            if messages is None:
+                messages = self.get_chat_history(session_id) or []
             # Skip analysis if there are too few messages
             if len(messages) < 3:  # Need at least welcome message, user response, and interviewer follow-up
                 self.logger.info(f"Skip analysis - too few messages for interview_id: {interview_id}")
@@ -212,237 +432,63 @@ class ChatHistoryService:
                     "role": role,
                     "content": msg.get('text', '')
                 })
+            # The transcript is only rendered if the model has to be called
+            cache_key = conversation_hash(conversation, config_name)
+            cached = self.analysis_cache.get(cache_key)
+            if cached and cached["interview_id"] == interview_id:
+                self.logger.info(f"Analysis unchanged for interview_id: {interview_id}")
+                return {"success": True, "cached": True}
 
+            mode = analysis_mode or self.analysis_mode
+            started = time.monotonic()
+            if cached:
+                analysis = cached["analysis"]
+                self.logger.info(f"Reusing cached analysis for interview_id: {interview_id}")
+            else:
+                analysis = None
+                if self.turn_assessor:
+                    answers = sum(1 for msg in conversation if msg["role"] == "user")
+                    analysis = self.turn_assessor.aggregate(session_id, answers)
+                    # The assessments are used once; later saves run a full analysis
+                    self.turn_assessor.discard(session_id)
+                    if analysis is not None:
+                        mode = "per-turn"
+                if analysis is None:
+                    conversation_text = render_transcript(conversation, ANALYSIS_TOKEN_BUDGET)
+                    if mode == "fused":
+                        try:
+                            analysis = self._analyze_fused(client, conversation_text, config_name)
+                        except Exception as e:
+                            self.logger.error(f"Fused analysis failed, using parallel calls: {str(e)}")
+                            mode = "parallel"
+                    if analysis is None:
+                        analysis = self._run_analysis_calls(client, conversation_text, config_name)
+                self.logger.info(f"Analysis ({mode}) for interview_id {interview_id} took {time.monotonic() - started:.1f}s")
 
-            
-            # Prepare the analysis prompt with very specific output format requirements
-            analysis_prompt = [
-                {"role": "system", "content": """
-                You are an expert interview analyzer. Analyze the following interview conversation and provide scores 
-                in these exact categories:
-                
-                1. technical: Technical knowledge demonstrated (0.0-1.0)
-                2. communication: How well the candidate communicates (0.0-1.0)
-                3. confidence: How confident the candidate appears (0.0-1.0)
-                4. problem_solving: Problem-solving abilities (0.0-1.0)
-                5. resume_strength: How well they discuss their experience (0.0-1.0)
-                6. leadership: Leadership qualities demonstrated (0.0-1.0)
-                
-                Do not include any additional keys or explanations in your response.
-                """},
-                {"role": "user", "content": f"Interview type: {config_name}\n\nConversation:\n{json.dumps(conversation, indent=2)}"}
-
-            ]
-
-            response = client.beta.chat.completions.parse(
-                model="gpt-4.5-preview",
-                response_format=ScoreRubrics,
-                messages=analysis_prompt 
-            )
-            
-            # Strengths prompt - get a list of strengths
-            strengths_prompt = [
-                {"role": "system", "content": """
-                You are an expert interview analyzer with years of experience in talent acquisition and candidate assessment. 
-                Carefully analyze the following interview conversation and provide 3-5 key strengths demonstrated by the candidate.
-                
-                Consider the following aspects in your analysis:
-                - Communication skills (clarity, conciseness, articulation)
-                - Technical knowledge and expertise
-                - Problem-solving approach and methodology
-                - Leadership qualities and teamwork examples
-                - Adaptability and learning mindset
-                - Specific accomplishments that demonstrate skills
-                
-                Be specific and detailed in identifying strengths, looking for concrete examples from the conversation.
-                
-                Format your response as a JSON array of strings, like this:
-                
-                ["Excellent communication skills with clear articulation of complex concepts", 
-                "Strong technical knowledge in database optimization and system architecture", 
-                "Clear problem-solving approach with methodical debugging techniques"]
-                
-                Your response must be ONLY a valid JSON array of strings, with no additional text or explanation.
-                """},
-                {"role": "user", "content": f"Interview type: {config_name}\n\nConversation:\n{json.dumps(conversation, indent=2)}"}
-            ]
-            try:
-                strengths_response = client.chat.completions.create(
-                    model="gpt-4o-mini",
-                    response_format={"type": "json_object"},
-                    messages=strengths_prompt
-                )
-                strengths_text = strengths_response.choices[0].message.content
-                strengths_data = json.loads(strengths_text)
-                
-                # Ensure we have a valid array
-                if not isinstance(strengths_data, list):
-                    if isinstance(strengths_data, dict) and "strengths" in strengths_data:
-                        strengths_data = strengths_data["strengths"]
-                    else:
-                        strengths_data = ["Good communication skills", "Demonstrated technical knowledge"]
-            except Exception as e:
-                self.logger.error(f"Error getting strengths: {str(e)}")
-                strengths_data = ["Good communication skills", "Demonstrated technical knowledge"]
-
-            # Weaknesses prompt - get a list of areas for improvement
-            weaknesses_prompt = [
-                {"role": "system", "content": """
-                You are an expert interview analyzer with years of experience in talent acquisition and candidate assessment. 
-                Carefully analyze the following interview conversation and provide 3-5 key areas for improvement demonstrated by the candidate.
-                
-                Consider the following aspects in your analysis:
-                - Communication skills (clarity, conciseness, articulation)
-                - Technical knowledge and expertise
-                - Problem-solving approach and methodology
-                - Leadership qualities and teamwork examples
-                - Adaptability and learning mindset
-                - Specific accomplishments that demonstrate skills
-                 
-                Be specific and detailed in identifying areas for improvement, looking for concrete examples from the conversation.
-                
-                Format your response as a JSON array of strings, like this:
-                
-                ["Could provide more specific examples", "Should elaborate more on technical details", "Consider using the STAR method more consistently"]
-                
-                Your response must be ONLY a valid JSON array of strings, with no additional text or explanation.
-                """},
-                {"role": "user", "content": f"Interview type: {config_name}\n\nConversation:\n{json.dumps(conversation, indent=2)}"}
-            ]
-
-            try:
-                weaknesses_response = client.chat.completions.create(
-                    model="gpt-4o-mini",
-                    response_format={"type": "json_object"},
-                    messages=weaknesses_prompt
-                )
-                weaknesses_text = weaknesses_response.choices[0].message.content
-                weaknesses_data = json.loads(weaknesses_text)
-                
-                # Ensure we have a valid array
-                if not isinstance(weaknesses_data, list):
-                    if isinstance(weaknesses_data, dict) and "areas_for_improvement" in weaknesses_data:
-                        weaknesses_data = weaknesses_data["areas_for_improvement"]
-                    else:
-                        weaknesses_data = ["Could provide more specific examples", "Should structure responses more clearly"]
-            except Exception as e:
-                self.logger.error(f"Error getting areas for improvement: {str(e)}")
-                weaknesses_data = ["Could provide more specific examples", "Should structure responses more clearly"]
-
-            # Specific feedback prompt - get a concise overall assessment
-            specific_feedback_prompt = [
-                {"role": "system", "content": """
-                You are an expert interview analyzer. Analyze the following interview conversation and provide a concise 
-                overall assessment of the candidate's performance (minimum 100 characters, maximum 500 characters).
-                
-                Your response should be a single string with no JSON formatting or additional text.
-                """},
-                {"role": "user", "content": f"Interview type: {config_name}\n\nConversation:\n{json.dumps(conversation, indent=2)}"}
-            ]
-
-            try:
-                specific_feedback_response = client.chat.completions.create(
-                    model="gpt-4o-mini",
-                    messages=specific_feedback_prompt
-                )
-                specific_feedback_text = specific_feedback_response.choices[0].message.content
-                
-            except Exception as e:
-                self.logger.error(f"Error getting specific feedback: {str(e)}")
-                specific_feedback_text = "Overall satisfactory performance with room for improvement in specific areas."
-
-            weak_questions_prompt = [
-                {
-                    "role": "system",
-                    "content": (
-                        "You are an expert interview analyzer. The conversation below "
-                        "is from an interview session. Identify up to three (0–3) questions "
-                        "that the candidate responded to weakly or insufficiently. "
-                        "Output a valid JSON array of objects with exactly these two keys per object:\n\n"
-                        "1) \"question\": The text of the question asked.\n"
-                        "Do not include any additional keys or explanation."
-                    ),
-                },
-                {
-                    "role": "user",
-                    "content": (
-                        f"Conversation:\n{json.dumps(conversation, indent=2)}"
-                    ),
-                }
-            ]
-
-            try:
-                # --- The new prompt for identifying weak questions ---
-                weak_questions_response = client.chat.completions.create(
-                    model="gpt-4o-mini", 
-                    # If you have a custom response format, define it or parse raw JSON
-                    messages=weak_questions_prompt
-                )
-                
-                weak_questions_text = weak_questions_response.choices[0].message.content
-                weak_questions_data = json.loads(weak_questions_text)
-                
-                # Validate that weak_questions_data is a list
-                if not isinstance(weak_questions_data, list):
-                    # If the LLM did not return a JSON list, fallback or handle gracefully:
-                    weak_questions_data = []
-                    
-            except Exception as e:
-                self.logger.error(f"Error getting weak questions: {str(e)}")
-                # Fallback to empty list if LLM call fails
-                weak_questions_data = []
-
-            for item in weak_questions_data:
-                question_text = item.get('question', '').strip()
-                # Basic validation
-                if not question_text:
-                    continue  # skip empty
-
-                # Prepare data to insert or update
-                upsert_data = {
-                    'question_text': question_text,
-                    'session_id': session_id,  # whichever session identifier you use
-                    'email': user_email,
-                    'is_weak': True,
-                    'created_at': datetime.datetime.utcnow().isoformat()
-                    # If you want a question_type, set it to e.g. 'weak_question'
-                    # If you store thread_id or anything else, set them here
-                }
+            scores = analysis["scores"]
+            strengths_data = analysis["strengths"]
+            weaknesses_data = analysis["weaknesses"]
+            specific_feedback_text = analysis["specific_feedback"]
+            weak_questions_data = analysis["weak_questions"]
 
-                # Check if question already exists for this user/session
-                existing = self.supabase.table('interview_questions') \
-                    .select('*') \
-                    .eq('question_text', question_text) \
-                    .eq('session_id', upsert_data['session_id']) \
-                    .eq('email', user_email) \
-                    .execute()
-                
-                if existing.data and len(existing.data) > 0:
-                    # Update existing record
-                    existing_id = existing.data[0]['id']
-                    self.supabase.table('interview_questions').update({
-                        'is_weak': True,
-                    }).eq('id', existing_id).execute()
-                else:
-                    # Insert a new record
-                    self.supabase.table('interview_questions').insert(upsert_data).execute()
+            self._save_weak_questions(user_email, session_id, weak_questions_data)
 
             result = self.supabase.table('interview_performance').upsert({
                 'interview_id': interview_id,
                 'user_email': user_email,
-                'technical_accuracy_score': response.choices[0].message.parsed.technical,
-                'communication_score': response.choices[0].message.parsed.communication,
-                'confidence_score': response.choices[0].message.parsed.confidence,
-                'problem_solving_score': response.choices[0].message.parsed.problem_solving,
-                'resume_strength_score': response.choices[0].message.parsed.resume_strength,
-                'leadership_score': response.choices[0].message.parsed.leadership,
+                'technical_accuracy_score': scores.technical,
+                'communication_score': scores.communication,
+                'confidence_score': scores.confidence,
+                'problem_solving_score': scores.problem_solving,
+                'resume_strength_score': scores.resume_strength,
+                'leadership_score': scores.leadership,
                 'strengths': json.dumps(strengths_data),  # Convert to JSON string
                 'areas_for_improvement': json.dumps(weaknesses_data),  # Convert to JSON string
                 'specific_feedback': specific_feedback_text,
                 'created_at': datetime.datetime.now().isoformat()
             }).execute()
 
-            total_score = response.choices[0].message.parsed.technical + response.choices[0].message.parsed.communication + response.choices[0].message.parsed.confidence + response.choices[0].message.parsed.problem_solving + response.choices[0].message.parsed.resume_strength + response.choices[0].message.parsed.leadership
+            total_score = scores.technical + scores.communication + scores.confidence + scores.problem_solving + scores.resume_strength + scores.leadership
             total_score = total_score / 6
 
             # Get name from user_email
@@ -450,17 +496,374 @@ class ChatHistoryService:
             name = name.data[0].get('first_name') + " " + name.data[0].get('last_name')
 
             # Update ELO score
-            elo_service = EloCalculator()
-            elo_service.update_elo_score(user_email, total_score, name)
+            # A failed ELO update does not fail the analysis: retrying the whole
+            # job could apply a result the database already committed
+            elo_service = self.elo_service or EloCalculator()
+            try:
+                elo_service.update_elo_score(user_email, total_score, name)
+            except Exception as e:
+                self.logger.error(f"Error updating ELO for interview_id {interview_id}: {str(e)}")
             
+            self.analysis_cache.put(cache_key, {"interview_id": interview_id, "analysis": analysis})
             self.logger.info(f"Analysis saved for interview_id: {interview_id}")
-            return {"success": True}
+            return {"success": True, "cached": cached is not None}
             
         except Exception as e:
             self.logger.error(f"Error saving analysis for interview_id {interview_id}: {str(e)}")
             self.logger.error(traceback.format_exc())
             return {"success": False, "error": str(e)}
 
+    def _save_weak_questions(self, user_email: str, session_id: str, weak_questions: List[Dict[str, Any]]):
+        """Flag weak questions in interview_questions in a single request.
+
+        Questions are keyed on (email, session_id, normalized question text):
+        new ones are inserted and existing ones get is_weak set, leaving their
+        other columns (is_favorite, answer, created_at) untouched.
+
+        Args:
+            user_email: User's email address
+            session_id: Session the questions were asked in
+            weak_questions: Items with a "question" key, as returned by the analysis
+        """
+        questions = {}
+        for item in weak_questions:
+            question_text = (item.get('question') or '').strip()
+            if question_text:
+                questions.setdefault(question_key(question_text), question_text)
+        if not questions:
+            return
+
+        try:
+            self.supabase.rpc("upsert_weak_questions", {
+                "p_email": user_email,
+                "p_session_id": session_id,
+                "p_questions": list(questions.values()),
+            }).execute()
+            return
+        except Exception as e:
+            self.logger.warning(f"upsert_weak_questions RPC unavailable, using batched writes: {str(e)}")
+
+        # Without the RPC: one read of the session's questions, then at most
+        # one bulk update and one bulk insert
+        existing = self.supabase.table('interview_questions') \
+            .select('id, question_text') \
+            .eq('session_id', session_id) \
+            .eq('email', user_email) \
+            .execute()
+        existing_ids = {}
+        for row in existing.data or []:
+            existing_ids.setdefault(question_key(row.get('question_text') or ''), row['id'])
+
+        update_ids = [existing_ids[key] for key in questions if key in existing_ids]
+        if update_ids:
+            self.supabase.table('interview_questions') \
+                .update({'is_weak': True}) \
+                .in_('id', update_ids) \
+                .execute()
+
+        now = datetime.datetime.utcnow().isoformat()
+        new_rows = [
+            {
+                'question_text': question_text,
+                'session_id': session_id,
+                'email': user_email,
+                'is_weak': True,
+                'created_at': now
+            }
+            for key, question_text in questions.items()
+            if key not in existing_ids
+        ]
+        if new_rows:
+            self.supabase.table('interview_questions').insert(new_rows).execute()
+
+    def _run_analysis_calls(self, client: OpenAI, conversation_text: str, config_name: str) -> Dict[str, Any]:
+        """Dispatch the five analysis calls in parallel and collect their results
+        
+        Each call gets at most ANALYSIS_CALL_TIMEOUT seconds from dispatch.
+        
+        Args:
+            client: OpenAI client
+            conversation_text: The conversation rendered by render_transcript
+            config_name: Configuration name
+            
+        Returns:
+            Dict[str, Any]: Results keyed by scores, strengths, weaknesses,
+            specific_feedback and weak_questions
+        """
+        calls = {
+            "scores": self._analyze_scores,
+            "strengths": self._analyze_strengths,
+            "weaknesses": self._analyze_weaknesses,
+            "specific_feedback": self._analyze_specific_feedback,
+            "weak_questions": self._analyze_weak_questions,
+        }
+        fallbacks = {
+            "strengths": list(DEFAULT_STRENGTHS),
+            "weaknesses": list(DEFAULT_WEAKNESSES),
+            "specific_feedback": DEFAULT_SPECIFIC_FEEDBACK,
+            "weak_questions": [],
+        }
+
+        executor = ThreadPoolExecutor(max_workers=len(calls), thread_name_prefix="analysis")
+        try:
+            futures = {
+                name: executor.submit(call, client, conversation_text, config_name)
+                for name, call in calls.items()
+            }
+            deadline = time.monotonic() + ANALYSIS_CALL_TIMEOUT
+
+            results = {}
+            for name, future in futures.items():
+                try:
+                    results[name] = future.result(timeout=max(deadline - time.monotonic(), 0))
+                except FuturesTimeoutError:
+                    if name == "scores":
+                        raise TimeoutError(f"Score analysis timed out after {ANALYSIS_CALL_TIMEOUT}s")
+                    self.logger.error(f"Analysis call {name} timed out; using fallback")
+                    results[name] = fallbacks[name]
+            return results
+        finally:
+            # Don't wait for calls that timed out; their requests time out on their own
+            executor.shutdown(wait=False)
+
+    def _analyze_fused(self, client: OpenAI, conversation_text: str, config_name: str) -> Dict[str, Any]:
+        """Get scores, strengths, weaknesses, feedback and weak questions in one call
+        
+        Returns:
+            Dict[str, Any]: Results in the same shape as _run_analysis_calls
+        """
+        analysis_prompt = [
+            {"role": "system", "content": """
+            You are an expert interview analyzer with years of experience in talent acquisition and candidate assessment. 
+            Analyze the following interview conversation and fill in every field:
+            
+            Scores (0.0-1.0):
+            - technical: Technical knowledge demonstrated
+            - communication: How well the candidate communicates
+            - confidence: How confident the candidate appears
+            - problem_solving: Problem-solving abilities
+            - resume_strength: How well they discuss their experience
+            - leadership: Leadership qualities demonstrated
+            
+            strengths: 3-5 key strengths, each specific and grounded in concrete examples from the conversation.
+            areas_for_improvement: 3-5 key areas for improvement, each specific and grounded in the conversation.
+            specific_feedback: A concise overall assessment of the candidate's performance (100-500 characters).
+            weak_questions: Up to three (0-3) questions the candidate answered weakly or insufficiently, with the question text as asked.
+            """},
+            {"role": "user", "content": f"Interview type: {config_name}\n\nConversation:\n{conversation_text}"}
+        ]
+
+        response = client.beta.chat.completions.parse(
+            model=FUSED_ANALYSIS_MODEL,
+            response_format=InterviewAnalysis,
+            messages=analysis_prompt,
+            timeout=ANALYSIS_CALL_TIMEOUT
+        )
+        parsed = response.choices[0].message.parsed
+        if response.usage:
+            self.logger.info(f"Fused analysis used {response.usage.prompt_tokens} prompt and {response.usage.completion_tokens} completion tokens")
+
+        return {
+            "scores": parsed,
+            "strengths": parsed.strengths or list(DEFAULT_STRENGTHS),
+            "weaknesses": parsed.areas_for_improvement or list(DEFAULT_WEAKNESSES),
+            "specific_feedback": parsed.specific_feedback or DEFAULT_SPECIFIC_FEEDBACK,
+            "weak_questions": [item.model_dump() for item in parsed.weak_questions],
+        }
+
+    def _analyze_scores(self, client: OpenAI, conversation_text: str, config_name: str) -> "ScoreRubrics":
+        """Score the interview on the six rubric categories"""
+        # Prepare the analysis prompt with very specific output format requirements
+        analysis_prompt = [
+            {"role": "system", "content": """
+            You are an expert interview analyzer. Analyze the following interview conversation and provide scores 
+            in these exact categories:
+            
+            1. technical: Technical knowledge demonstrated (0.0-1.0)
+            2. communication: How well the candidate communicates (0.0-1.0)
+            3. confidence: How confident the candidate appears (0.0-1.0)
+            4. problem_solving: Problem-solving abilities (0.0-1.0)
+            5. resume_strength: How well they discuss their experience (0.0-1.0)
+            6. leadership: Leadership qualities demonstrated (0.0-1.0)
+            
+            Do not include any additional keys or explanations in your response.
+            """},
+            {"role": "user", "content": f"Interview type: {config_name}\n\nConversation:\n{conversation_text}"}
+
+        ]
+
+        response = client.beta.chat.completions.parse(
+            model="gpt-4.5-preview",
+            response_format=ScoreRubrics,
+            messages=analysis_prompt,
+            timeout=ANALYSIS_CALL_TIMEOUT
+        )
+        return response.choices[0].message.parsed
+
+    def _analyze_strengths(self, client: OpenAI, conversation_text: str, config_name: str) -> List[str]:
+        """List 3-5 strengths, falling back to DEFAULT_STRENGTHS"""
+        # Strengths prompt - get a list of strengths
+        strengths_prompt = [
+            {"role": "system", "content": """
+            You are an expert interview analyzer with years of experience in talent acquisition and candidate assessment. 
+            Carefully analyze the following interview conversation and provide 3-5 key strengths demonstrated by the candidate.
+            
+            Consider the following aspects in your analysis:
+            - Communication skills (clarity, conciseness, articulation)
+            - Technical knowledge and expertise
+            - Problem-solving approach and methodology
+            - Leadership qualities and teamwork examples
+            - Adaptability and learning mindset
+            - Specific accomplishments that demonstrate skills
+            
+            Be specific and detailed in identifying strengths, looking for concrete examples from the conversation.
+            
+            Format your response as a JSON array of strings, like this:
+            
+            ["Excellent communication skills with clear articulation of complex concepts", 
+            "Strong technical knowledge in database optimization and system architecture", 
+            "Clear problem-solving approach with methodical debugging techniques"]
+            
+            Your response must be ONLY a valid JSON array of strings, with no additional text or explanation.
+            """},
+            {"role": "user", "content": f"Interview type: {config_name}\n\nConversation:\n{conversation_text}"}
+        ]
+        try:
+            strengths_response = client.chat.completions.create(
+                model="gpt-4o-mini",
+                response_format={"type": "json_object"},
+                messages=strengths_prompt,
+                timeout=ANALYSIS_CALL_TIMEOUT
+            )
+            strengths_text = strengths_response.choices[0].message.content
+            strengths_data = json.loads(strengths_text)
+            
+            # Ensure we have a valid array
+            if not isinstance(strengths_data, list):
+                if isinstance(strengths_data, dict) and "strengths" in strengths_data:
+                    strengths_data = strengths_data["strengths"]
+                else:
+                    strengths_data = list(DEFAULT_STRENGTHS)
+        except Exception as e:
+            self.logger.error(f"Error getting strengths: {str(e)}")
+            strengths_data = list(DEFAULT_STRENGTHS)
+        return strengths_data
+
+    def _analyze_weaknesses(self, client: OpenAI, conversation_text: str, config_name: str) -> List[str]:
+        """List 3-5 areas for improvement, falling back to DEFAULT_WEAKNESSES"""
+        # Weaknesses prompt - get a list of areas for improvement
+        weaknesses_prompt = [
+            {"role": "system", "content": """
+            You are an expert interview analyzer with years of experience in talent acquisition and candidate assessment. 
+            Carefully analyze the following interview conversation and provide 3-5 key areas for improvement demonstrated by the candidate.
+            
+            Consider the following aspects in your analysis:
+            - Communication skills (clarity, conciseness, articulation)
+            - Technical knowledge and expertise
+            - Problem-solving approach and methodology
+            - Leadership qualities and teamwork examples
+            - Adaptability and learning mindset
+            - Specific accomplishments that demonstrate skills
+             
+            Be specific and detailed in identifying areas for improvement, looking for concrete examples from the conversation.
+            
+            Format your response as a JSON array of strings, like this:
+            
+            ["Could provide more specific examples", "Should elaborate more on technical details", "Consider using the STAR method more consistently"]
+            
+            Your response must be ONLY a valid JSON array of strings, with no additional text or explanation.
+            """},
+            {"role": "user", "content": f"Interview type: {config_name}\n\nConversation:\n{conversation_text}"}
+        ]
+
+        try:
+            weaknesses_response = client.chat.completions.create(
+                model="gpt-4o-mini",
+                response_format={"type": "json_object"},
+                messages=weaknesses_prompt,
+                timeout=ANALYSIS_CALL_TIMEOUT
+            )
+            weaknesses_text = weaknesses_response.choices[0].message.content
+            weaknesses_data = json.loads(weaknesses_text)
+            
+            # Ensure we have a valid array
+            if not isinstance(weaknesses_data, list):
+                if isinstance(weaknesses_data, dict) and "areas_for_improvement" in weaknesses_data:
+                    weaknesses_data = weaknesses_data["areas_for_improvement"]
+                else:
+                    weaknesses_data = list(DEFAULT_WEAKNESSES)
+        except Exception as e:
+            self.logger.error(f"Error getting areas for improvement: {str(e)}")
+            weaknesses_data = list(DEFAULT_WEAKNESSES)
+        return weaknesses_data
+
+    def _analyze_specific_feedback(self, client: OpenAI, conversation_text: str, config_name: str) -> str:
+        """Write a short overall assessment, falling back to DEFAULT_SPECIFIC_FEEDBACK"""
+        # Specific feedback prompt - get a concise overall assessment
+        specific_feedback_prompt = [
+            {"role": "system", "content": """
+            You are an expert interview analyzer. Analyze the following interview conversation and provide a concise 
+            overall assessment of the candidate's performance (minimum 100 characters, maximum 500 characters).
+            
+            Your response should be a single string with no JSON formatting or additional text.
+            """},
+            {"role": "user", "content": f"Interview type: {config_name}\n\nConversation:\n{conversation_text}"}
+        ]
+
+        try:
+            specific_feedback_response = client.chat.completions.create(
+                model="gpt-4o-mini",
+                messages=specific_feedback_prompt,
+                timeout=ANALYSIS_CALL_TIMEOUT
+            )
+            return specific_feedback_response.choices[0].message.content
+        except Exception as e:
+            self.logger.error(f"Error getting specific feedback: {str(e)}")
+            return DEFAULT_SPECIFIC_FEEDBACK
+
+    def _analyze_weak_questions(self, client: OpenAI, conversation_text: str, config_name: str) -> List[Dict[str, Any]]:
+        """Find up to three weakly answered questions, falling back to an empty list"""
+        weak_questions_prompt = [
+            {
+                "role": "system",
+                "content": (
+                    "You are an expert interview analyzer. The conversation below "
+                    "is from an interview session. Identify up to three (0–3) questions "
+                    "that the candidate responded to weakly or insufficiently. "
+                    "Output a valid JSON array of objects with exactly these two keys per object:\n\n"
+                    "1) \"question\": The text of the question asked.\n"
+                    "Do not include any additional keys or explanation."
+                ),
+            },
+            {
+                "role": "user",
+                "content": (
+                    f"Conversation:\n{conversation_text}"
+                ),
+            }
+        ]
+
+        try:
+            weak_questions_response = client.chat.completions.create(
+                model="gpt-4o-mini", 
+                messages=weak_questions_prompt,
+                timeout=ANALYSIS_CALL_TIMEOUT
+            )
+            
+            weak_questions_text = weak_questions_response.choices[0].message.content
+            weak_questions_data = json.loads(weak_questions_text)
+            
+            # Validate that weak_questions_data is a list
+            if not isinstance(weak_questions_data, list):
+                # If the LLM did not return a JSON list, fallback or handle gracefully:
+                weak_questions_data = []
+                
+        except Exception as e:
+            self.logger.error(f"Error getting weak questions: {str(e)}")
+            # Fallback to empty list if LLM call fails
+            weak_questions_data = []
+        return weak_questions_data
+
 class ScoreRubrics(BaseModel):
     technical: float
     communication: float
@@ -470,3 +873,12 @@ class ScoreRubrics(BaseModel):
     leadership: float
 
 
+class WeakQuestion(BaseModel):
+    question: str
+
+
+class InterviewAnalysis(ScoreRubrics):
+    strengths: List[str]
+    areas_for_improvement: List[str]
+    specific_feedback: str
+    weak_questions: List[WeakQuestion]
@@ -9,10 +9,16 @@ stores the results in Supabase.
 import os
 import argparse
 import datetime
+import threading
+import time
 from typing import Dict, List, Literal, Optional, Union
+import csv
 import dotenv
+import numpy as np
 from supabase import create_client, Client
 
+from services.leaderboard_index import LeaderboardIndex
+
 # Load environment variables
 dotenv.load_dotenv()
 
@@ -25,6 +31,8 @@ BASE_ELO = 1200  # Starting ELO for new users
 K_FACTOR_DEFAULT = 32  # Standard K-factor
 K_FACTOR_HIGH_RATED = 16  # For users with ELO > 1500
 K_FACTOR_LOW_RATED = 40  # For users with ELO < 1000
+HIGH_RATED_ELO = 1500  # Above this, K_FACTOR_HIGH_RATED applies
+LOW_RATED_ELO = 1000  # Below this, K_FACTOR_LOW_RATED applies
 
 # Benchmark ELO scores by difficulty level
 BENCHMARK_ELO = {
@@ -39,6 +47,181 @@ PERFORMANCE_THRESHOLDS = {
     "draw": 50    # 50 <= Score < 75 is a draw, < 50 is a loss
 }
 
+# Page size used when streaming elo_scores into the leaderboard index
+LEADERBOARD_PAGE_SIZE = 1000
+
+# The leaderboard index is per process, while ELO updates also run in other
+# workers and in the analysis queue. Every LEADERBOARD_SYNC_SECONDS a read
+# applies users with newer elo_history rows; every LEADERBOARD_REBUILD_SECONDS
+# the index is reloaded, which also catches rewrites such as a replay
+LEADERBOARD_SYNC_SECONDS = float(os.getenv("LEADERBOARD_SYNC_SECONDS", "5"))
+# created_at is set before a row commits, so a sync also rereads this far back
+# from the newest row applied, to catch rows that committed after a later one
+LEADERBOARD_SYNC_LOOKBACK_SECONDS = float(os.getenv("LEADERBOARD_SYNC_LOOKBACK_SECONDS", "60"))
+LEADERBOARD_REBUILD_SECONDS = float(os.getenv("LEADERBOARD_REBUILD_SECONDS", "3600"))
+
+# Batch updates: most results accepted per call, and rows per bulk write
+MAX_BATCH_SIZE = 10000
+BULK_CHUNK_SIZE = 500
+
+# Granularities accepted by get_user_elo_history(bucket=...)
+HISTORY_BUCKETS = ("day", "week", "month")
+
+# Rank maintenance after each update: "incremental" shifts only the users
+# between the old and new score, "full" re-ranks every user
+RANK_MODE = os.getenv("ELO_RANK_MODE", "incremental")
+
+
+def _parse_timestamp(value: str) -> datetime.datetime:
+    """Parse a PostgREST timestamp such as 2025-03-01T10:00:00.123+00:00."""
+    return datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def is_missing_function(error: Exception) -> bool:
+    """True if a PostgREST error says the called database function is not installed.
+
+    PostgREST reports PGRST202 when it cannot find the function in its schema
+    cache, and passes on Postgres' 42883 (undefined_function).
+    """
+    if getattr(error, "code", None) in ("PGRST202", "42883"):
+        return True
+    text = str(error).lower()
+    return "function" in text and any(
+        phrase in text for phrase in ("does not exist", "could not find", "undefined function")
+    )
+
+
+def compute_ranks(users: List[Dict]) -> List[Dict]:
+    """Assign leaderboard ranks to users sorted by ELO, highest first.
+
+    Users with the same ELO share a rank and the next rank is skipped
+    (1, 2, 2, 4, ...), matching RANK() in the database.
+
+    Args:
+        users: Rows from elo_scores ordered by eloscore descending
+
+    Returns:
+        The same rows, each with a "rank" key added
+    """
+    ranked = []
+    previous_elo = None
+    rank = 0
+    for position, user in enumerate(users, 1):
+        if user["eloscore"] != previous_elo:
+            rank = position
+            previous_elo = user["eloscore"]
+        ranked.append({**user, "rank": rank})
+    return ranked
+
+
+def bucket_elo_history(rows: List[Dict], bucket: str) -> List[Dict]:
+    """Downsample ELO history to one point per day, week or month.
+
+    Weeks start on Monday, matching date_trunc('week', ...) in the database.
+
+    Args:
+        rows: elo_history rows (eloscore, created_at) ordered by created_at ascending
+        bucket: One of HISTORY_BUCKETS
+
+    Returns:
+        One entry per bucket, newest first, with the bucket's start date, its
+        last score, its lowest and highest score and the number of entries
+    """
+    if bucket not in HISTORY_BUCKETS:
+        raise ValueError(f"bucket must be one of {', '.join(HISTORY_BUCKETS)}")
+    if not rows:
+        return []
+
+    days = np.array([row["created_at"][:10] for row in rows], dtype="datetime64[D]")
+    scores = np.array([row["eloscore"] for row in rows], dtype=np.int64)
+
+    if bucket == "week":
+        # 1970-01-01 was a Thursday, three days after the Monday that starts its week
+        keys = days - (days.astype(np.int64) + 3) % 7
+    elif bucket == "month":
+        keys = days.astype("datetime64[M]").astype("datetime64[D]")
+    else:
+        keys = days
+
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    ends = np.r_[starts[1:], keys.size] - 1
+
+    buckets = [
+        {"date": str(date), "score": last, "min": low, "max": high, "count": count}
+        for date, last, low, high, count in zip(
+            keys[starts],
+            scores[ends].tolist(),
+            np.minimum.reduceat(scores, starts).tolist(),
+            np.maximum.reduceat(scores, starts).tolist(),
+            (ends - starts + 1).tolist(),
+        )
+    ]
+    buckets.reverse()
+    return buckets
+
+
+def calculate_elo_array(
+    current_elos: np.ndarray,
+    interview_scores: np.ndarray,
+    benchmark_elos: np.ndarray
+) -> np.ndarray:
+    """Vectorized form of SupabaseEloService.calculate_elo.
+    
+    Args:
+        current_elos: Current ELO score per result
+        interview_scores: Interview score (0-100) per result
+        benchmark_elos: Benchmark ELO of each result's difficulty
+        
+    Returns:
+        Integer array of new ELO scores
+    """
+    current_elos = np.asarray(current_elos, dtype=np.float64)
+    interview_scores = np.asarray(interview_scores, dtype=np.float64)
+    benchmark_elos = np.asarray(benchmark_elos, dtype=np.float64)
+
+    k_factors = np.where(
+        current_elos > HIGH_RATED_ELO,
+        K_FACTOR_HIGH_RATED,
+        np.where(current_elos < LOW_RATED_ELO, K_FACTOR_LOW_RATED, K_FACTOR_DEFAULT)
+    )
+    actual_results = np.where(
+        interview_scores >= PERFORMANCE_THRESHOLDS["win"],
+        1.0,
+        np.where(interview_scores >= PERFORMANCE_THRESHOLDS["draw"], 0.5, 0.0)
+    )
+    expected_results = 1 / (1 + 10 ** ((benchmark_elos - current_elos) / 400))
+
+    # np.rint rounds half to even, like the built-in round() in calculate_elo
+    return np.rint(current_elos + k_factors * (actual_results - expected_results)).astype(np.int64)
+
+
+def occurrence_rounds(user_indices: np.ndarray) -> List[np.ndarray]:
+    """Split results into rounds where each user appears at most once.
+    
+    Round r holds every user's r-th result, in input order, so applying the
+    rounds one after another replays each user's results sequentially while
+    updating all users in a round at once.
+    
+    Args:
+        user_indices: Integer user index per result
+        
+    Returns:
+        A list of arrays of result positions, one array per round
+    """
+    user_indices = np.asarray(user_indices)
+    if user_indices.size == 0:
+        return []
+    order = np.argsort(user_indices, kind="stable")
+    sorted_users = user_indices[order]
+    group_starts = np.flatnonzero(np.r_[True, sorted_users[1:] != sorted_users[:-1]])
+    group_sizes = np.diff(np.r_[group_starts, sorted_users.size])
+    occurrence = np.arange(sorted_users.size) - np.repeat(group_starts, group_sizes)
+
+    rounds = []
+    for r in range(int(occurrence.max()) + 1):
+        rounds.append(np.sort(order[occurrence == r]))
+    return rounds
+
 
 class SupabaseEloService:
     """Service for calculating and managing ELO scores using Supabase."""
@@ -52,6 +235,19 @@ class SupabaseEloService:
         
         # Create elo_history table if it doesn't exist
         self._ensure_elo_history_table()
+
+        self.rank_mode = RANK_MODE
+
+        # In-memory leaderboard, populated by rebuild_leaderboard()
+        self.leaderboard = LeaderboardIndex()
+        self.leaderboard_ready = False
+        self._leaderboard_built_at = 0.0
+        self._leaderboard_synced_at = 0.0
+        # created_at of the newest elo_history row applied to the index, and
+        # the ids of rows in the lookback window already applied
+        self._leaderboard_mark: Optional[str] = None
+        self._leaderboard_seen: Dict[int, datetime.datetime] = {}
+        self._leaderboard_sync_lock = threading.Lock()
     
     def _ensure_elo_history_table(self):
         """Ensure the elo_history table exists in Supabase."""
@@ -59,6 +255,104 @@ class SupabaseEloService:
         # For this script, we'll assume the table is created manually or through another process
         pass
     
+    def get_all_users(self) -> List[Dict]:
+        """Read id, name, email and eloscore for every row of elo_scores.
+
+        Rows are fetched in pages because PostgREST caps the rows per request.
+        """
+        users = []
+        offset = 0
+        while True:
+            response = self.supabase.table("elo_scores") \
+                .select("id, name, email, eloscore") \
+                .order("id") \
+                .range(offset, offset + LEADERBOARD_PAGE_SIZE - 1) \
+                .execute()
+            page = response.data or []
+            users.extend(page)
+            if len(page) < LEADERBOARD_PAGE_SIZE:
+                break
+            offset += LEADERBOARD_PAGE_SIZE
+        return users
+
+    def rebuild_leaderboard(self) -> int:
+        """Load every row of elo_scores into the in-memory leaderboard index.
+
+        Returns:
+            The number of users loaded
+        """
+        # Read the mark first, so updates made during the load are applied again
+        mark = self._latest_history_mark()
+        users = self.get_all_users()
+        self.leaderboard.load(users)
+        self._leaderboard_mark = mark
+        self._leaderboard_seen = {}
+        self._leaderboard_built_at = self._leaderboard_synced_at = time.monotonic()
+        self.leaderboard_ready = True
+        return len(users)
+
+    def _latest_history_mark(self) -> Optional[str]:
+        response = self.supabase.table("elo_history") \
+            .select("created_at") \
+            .order("created_at", desc=True) \
+            .limit(1) \
+            .execute()
+        return response.data[0]["created_at"] if response.data else None
+
+    def _sync_leaderboard(self) -> bool:
+        """Bring the leaderboard index up to date with changes made by other processes.
+
+        Returns:
+            True if the index can serve reads
+        """
+        if not self.leaderboard_ready:
+            return False
+        now = time.monotonic()
+        if now - self._leaderboard_synced_at < LEADERBOARD_SYNC_SECONDS:
+            return True
+        # One sync at a time; other readers use the index as it is
+        if not self._leaderboard_sync_lock.acquire(blocking=False):
+            return True
+        try:
+            if now - self._leaderboard_built_at >= LEADERBOARD_REBUILD_SECONDS:
+                self.rebuild_leaderboard()
+                return True
+
+            # gte, so rows sharing the mark's timestamp are not skipped; rows
+            # already applied are recognised by id
+            since = None
+            query = self.supabase.table("elo_history").select("id, email, created_at")
+            if self._leaderboard_mark:
+                since = _parse_timestamp(self._leaderboard_mark) - \
+                    datetime.timedelta(seconds=LEADERBOARD_SYNC_LOOKBACK_SECONDS)
+                query = query.gte("created_at", since.isoformat())
+            rows = query.order("created_at").limit(LEADERBOARD_PAGE_SIZE).execute().data or []
+            if len(rows) >= LEADERBOARD_PAGE_SIZE:
+                self.rebuild_leaderboard()
+                return True
+
+            changed = [row for row in rows if row["id"] not in self._leaderboard_seen]
+            if changed:
+                emails = list(dict.fromkeys(row["email"] for row in changed))
+                for user in self._fetch_users_by_email(emails).values():
+                    self.leaderboard.upsert(user)
+            for row in rows:
+                self._leaderboard_seen[row["id"]] = _parse_timestamp(row["created_at"])
+            if rows:
+                self._leaderboard_mark = rows[-1]["created_at"]
+            if since is not None:
+                self._leaderboard_seen = {
+                    row_id: created_at for row_id, created_at in self._leaderboard_seen.items()
+                    if created_at >= since
+                }
+            self._leaderboard_synced_at = now
+        except Exception as e:
+            # Serve the index as it is and try again on a later read
+            print(f"Error syncing leaderboard index: {e}")
+        finally:
+            self._leaderboard_sync_lock.release()
+        return True
+
     def get_user_elo(self, email: str) -> int:
         """Get a user's current ELO score.
         
@@ -89,6 +383,21 @@ class SupabaseEloService:
         """
         return 1 / (1 + 10 ** ((benchmark_elo - user_elo) / 400))
     
+    def get_actual_result(self, interview_score: float) -> float:
+        """Convert an interview score to an ELO result.
+        
+        Args:
+            interview_score: The user's interview score (0-100)
+            
+        Returns:
+            1.0 for a win, 0.5 for a draw and 0.0 for a loss
+        """
+        if interview_score >= PERFORMANCE_THRESHOLDS["win"]:
+            return 1.0
+        if interview_score >= PERFORMANCE_THRESHOLDS["draw"]:
+            return 0.5
+        return 0.0
+    
     def calculate_elo(
         self, 
         current_elo: int, 
@@ -110,18 +419,13 @@ class SupabaseEloService:
         
         # Determine the K-factor based on the user's current ELO
         k_factor = K_FACTOR_DEFAULT
-        if current_elo > 1500:
+        if current_elo > HIGH_RATED_ELO:
             k_factor = K_FACTOR_HIGH_RATED
-        elif current_elo < 1000:
+        elif current_elo < LOW_RATED_ELO:
             k_factor = K_FACTOR_LOW_RATED
         
         # Convert interview score to ELO result (1 = win, 0.5 = draw, 0 = loss)
-        if interview_score >= PERFORMANCE_THRESHOLDS["win"]:
-            actual_result = 1.0  # Win
-        elif interview_score >= PERFORMANCE_THRESHOLDS["draw"]:
-            actual_result = 0.5  # Draw
-        else:
-            actual_result = 0.0  # Loss
+        actual_result = self.get_actual_result(interview_score)
         
         # Calculate the expected result using the ELO formula
         expected_result = self.get_expected_result(current_elo, benchmark_elo)
@@ -150,6 +454,57 @@ class SupabaseEloService:
             
         Returns:
             A dictionary with the old ELO, new ELO, and ELO change
+
+        Raises:
+            Exception: If apply_elo_result fails for any reason other than not
+                being installed. The RPC may have committed before the error
+                (e.g. a lost response), so the update is not retried.
+        """
+        try:
+            response = self.supabase.rpc("apply_elo_result", {
+                "p_email": email,
+                "p_name": name,
+                "p_actual_result": self.get_actual_result(interview_score),
+                "p_benchmark_elo": BENCHMARK_ELO[difficulty],
+                "p_base_elo": BASE_ELO,
+                "p_k_default": K_FACTOR_DEFAULT,
+                "p_k_high": K_FACTOR_HIGH_RATED,
+                "p_k_low": K_FACTOR_LOW_RATED,
+                "p_high_rated_elo": HIGH_RATED_ELO,
+                "p_low_rated_elo": LOW_RATED_ELO,
+                "p_incremental_ranks": self.rank_mode == "incremental",
+            }).execute()
+            row = response.data[0]
+        except Exception as e:
+            if not is_missing_function(e):
+                print(f"apply_elo_result RPC failed for {email}; not retrying: {e}")
+                raise
+            print(f"apply_elo_result RPC unavailable, using multi-step update: {e}")
+            return self._update_elo_score_multi_step(email, interview_score, name, difficulty)
+
+        if self.leaderboard_ready:
+            self.leaderboard.upsert({
+                "id": row["user_id"], "name": self._indexed_name(email, name), "email": email, "eloscore": row["new_elo"]
+            })
+
+        return {
+            "old_elo": row["old_elo"],
+            "new_elo": row["new_elo"],
+            "elo_change": row["new_elo"] - row["old_elo"],
+            "timestamp": row["created_at"]
+        }
+    
+    def _update_elo_score_multi_step(
+        self,
+        email: str,
+        interview_score: int,
+        name: str,
+        difficulty: Literal["easy", "medium", "hard"]
+    ) -> Dict:
+        """Update a user's ELO with separate reads and writes.
+        
+        Used when the apply_elo_result function is not installed. Unlike the
+        RPC this is not atomic, so concurrent updates for one user can race.
         """
         # Get current ELO or use base ELO if user doesn't exist
         current_elo = self.get_user_elo(email)
@@ -160,19 +515,19 @@ class SupabaseEloService:
         timestamp = datetime.datetime.now()
         
         # First try to update the user if they exist
-        user_response = self.supabase.table("elo_scores").select("id").eq("email", email).execute()
+        user_response = self.supabase.table("elo_scores").select("id, name").eq("email", email).execute()
 
         if not user_response.data or len(user_response.data) == 0:
             # User doesn't exist, let's create one
             # Get the next available ID     
-            max_id_response = self.supabase.table("elo_scores").select("id").order("id", desc=True).limit(1).execute()
-            next_id = 1
-            if max_id_response.data and len(max_id_response.data) > 0:
-                next_id = max_id_response.data[0]["id"] + 1
+            next_id = self.next_user_id()
             
             # Determine initial rank for new user
-            rank_response = self.supabase.table("elo_scores").select("id").gte("eloscore", new_elo).execute()
-            rank = len(rank_response.data) + 1
+            rank_response = self.supabase.table("elo_scores") \
+                .select("id", count="exact", head=True) \
+                .gt("eloscore", new_elo) \
+                .execute()
+            rank = (rank_response.count or 0) + 1
             
             # Create new user record
             try:
@@ -190,6 +545,11 @@ class SupabaseEloService:
                     "eloscore": new_elo,
                     "created_at": timestamp.isoformat()
                 }).execute()
+
+                user_id = next_id
+
+                # Move everyone below the new user down one place
+                self._maintain_ranks(user_id, None, new_elo)
             
             except Exception as e:
                 # If creation fails, still return the calculated values
@@ -201,8 +561,9 @@ class SupabaseEloService:
                     "error": f"Failed to create user: {str(e)}"
                 }
         else:
-            # User exists, update their ELO score
+            # User exists, update their ELO score; the stored name is kept
             user_id = user_response.data[0]["id"]
+            stored_name = user_response.data[0].get("name")
 
             try:
                 # Update the user's ELO in the database
@@ -217,8 +578,8 @@ class SupabaseEloService:
                     "created_at": timestamp.isoformat()
                 }).execute()
                 
-                # Update all ranks
-                self._update_all_ranks()
+                # Update the ranks affected by this change
+                self._maintain_ranks(user_id, current_elo, new_elo)
             
             except Exception as e:
                 return {
@@ -228,12 +589,11 @@ class SupabaseEloService:
                     "timestamp": timestamp.isoformat(),
                     "error": f"Failed to update user: {str(e)}"
                 }
-        
-        # Record the ELO history
-        try:
-            self._record_elo_history(email, current_elo, new_elo, elo_change, interview_score, interview_type, difficulty)
-        except Exception as e:
-            print(f"Error recording history for {email}: {e}")
+
+        if self.leaderboard_ready:
+            if user_response.data:
+                name = stored_name or self._indexed_name(email, name)
+            self.leaderboard.upsert({"id": user_id, "name": name, "email": email, "eloscore": new_elo})
         
         return {
             "old_elo": current_elo,
@@ -242,51 +602,236 @@ class SupabaseEloService:
             "timestamp": timestamp.isoformat()
         }
     
-    def _record_elo_history(
-        self,
-        email: str,
-        old_elo: int,
-        new_elo: int,
-        change: int,
-        interview_score: int,
-        interview_type: str,
-        difficulty: str
-    ):
-        """Record an entry in the ELO history table.
+    def _indexed_name(self, email: str, name: str) -> str:
+        """Name to index for a user: the one already indexed, else the given name.
+
+        Updates only set the name for new users, so an existing user's stored
+        name must not be replaced by the caller's (often the default) name.
+        """
+        indexed = self.leaderboard.rank(email)
+        return indexed["name"] if indexed and indexed.get("name") else name
+
+    def update_elo_batch(self, results: List[Dict]) -> Dict:
+        """Apply many interview results at once.
+        
+        Expected results and K-factors are computed with NumPy over the whole
+        batch. A user with several results in the batch has them applied in
+        order. Current scores are read in one query per chunk of emails, and
+        new scores and history rows are written with bulk upserts/inserts.
         
         Args:
-            email: User's email
-            old_elo: Previous ELO score
-            new_elo: New ELO score
-            change: ELO change amount
-            interview_score: Score from the interview
-            interview_type: Type of interview
-            difficulty: Difficulty level of the interview
+            results: Dicts with "email", "score" (0-100) and optional
+                "difficulty" ("easy", "medium", "hard") and "name"
+            
+        Returns:
+            A dictionary with the number processed, per-result ELO changes
+            and any rejected entries
+        """
+        if len(results) > MAX_BATCH_SIZE:
+            raise ValueError(f"Batch size must not exceed {MAX_BATCH_SIZE}")
+
+        valid = []
+        errors = []
+        for i, entry in enumerate(results):
+            email = entry.get("email")
+            difficulty = entry.get("difficulty") or "medium"
+            if not email or entry.get("score") in (None, ""):
+                errors.append({"index": i, "error": "Email and score are required"})
+                continue
+            try:
+                score = float(entry["score"])
+            except (TypeError, ValueError):
+                errors.append({"index": i, "error": "Score must be a number"})
+                continue
+            if score < 0 or score > 100:
+                errors.append({"index": i, "error": "Score must be between 0 and 100"})
+                continue
+            if difficulty not in BENCHMARK_ELO:
+                errors.append({"index": i, "error": f"Unknown difficulty: {difficulty}"})
+                continue
+            valid.append((i, email, score, difficulty, entry.get("name")))
+
+        if not valid:
+            return {"processed": 0, "results": [], "errors": errors}
+
+        # Look up every distinct user once
+        emails = list(dict.fromkeys(email for _, email, _, _, _ in valid))
+        existing = self._fetch_users_by_email(emails)
+
+        user_index = {email: i for i, email in enumerate(emails)}
+        ratings = np.array([existing[e]["eloscore"] if e in existing else BASE_ELO for e in emails], dtype=np.int64)
+
+        result_users = np.array([user_index[email] for _, email, _, _, _ in valid])
+        scores = np.array([score for _, _, score, _, _ in valid])
+        benchmarks = np.array([BENCHMARK_ELO[difficulty] for _, _, _, difficulty, _ in valid])
+        old_elos = np.empty(len(valid), dtype=np.int64)
+        new_elos = np.empty(len(valid), dtype=np.int64)
+
+        for positions in occurrence_rounds(result_users):
+            users = result_users[positions]
+            old_elos[positions] = ratings[users]
+            new_elos[positions] = calculate_elo_array(ratings[users], scores[positions], benchmarks[positions])
+            ratings[users] = new_elos[positions]
+
+        # Resolve names and ids, allocating ids for new users in one go
+        names = {}
+        for _, email, _, _, name in valid:
+            if name:
+                names[email] = name
+        next_id = None
+        ids = {}
+        for email in emails:
+            if email in existing:
+                ids[email] = existing[email]["id"]
+                names.setdefault(email, existing[email].get("name") or "Anonymous User")
+            else:
+                if next_id is None:
+                    next_id = self.next_user_id()
+                ids[email] = next_id
+                next_id += 1
+                names.setdefault(email, "Anonymous User")
+
+        timestamp = datetime.datetime.now().isoformat()
+        score_rows = [
+            {"id": ids[email], "name": names[email], "email": email, "eloscore": int(ratings[user_index[email]])}
+            for email in emails
+        ]
+        history_rows = [
+            {"name": names[email], "email": email, "eloscore": int(new_elos[j]), "created_at": timestamp}
+            for j, (_, email, _, _, _) in enumerate(valid)
+        ]
+
+        self.bulk_upsert_scores(score_rows)
+        self.bulk_insert_history(history_rows)
+
+        # Many users moved at once, so one set-based re-rank is cheapest
+        self._update_all_ranks()
+
+        if self.leaderboard_ready:
+            for row in score_rows:
+                self.leaderboard.upsert(row)
+
+        return {
+            "processed": len(valid),
+            "results": [
+                {
+                    "index": i,
+                    "email": email,
+                    "old_elo": int(old_elos[j]),
+                    "new_elo": int(new_elos[j]),
+                    "elo_change": int(new_elos[j] - old_elos[j]),
+                }
+                for j, (i, email, _, _, _) in enumerate(valid)
+            ],
+            "errors": errors,
+        }
+
+    def bulk_upsert_scores(self, rows: List[Dict]):
+        """Upsert full elo_scores rows (id, name, email, eloscore, optionally rank) in chunks."""
+        for start in range(0, len(rows), BULK_CHUNK_SIZE):
+            self.supabase.table("elo_scores").upsert(rows[start:start + BULK_CHUNK_SIZE], on_conflict="id").execute()
+
+    def bulk_insert_history(self, rows: List[Dict]):
+        """Insert elo_history rows (name, email, eloscore, created_at) in chunks."""
+        for start in range(0, len(rows), BULK_CHUNK_SIZE):
+            self.supabase.table("elo_history").insert(rows[start:start + BULK_CHUNK_SIZE]).execute()
+
+    def bulk_upsert_history(self, rows: List[Dict]):
+        """Upsert replayed elo_history rows, which also carry interview_id, in chunks.
+
+        Rows already written for an interview are replaced, so a page can be
+        written again safely.
+        """
+        for start in range(0, len(rows), BULK_CHUNK_SIZE):
+            self.supabase.table("elo_history") \
+                .upsert(rows[start:start + BULK_CHUNK_SIZE], on_conflict="interview_id") \
+                .execute()
+
+    def delete_history(self, emails: List[str]):
+        """Delete every elo_history row of the given users, in chunks."""
+        for start in range(0, len(emails), BULK_CHUNK_SIZE):
+            self.supabase.table("elo_history").delete().in_("email", emails[start:start + BULK_CHUNK_SIZE]).execute()
+
+    def _fetch_users_by_email(self, emails: List[str]) -> Dict[str, Dict]:
+        """Fetch id, name and eloscore for many users, keyed by email."""
+        users = {}
+        for start in range(0, len(emails), BULK_CHUNK_SIZE):
+            response = self.supabase.table("elo_scores") \
+                .select("id, name, email, eloscore") \
+                .in_("email", emails[start:start + BULK_CHUNK_SIZE]) \
+                .execute()
+            for row in response.data or []:
+                users[row["email"]] = row
+        return users
+
+    def next_user_id(self) -> int:
+        """Return the next unused elo_scores id."""
+        max_id_response = self.supabase.table("elo_scores").select("id").order("id", desc=True).limit(1).execute()
+        if max_id_response.data and len(max_id_response.data) > 0:
+            return max_id_response.data[0]["id"] + 1
+        return 1
+
+    def _maintain_ranks(self, user_id: int, old_elo: Optional[int], new_elo: int):
+        """Bring stored ranks up to date after one user's ELO changed.
+        
+        Args:
+            user_id: The elo_scores id of the user whose score changed
+            old_elo: The previous ELO score, or None for a newly inserted user
+            new_elo: The new ELO score
+        """
+        if self.rank_mode == "incremental":
+            try:
+                self._shift_ranks(user_id, old_elo, new_elo)
+                return
+            except Exception as e:
+                print(f"shift_elo_ranks RPC failed, re-ranking all users: {e}")
+
+        self._update_all_ranks()
+
+    def _shift_ranks(self, user_id: int, old_elo: Optional[int], new_elo: int):
+        """Shift only the ranks between old_elo and new_elo in one range UPDATE.
+        
+        See migrations/002_shift_elo_ranks.sql.
+        """
+        self.supabase.rpc("shift_elo_ranks", {
+            "p_user_id": user_id,
+            "p_old_elo": old_elo,
+            "p_new_elo": new_elo,
+        }).execute()
+
+    def repair_ranks(self) -> int:
+        """Recompute every stored rank and reload the leaderboard index.
+        
+        Incremental shifts can drift when updates race each other, so this
+        is meant to be run periodically (see the `repair-ranks` CLI command).
+        
+        Returns:
+            The number of users in the rebuilt leaderboard index
+        """
+        self._update_all_ranks()
+        return self.rebuild_leaderboard()
+
+    def _update_all_ranks(self):
+        """Update the ranks of all users based on their ELO scores.
+
+        Ranks are recomputed inside the database by the ``recompute_elo_ranks``
+        function (see migrations/001_recompute_elo_ranks.sql), which costs one
+        round trip regardless of how many users exist. If the function has not
+        been installed, fall back to reading every user page by page and
+        upserting the ranks in chunks.
         """
         try:
-            self.supabase.table("elo_history").insert({
-                "name": "Anonymous User",
-                "email": email,
-                "eloscore": new_elo,
-                "created_at": datetime.datetime.now().isoformat()
-            }).execute()
+            self.supabase.rpc("recompute_elo_ranks").execute()
+            return
         except Exception as e:
-            print(f"Error recording ELO history: {e}")
-            # Continue execution even if history recording fails
-    
-    def _update_all_ranks(self):
-        """Update the ranks of all users based on their ELO scores."""
-        # Get all users ordered by ELO
-        users_response = self.supabase.table("elo_scores").select("id, eloscore").order("eloscore", desc=True).execute()
-        
-        if not users_response.data:
+            print(f"recompute_elo_ranks RPC unavailable, using bulk upsert: {e}")
+
+        users = self.get_all_users()
+        if not users:
             return
-        
-        # Update each user's rank
-        for rank, user in enumerate(users_response.data, 1):
-            self.supabase.table("elo_scores").update({
-                "rank": rank
-            }).eq("id", user["id"]).execute()
+
+        users.sort(key=lambda user: user["eloscore"], reverse=True)
+        self.bulk_upsert_scores(compute_ranks(users))
     
     def get_leaderboard(self, limit: int = 100, offset: int = 0) -> List[Dict]:
         """Get the ELO ranking leaderboard.
@@ -298,6 +843,9 @@ class SupabaseEloService:
         Returns:
             A list of users sorted by ELO score
         """
+        if self._sync_leaderboard():
+            return self.leaderboard.top(limit, offset)
+
         response = self.supabase.table("elo_scores") \
             .select("id, name, email, eloscore, rank") \
             .order("rank") \
@@ -306,16 +854,59 @@ class SupabaseEloService:
         
         return response.data if response.data else []
     
-    def get_user_elo_history(self, email: str, limit: int = 90) -> List[Dict]:
+    def get_user_rank(self, email: str) -> Optional[Dict]:
+        """Get a user's leaderboard entry.
+        
+        Args:
+            email: The email of the user
+            
+        Returns:
+            The user's id, name, email, eloscore and rank, or None if unranked
+        """
+        if self._sync_leaderboard():
+            return self.leaderboard.rank(email)
+
+        response = self.supabase.table("elo_scores") \
+            .select("id, name, email, eloscore, rank") \
+            .eq("email", email) \
+            .execute()
+        
+        return response.data[0] if response.data else None
+    
+    def get_users_around(self, email: str, radius: int = 5) -> List[Dict]:
+        """Get the users ranked immediately above and below a user.
+        
+        Args:
+            email: The email of the user
+            radius: How many users to include on each side
+            
+        Returns:
+            Up to 2 * radius + 1 leaderboard entries centred on the user
+        """
+        if self._sync_leaderboard():
+            return self.leaderboard.around(email, radius)
+
+        user = self.get_user_rank(email)
+        if not user or user.get("rank") is None:
+            return []
+        offset = max(user["rank"] - 1 - radius, 0)
+        return self.get_leaderboard(user["rank"] - offset + radius, offset)
+    
+    def get_user_elo_history(self, email: str, limit: int = 90, bucket: Optional[str] = None) -> List[Dict]:
         """Get a specific user's ELO history over time.
         
         Args:
             email: The email of the user
-            limit: The maximum number of history entries to return
+            limit: The maximum number of history entries (or buckets) to return
+            bucket: Optional "day", "week" or "month" to return one point per
+                bucket with its last, min and max score instead of raw entries
             
         Returns:
-            A list of ELO history entries for the user
+            A list of ELO history entries for the user, newest first
         """
+        if bucket is not None:
+            return self._get_bucketed_elo_history(email, limit, bucket)
+
         response = self.supabase.table("elo_history") \
             .select("eloscore, created_at") \
             .eq("email", email) \
@@ -337,6 +928,47 @@ class SupabaseEloService:
         
         return formatted_history
 
+    def _get_bucketed_elo_history(self, email: str, limit: int, bucket: str) -> List[Dict]:
+        """Aggregate a user's history per bucket, in the database if possible."""
+        if bucket not in HISTORY_BUCKETS:
+            raise ValueError(f"bucket must be one of {', '.join(HISTORY_BUCKETS)}")
+
+        try:
+            response = self.supabase.rpc("elo_history_buckets", {
+                "p_email": email,
+                "p_bucket": bucket,
+                "p_limit": limit,
+            }).execute()
+            return [
+                {
+                    "date": str(row["bucket_date"]),
+                    "score": row["last_score"],
+                    "min": row["min_score"],
+                    "max": row["max_score"],
+                    "count": row["entries"]
+                }
+                for row in response.data or []
+            ]
+        except Exception as e:
+            print(f"elo_history_buckets RPC unavailable, aggregating locally: {e}")
+
+        rows = []
+        offset = 0
+        while True:
+            response = self.supabase.table("elo_history") \
+                .select("eloscore, created_at") \
+                .eq("email", email) \
+                .order("created_at") \
+                .range(offset, offset + LEADERBOARD_PAGE_SIZE - 1) \
+                .execute()
+            page = response.data or []
+            rows.extend(page)
+            if len(page) < LEADERBOARD_PAGE_SIZE:
+                break
+            offset += LEADERBOARD_PAGE_SIZE
+
+        return bucket_elo_history(rows, bucket)[:limit]
+
 
 def main() -> None:
     """Main function for CLI interaction."""
@@ -375,6 +1007,28 @@ def main() -> None:
     history_parser.add_argument("--email", required=True, help="User email")
     history_parser.add_argument("--limit", type=int, default=10, help="Maximum number of entries")
     
+    # Batch update command
+    batch_parser = subparsers.add_parser("batch", help="Apply many interview results from a CSV file")
+    batch_parser.add_argument(
+        "--file",
+        required=True,
+        help="CSV file with an 'email,score' header and optional 'difficulty' and 'name' columns"
+    )
+    
+    # Replay command
+    replay_parser = subparsers.add_parser(
+        "replay",
+        help="Recompute all ratings from interview_performance with the current constants; "
+             "users without interviews are reset to the base ELO"
+    )
+    replay_parser.add_argument("--checkpoint", default="elo_replay_checkpoint.json", help="Checkpoint file path")
+    replay_parser.add_argument("--page-size", type=int, default=5000, help="Interviews read per request")
+    replay_parser.add_argument("--fresh", action="store_true", help="Ignore any existing checkpoint")
+    replay_parser.add_argument("--skip-history", action="store_true", help="Do not rebuild or clear elo_history")
+    
+    # Repair ranks command
+    subparsers.add_parser("repair-ranks", help="Recompute every user's rank (periodic repair job)")
+    
     # Calculate ELO command (without storing)
     calc_parser = subparsers.add_parser("calculate", help="Calculate ELO change (without storing)")
     calc_parser.add_argument("--current-elo", type=int, required=True, help="Current ELO score")
@@ -409,6 +1063,26 @@ def main() -> None:
         elif args.command == "history":
             history = elo_service.get_user_elo_history(args.email, args.limit)
   
+        elif args.command == "batch":
+            with open(args.file, newline="", encoding="utf-8") as f:
+                rows = list(csv.DictReader(f))
+            result = elo_service.update_elo_batch(rows)
+            print(f"Processed {result['processed']} results, rejected {len(result['errors'])}")
+            for error in result["errors"]:
+                print(f"  row {error['index'] + 1}: {error['error']}")
+
+        elif args.command == "replay":
+            from services.elo_replay import EloReplayEngine
+
+            engine = EloReplayEngine(elo_service, checkpoint_path=args.checkpoint, page_size=args.page_size)
+            summary = engine.run(resume=not args.fresh, write_history=not args.skip_history)
+            print(f"Replayed {summary['interviews']} interviews for {summary['users']} users; "
+                  f"reset {summary['reset']} users without interviews")
+
+        elif args.command == "repair-ranks":
+            count = elo_service.repair_ranks()
+            print(f"Re-ranked {count} users")
+
         elif args.command == "calculate":
             new_elo = elo_service.calculate_elo(args.current_elo, args.score, args.difficulty)
             change = new_elo - args.current_elo
@@ -0,0 +1,270 @@
+"""
+Deterministic ELO replay/backfill from interview_performance.
+
+Recomputes every user's rating from scratch with the current BENCHMARK_ELO,
+K-factors and PERFORMANCE_THRESHOLDS. Interviews are streamed in
+(created_at, interview_id) order with keyset pagination. Each page is
+applied with the vectorized calculate_elo_array, one occurrence round at a
+time. After every page the cursor and the ratings that page changed are
+appended to a local checkpoint journal, so an interrupted replay resumes from
+the last completed page and checkpointing costs O(page) rather than O(users).
+
+The result matches a clean start. Each replayed user's old elo_history is
+deleted just before their first replayed row is written. Users in elo_scores
+without any interview are reset to BASE_ELO and their history is deleted.
+Replayed rows are upserted on interview_id, so a page written again after a
+crash does not duplicate history.
+"""
+
+import json
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from services import elo_calculator
+from services.elo_calculator import (
+    BASE_ELO,
+    SupabaseEloService,
+    calculate_elo_array,
+    occurrence_rounds,
+)
+
+REPLAY_PAGE_SIZE = 5000
+DEFAULT_CHECKPOINT_PATH = "elo_replay_checkpoint.json"
+
+SCORE_COLUMNS = [
+    "technical_accuracy_score",
+    "communication_score",
+    "confidence_score",
+    "problem_solving_score",
+    "resume_strength_score",
+    "leadership_score",
+]
+
+
+def rating_config() -> Dict:
+    """Return the rating constants a replay depends on.
+
+    A checkpoint written under different constants cannot be resumed.
+    """
+    return {
+        "base_elo": elo_calculator.BASE_ELO,
+        "k_factors": [
+            elo_calculator.K_FACTOR_DEFAULT,
+            elo_calculator.K_FACTOR_HIGH_RATED,
+            elo_calculator.K_FACTOR_LOW_RATED,
+        ],
+        "benchmark_elo": elo_calculator.BENCHMARK_ELO,
+        "thresholds": elo_calculator.PERFORMANCE_THRESHOLDS,
+    }
+
+
+def interview_score(row: Dict) -> float:
+    """Score an interview the same way ChatHistoryService.save_analysis does:
+    the mean of the six rubric scores."""
+    return sum(row.get(column) or 0 for column in SCORE_COLUMNS) / len(SCORE_COLUMNS)
+
+
+class EloReplayEngine:
+    """Replays interview_performance into elo_scores and elo_history."""
+
+    def __init__(
+        self,
+        elo_service: SupabaseEloService,
+        checkpoint_path: str = DEFAULT_CHECKPOINT_PATH,
+        page_size: int = REPLAY_PAGE_SIZE,
+        difficulty: str = "medium"
+    ):
+        """
+        Args:
+            elo_service: Service providing the Supabase client and bulk writers
+            checkpoint_path: Where progress is saved between pages
+            page_size: Interviews read per request
+            difficulty: Difficulty applied to every interview; interview_performance
+                does not record one, and the live path uses "medium"
+        """
+        self.elo_service = elo_service
+        self.supabase = elo_service.supabase
+        self.checkpoint_path = checkpoint_path
+        self.page_size = page_size
+        self.difficulty = difficulty
+
+        self.ratings: Dict[str, int] = {}
+        self.cursor: Optional[Dict] = None
+        self.processed = 0
+
+    # ------------------------------------------------------------------
+    # Checkpointing
+    # ------------------------------------------------------------------
+    # The checkpoint is a JSON-lines journal: a {"config"} header, then one
+    # {"cursor", "processed", "ratings"} entry per page holding only the
+    # ratings that page changed.
+    def _load_checkpoint(self) -> bool:
+        if not os.path.exists(self.checkpoint_path):
+            return False
+        with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        if not lines:
+            return False
+        if json.loads(lines[0]).get("config") != rating_config():
+            raise ValueError(
+                "Checkpoint was written with different rating constants; "
+                "delete it to start a fresh replay"
+            )
+        for line in lines[1:]:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                break  # Torn final write; that page is replayed again
+            self.ratings.update(entry["ratings"])
+            self.cursor = entry["cursor"]
+            self.processed = entry["processed"]
+
+        # Compact the journal into one entry, dropping any torn line
+        self._start_checkpoint(self.ratings)
+        return True
+
+    def _start_checkpoint(self, ratings: Dict[str, int]):
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"config": rating_config()}) + "\n")
+            if self.cursor is not None:
+                f.write(json.dumps({"cursor": self.cursor, "processed": self.processed, "ratings": ratings}) + "\n")
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def _save_checkpoint(self, changed: Dict[str, int]):
+        """Append the cursor and the ratings changed since the last entry."""
+        with open(self.checkpoint_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"cursor": self.cursor, "processed": self.processed, "ratings": changed}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    # ------------------------------------------------------------------
+    # Streaming
+    # ------------------------------------------------------------------
+    def _fetch_page(self) -> List[Dict]:
+        query = self.supabase.table("interview_performance") \
+            .select("interview_id, user_email, created_at, " + ", ".join(SCORE_COLUMNS))
+        if self.cursor:
+            created_at = self.cursor["created_at"]
+            interview_id = self.cursor["interview_id"]
+            query = query.or_(
+                f'created_at.gt."{created_at}",'
+                f'and(created_at.eq."{created_at}",interview_id.gt.{interview_id})'
+            )
+        response = query \
+            .order("created_at") \
+            .order("interview_id") \
+            .limit(self.page_size) \
+            .execute()
+        return response.data or []
+
+    def _apply_page(self, rows: List[Dict]) -> List[Dict]:
+        """Update self.ratings from one page and return its history rows.
+
+        Every user on the page ends up in self.ratings.
+        """
+        emails = [row["user_email"] for row in rows]
+        page_users = list(dict.fromkeys(emails))
+        user_index = {email: i for i, email in enumerate(page_users)}
+
+        ratings = np.array([self.ratings.get(email, BASE_ELO) for email in page_users], dtype=np.int64)
+        result_users = np.array([user_index[email] for email in emails])
+        scores = np.array([interview_score(row) for row in rows])
+        benchmarks = np.full(len(rows), elo_calculator.BENCHMARK_ELO[self.difficulty])
+        new_elos = np.empty(len(rows), dtype=np.int64)
+
+        for positions in occurrence_rounds(result_users):
+            users = result_users[positions]
+            new_elos[positions] = calculate_elo_array(ratings[users], scores[positions], benchmarks[positions])
+            ratings[users] = new_elos[positions]
+
+        for email, rating in zip(page_users, ratings.tolist()):
+            self.ratings[email] = rating
+
+        return [
+            {"interview_id": row["interview_id"], "email": row["user_email"],
+             "eloscore": int(new_elos[i]), "created_at": row["created_at"]}
+            for i, row in enumerate(rows)
+        ]
+
+    # ------------------------------------------------------------------
+    # Entry point
+    # ------------------------------------------------------------------
+    def run(self, resume: bool = True, write_history: bool = True) -> Dict:
+        """Replay every interview and write the resulting ratings.
+
+        The result is what replaying from an empty elo_scores would give,
+        except that existing users keep their ids and names: users without
+        interviews are reset to BASE_ELO, and (with write_history) the old
+        history of every user in elo_scores is replaced rather than appended to.
+
+        Args:
+            resume: Continue from the checkpoint file if one exists
+            write_history: Also rebuild elo_history, one row per interview
+
+        Returns:
+            A summary with the number of interviews and users replayed, and
+            of users without interviews reset to BASE_ELO
+        """
+        resumed = resume and self._load_checkpoint()
+        if not resumed:
+            self._start_checkpoint({})
+
+        existing = {user["email"]: user for user in self.elo_service.get_all_users()}
+
+        while True:
+            rows = self._fetch_page()
+            if not rows:
+                break
+
+            # Users first seen on this page have not had their old history
+            # cleared yet; users in the checkpoint have
+            new_users = list(dict.fromkeys(
+                row["user_email"] for row in rows if row["user_email"] not in self.ratings
+            ))
+            history_rows = self._apply_page(rows)
+            if write_history:
+                for history_row in history_rows:
+                    user = existing.get(history_row["email"])
+                    history_row["name"] = (user or {}).get("name") or "Anonymous User"
+                if new_users:
+                    self.elo_service.delete_history(new_users)
+                self.elo_service.bulk_upsert_history(history_rows)
+
+            self.processed += len(rows)
+            self.cursor = {"created_at": rows[-1]["created_at"], "interview_id": rows[-1]["interview_id"]}
+            self._save_checkpoint({row["user_email"]: self.ratings[row["user_email"]] for row in rows})
+
+            if len(rows) < self.page_size:
+                break
+
+        # Write final ratings, allocating ids for users not yet in elo_scores
+        next_id = None
+        score_rows = []
+        for email, rating in self.ratings.items():
+            user = existing.get(email)
+            if user:
+                score_rows.append({"id": user["id"], "name": user.get("name") or "Anonymous User",
+                                   "email": email, "eloscore": rating})
+            else:
+                if next_id is None:
+                    next_id = self.elo_service.next_user_id()
+                score_rows.append({"id": next_id, "name": "Anonymous User", "email": email, "eloscore": rating})
+                next_id += 1
+
+        # Users without interviews end where a clean start leaves them
+        reset = [email for email in existing if email not in self.ratings]
+        for email in reset:
+            user = existing[email]
+            score_rows.append({"id": user["id"], "name": user.get("name") or "Anonymous User",
+                               "email": email, "eloscore": BASE_ELO})
+        if write_history and reset:
+            self.elo_service.delete_history(reset)
+
+        self.elo_service.bulk_upsert_scores(score_rows)
+        self.elo_service.repair_ranks()
+
+        os.remove(self.checkpoint_path)
+        return {"interviews": self.processed, "users": len(self.ratings), "reset": len(reset), "resumed": resumed}
@@ -0,0 +1,166 @@
+"""
+In-memory order-statistic index for the ELO leaderboard.
+
+Scores are bucketed by integer ELO and counted in a Fenwick tree, so the
+number of users above any score is an O(log B) prefix sum, where B is the
+number of ELO buckets. Users inside a bucket are kept in a sorted list,
+which gives a stable order for users who share a score.
+"""
+
+import bisect
+import threading
+from typing import Dict, Iterable, List, Optional
+
+MIN_INDEXED_ELO = 0
+MAX_INDEXED_ELO = 4000
+
+
+class LeaderboardIndex:
+    """Answers top-k, rank and "users around me" queries over ELO scores."""
+
+    def __init__(self, min_elo: int = MIN_INDEXED_ELO, max_elo: int = MAX_INDEXED_ELO):
+        """Create an empty index covering ELO scores in [min_elo, max_elo].
+
+        Scores outside the range are clamped into the first or last bucket.
+        """
+        self.min_elo = min_elo
+        self.max_elo = max_elo
+        self._size = max_elo - min_elo + 1
+        self._lock = threading.RLock()
+        self._clear()
+
+    def _clear(self):
+        self._tree = [0] * (self._size + 1)
+        self._buckets: Dict[int, List[str]] = {}
+        self._users: Dict[str, Dict] = {}
+
+    # ------------------------------------------------------------------
+    # Fenwick tree helpers. Position 1 holds the highest ELO so that a
+    # prefix sum counts the users at or above a score.
+    # ------------------------------------------------------------------
+    def _position(self, elo: int) -> int:
+        elo = min(max(int(elo), self.min_elo), self.max_elo)
+        return self.max_elo - elo + 1
+
+    def _add(self, position: int, delta: int):
+        while position <= self._size:
+            self._tree[position] += delta
+            position += position & -position
+
+    def _prefix(self, position: int) -> int:
+        total = 0
+        while position > 0:
+            total += self._tree[position]
+            position -= position & -position
+        return total
+
+    def _find(self, k: int) -> int:
+        """Return the smallest position whose prefix sum is >= k (1-based)."""
+        position = 0
+        step = 1 << self._size.bit_length()
+        while step:
+            nxt = position + step
+            if nxt <= self._size and self._tree[nxt] < k:
+                position = nxt
+                k -= self._tree[nxt]
+            step >>= 1
+        return position + 1
+
+    # ------------------------------------------------------------------
+    # Mutation
+    # ------------------------------------------------------------------
+    def load(self, users: Iterable[Dict]):
+        """Replace the index contents with rows from elo_scores."""
+        with self._lock:
+            self._clear()
+            for user in users:
+                self._insert(user)
+
+    def upsert(self, user: Dict):
+        """Insert a user or move them to their new score."""
+        with self._lock:
+            self._remove(user["email"])
+            self._insert(user)
+
+    def remove(self, email: str):
+        """Drop a user from the index if present."""
+        with self._lock:
+            self._remove(email)
+
+    def _insert(self, user: Dict):
+        email = user["email"]
+        row = {
+            "id": user.get("id"),
+            "name": user.get("name"),
+            "email": email,
+            "eloscore": user["eloscore"],
+        }
+        position = self._position(row["eloscore"])
+        bisect.insort(self._buckets.setdefault(position, []), email)
+        self._users[email] = row
+        self._add(position, 1)
+
+    def _remove(self, email: str):
+        row = self._users.pop(email, None)
+        if row is None:
+            return
+        position = self._position(row["eloscore"])
+        bucket = self._buckets[position]
+        del bucket[bisect.bisect_left(bucket, email)]
+        if not bucket:
+            del self._buckets[position]
+        self._add(position, -1)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    def __len__(self) -> int:
+        return len(self._users)
+
+    def __contains__(self, email: str) -> bool:
+        return email in self._users
+
+    def _row(self, email: str, rank: int) -> Dict:
+        return {**self._users[email], "rank": rank}
+
+    def _slice(self, start: int, count: int) -> List[Dict]:
+        """Return `count` users starting at zero-based leaderboard position `start`."""
+        results = []
+        total = len(self._users)
+        while count > 0 and start < total:
+            position = self._find(start + 1)
+            above = self._prefix(position - 1)
+            bucket = self._buckets[position]
+            for email in bucket[start - above:start - above + count]:
+                results.append(self._row(email, above + 1))
+            taken = min(len(bucket) - (start - above), count)
+            start += taken
+            count -= taken
+        return results
+
+    def top(self, limit: int = 100, offset: int = 0) -> List[Dict]:
+        """Return a page of the leaderboard, highest ELO first."""
+        with self._lock:
+            return self._slice(max(offset, 0), max(limit, 0))
+
+    def rank(self, email: str) -> Optional[Dict]:
+        """Return the user's leaderboard row, or None if they are not ranked.
+
+        Users with the same ELO share a rank (1, 2, 2, 4, ...).
+        """
+        with self._lock:
+            if email not in self._users:
+                return None
+            position = self._position(self._users[email]["eloscore"])
+            return self._row(email, self._prefix(position - 1) + 1)
+
+    def around(self, email: str, radius: int = 5) -> List[Dict]:
+        """Return up to `radius` users on each side of the given user."""
+        with self._lock:
+            if email not in self._users:
+                return []
+            position = self._position(self._users[email]["eloscore"])
+            bucket = self._buckets[position]
+            index = self._prefix(position - 1) + bisect.bisect_left(bucket, email)
+            start = max(index - radius, 0)
+            return self._slice(start, index - start + radius + 1)
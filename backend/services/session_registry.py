@@ -0,0 +1,338 @@
+"""
+Registry of live interview sessions.
+
+Each /api/new_chat creates an LLMInterviewAgent that /api/chat looks up by
+thread_id. Sessions are held in an LRU cache bounded by count and idle time,
+so abandoned interviews are dropped instead of accumulating for the life of
+the process. When the registry is full, a new session may displace the least
+recently used one only if that one has been idle for a while; otherwise it is
+refused, so a burst of new interviews cannot cut off ones in progress.
+
+With a SessionStore, every session is also saved to a SQLite file shared by
+all worker processes. A worker that gets a request for an interview it does
+not hold, or holds an older copy of, loads it from the store, so requests
+for one interview can land on any worker and survive a restart.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from utils.lru_cache import LRUCache
+
+MAX_INTERVIEW_SESSIONS = int(os.getenv("MAX_INTERVIEW_SESSIONS", "500"))
+SESSION_IDLE_TTL_SECONDS = int(os.getenv("SESSION_IDLE_TTL_SECONDS", str(2 * 60 * 60)))
+
+# A full registry only displaces a session idle for at least this long
+MIN_IDLE_BEFORE_EVICTION_SECONDS = int(os.getenv("MIN_IDLE_BEFORE_EVICTION_SECONDS", "600"))
+
+
+class SessionRegistry:
+    """Bounded thread_id -> agent map with idle expiry and admission control."""
+
+    def __init__(
+        self,
+        max_sessions: int = MAX_INTERVIEW_SESSIONS,
+        idle_ttl_seconds: Optional[float] = SESSION_IDLE_TTL_SECONDS,
+        min_idle_before_eviction: float = MIN_IDLE_BEFORE_EVICTION_SECONDS,
+        on_release: Optional[Callable[[Hashable, Any], None]] = None,
+        on_evict: Optional[Callable[[Hashable, Any], None]] = None,
+        sizer: Optional[Callable[[Any], int]] = None,
+        store: Optional["SessionStore"] = None,
+        snapshot: Optional[Callable[[Any], Dict[str, Any]]] = None,
+        restore: Optional[Callable[[Dict[str, Any]], Any]] = None
+    ):
+        """
+        Args:
+            max_sessions: Most sessions held at once
+            idle_ttl_seconds: Idle time after which a session is dropped; None never expires
+            min_idle_before_eviction: Idle time a session needs before a new one may displace it
+            on_release: Called with (thread_id, agent) whenever a session is released,
+                evicted or expired, to free state held elsewhere; agent is None for
+                sessions expired from the store that this process never held
+            on_evict: Called with (thread_id, agent) after on_release when a session
+                is evicted or expires instead of being released, to drop state that
+                is otherwise kept until the finished interview is analyzed
+            sizer: Returns the approximate bytes held by an agent, for stats()
+            store: Shared SessionStore; sessions stay in this process only if omitted
+            snapshot: Returns an agent's state for the store
+            restore: Rebuilds an agent from a stored state
+        """
+        if store is not None and (snapshot is None or restore is None):
+            raise ValueError("a session store needs snapshot and restore")
+        self.min_idle_before_eviction = min_idle_before_eviction
+        self.on_release = on_release
+        self.on_evict = on_evict
+        self.sizer = sizer or approximate_size
+        self.store = store
+        self.snapshot = snapshot
+        self.restore = restore
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self._sessions = LRUCache(max_sessions, idle_ttl_seconds, on_evict=self._evicted)
+        # Store version of each session held here
+        self._versions: Dict[Hashable, int] = {}
+        self._lock = threading.Lock()
+        self.admitted = 0
+        self.rejected = 0
+        self.released = 0
+        self.evicted = 0
+        self.logger = logging.getLogger(__name__)
+
+    @property
+    def max_sessions(self) -> int:
+        return self._sessions.max_size
+
+    def _evicted(self, thread_id: Hashable, agent: Any):
+        self.evicted += 1
+        self._versions.pop(thread_id, None)
+        if self.store is not None:
+            # Another worker may still be serving this interview
+            stored = self.store.version(thread_id)
+            if stored is not None and stored[1] < self.min_idle_before_eviction:
+                self.logger.info(f"Interview session {thread_id} dropped here, still active elsewhere")
+                return
+            self.store.delete(thread_id)
+        self.logger.info(f"Interview session {thread_id} evicted")
+        self._notify(thread_id, agent, evicted=True)
+
+    def _notify(self, thread_id: Hashable, agent: Any, evicted: bool = False):
+        for callback in (self.on_release, self.on_evict if evicted else None):
+            if callback:
+                try:
+                    callback(thread_id, agent)
+                except Exception as e:
+                    self.logger.error(f"Error releasing interview session {thread_id}: {str(e)}")
+
+    def _has_room(self) -> bool:
+        self._sessions.expire()
+        if self.store is not None and self.idle_ttl_seconds is not None:
+            for thread_id in self.store.expire(self.idle_ttl_seconds):
+                self._notify(thread_id, self._sessions.pop(thread_id), evicted=True)
+        if len(self._sessions) < self._sessions.max_size:
+            return True
+        oldest = self._sessions.least_recent()
+        return oldest is not None and oldest[2] >= self.min_idle_before_eviction
+
+    def can_admit(self) -> bool:
+        """True if admit() would currently accept a new session."""
+        with self._lock:
+            return self._has_room()
+
+    def admit(self, thread_id: Hashable, agent: Any) -> bool:
+        """Register a new session.
+
+        Expired sessions are dropped first. If the registry is still full, the
+        least recently used session is evicted, provided it has been idle for
+        min_idle_before_eviction; otherwise the new session is refused.
+
+        Returns:
+            True if the session was registered
+        """
+        with self._lock:
+            if not self._has_room():
+                self.rejected += 1
+                return False
+            self._sessions.put(thread_id, agent)
+            self.admitted += 1
+        self.persist(thread_id, agent)
+        return True
+
+    def get(self, thread_id: Hashable) -> Optional[Any]:
+        """Return the agent for a session and mark it active, or None if unknown or expired.
+
+        With a store, a session missing here or changed by another worker is
+        loaded from the store.
+        """
+        agent = self._sessions.get(thread_id)
+        if self.store is None:
+            return agent
+
+        stored = self.store.version(thread_id)
+        if stored is None:
+            # Released or expired by another worker
+            if agent is not None:
+                self._sessions.pop(thread_id)
+                self._versions.pop(thread_id, None)
+            return None
+        if agent is not None and self._versions.get(thread_id) == stored[0]:
+            return agent
+
+        loaded = self.store.load(thread_id)
+        if loaded is None:
+            return None
+        state, version = loaded
+        agent = self.restore(state)
+        self._sessions.put(thread_id, agent)
+        self._versions[thread_id] = version
+        return agent
+
+    def persist(self, thread_id: Hashable, agent: Any):
+        """Save a session's current state to the store, if there is one.
+
+        Call after every change to the agent so other workers see it.
+        """
+        if self.store is not None:
+            self._versions[thread_id] = self.store.save(thread_id, self.snapshot(agent))
+
+    def __contains__(self, thread_id: Hashable) -> bool:
+        return thread_id in self._sessions
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def release(self, thread_id: Hashable) -> bool:
+        """Drop a finished session.
+
+        Returns:
+            True if the session was registered
+        """
+        agent = self._sessions.pop(thread_id)
+        self._versions.pop(thread_id, None)
+        stored = False
+        if self.store is not None:
+            stored = self.store.version(thread_id) is not None
+            self.store.delete(thread_id)
+        if agent is None and not stored:
+            return False
+        self.released += 1
+        self._notify(thread_id, agent)
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        """Return live session count, approximate bytes held and admission counters."""
+        self._sessions.expire()
+        bytes_held = 0
+        for _, agent in self._sessions.items():
+            try:
+                bytes_held += self.sizer(agent)
+            except Exception as e:
+                self.logger.error(f"Error sizing interview session: {str(e)}")
+        return {
+            "live_sessions": len(self._sessions),
+            "stored_sessions": len(self.store) if self.store is not None else None,
+            "max_sessions": self._sessions.max_size,
+            "bytes_held": bytes_held,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "released": self.released,
+            "evicted": self.evicted,
+        }
+
+
+class SessionStore:
+    """Session snapshots in a SQLite file shared by worker processes."""
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: SQLite file holding the sessions
+        """
+        self.path = path
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS interview_sessions (
+                    thread_id TEXT PRIMARY KEY,
+                    state TEXT NOT NULL,
+                    version INTEGER NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS interview_sessions_updated_at_idx ON interview_sessions (updated_at)"
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            yield conn
+        finally:
+            conn.close()
+
+    def save(self, thread_id: str, state: Dict[str, Any]) -> int:
+        """Store a session's state.
+
+        Returns:
+            The session's new version
+        """
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("""
+                INSERT INTO interview_sessions (thread_id, state, version, updated_at)
+                VALUES (?, ?, 1, ?)
+                ON CONFLICT (thread_id) DO UPDATE SET
+                    state = excluded.state,
+                    version = version + 1,
+                    updated_at = excluded.updated_at
+            """, (thread_id, json.dumps(state), time.time()))
+            version = conn.execute(
+                "SELECT version FROM interview_sessions WHERE thread_id = ?", (thread_id,)
+            ).fetchone()[0]
+            conn.execute("COMMIT")
+        return version
+
+    def load(self, thread_id: str) -> Optional[Tuple[Dict[str, Any], int]]:
+        """Return (state, version) for a session, or None if it is not stored."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT state, version FROM interview_sessions WHERE thread_id = ?", (thread_id,)
+            ).fetchone()
+        return None if row is None else (json.loads(row[0]), row[1])
+
+    def version(self, thread_id: str) -> Optional[Tuple[int, float]]:
+        """Return (version, seconds since last save) for a session, or None if it is not stored."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT version, updated_at FROM interview_sessions WHERE thread_id = ?", (thread_id,)
+            ).fetchone()
+        return None if row is None else (row[0], time.time() - row[1])
+
+    def delete(self, thread_id: str):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM interview_sessions WHERE thread_id = ?", (thread_id,))
+
+    def expire(self, idle_seconds: float) -> List[str]:
+        """Delete sessions not saved for idle_seconds.
+
+        Returns:
+            The thread_ids deleted
+        """
+        cutoff = time.time() - idle_seconds
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            expired = [row[0] for row in conn.execute(
+                "SELECT thread_id FROM interview_sessions WHERE updated_at < ?", (cutoff,)
+            )]
+            conn.execute("DELETE FROM interview_sessions WHERE updated_at < ?", (cutoff,))
+            conn.execute("COMMIT")
+        return expired
+
+    def __len__(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT count(*) FROM interview_sessions").fetchone()[0]
+
+
+def approximate_size(obj: Any, _seen: Optional[set] = None) -> int:
+    """Rough deep size of an object in bytes, following containers and instance attributes."""
+    seen = _seen if _seen is not None else set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (str, bytes, bytearray, int, float, bool)) or obj is None:
+        return size
+    if isinstance(obj, dict):
+        return size + sum(approximate_size(k, seen) + approximate_size(v, seen) for k, v in obj.items())
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return size + sum(approximate_size(item, seen) for item in obj)
+    if hasattr(obj, "__dict__"):
+        return size + approximate_size(vars(obj), seen)
+    return size
@@ -0,0 +1,208 @@
+"""
+Translations of the interview's fixed messages.
+
+The welcome and closing messages are templates with a few parameters. Each
+template is translated once per language, with its placeholders kept, and the
+translation is stored in a local SQLite file shared by worker processes and
+served from memory afterwards. Parameters are filled in after translation, so
+every interview in a language reuses the same entry. Only a language seen for
+the first time costs an LLM call.
+"""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import string
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from langchain_core.messages import HumanMessage
+
+from llm.llm_interface import LLMInterface
+from utils.lru_cache import LRUCache
+
+TRANSLATION_CATALOG_PATH = os.getenv("TRANSLATION_CATALOG_PATH", "translation_catalog.db")
+TRANSLATION_MODEL = "gpt-4o-mini"
+
+# A template that could not be translated is not retried for this long;
+# its text is translated directly instead
+FAILED_TRANSLATION_TTL_SECONDS = 60 * 60
+MAX_FAILED_TRANSLATIONS = 1000
+
+TEMPLATES: Dict[str, str] = {
+    "welcome_behavioral": (
+        "Welcome to your behavioral interview for {interview_name} at {company_name}. "
+        "I'll be asking questions about how you've handled various situations in your past experiences. "
+        "Let's start by having you introduce yourself briefly."
+    ),
+    "welcome_technical": (
+        "Welcome to your technical interview for {interview_name} at {company_name}. "
+        "I'll be focusing on your technical expertise based on your background and experience. "
+        "Let's begin with a brief introduction about yourself."
+    ),
+    "welcome": (
+        "Welcome to your interview for {interview_name} at {company_name}. "
+        "I'm excited to learn more about your skills and experience. "
+        "Could you please start by telling me a bit about yourself and your background?"
+    ),
+    "closing": "Thank you for your time. The interview has concluded.",
+}
+
+
+def _fields(template: str) -> Set[str]:
+    """Placeholder names in a template; raises ValueError if its braces are malformed."""
+    return {field for _, field, _, _ in string.Formatter().parse(template) if field is not None}
+
+
+def _source_hash(template: str) -> str:
+    return hashlib.sha256(template.encode("utf-8")).hexdigest()[:16]
+
+
+class TranslationCatalog:
+    """Translations of TEMPLATES, stored by (language, template id)."""
+
+    def __init__(
+        self,
+        path: str = TRANSLATION_CATALOG_PATH,
+        llm_interface: Optional[LLMInterface] = None,
+        templates: Optional[Dict[str, str]] = None
+    ):
+        """
+        Args:
+            path: SQLite file holding the translations
+            llm_interface: Model used for new translations; if omitted, TRANSLATION_MODEL
+                at temperature 0 is created on first use, so stored translations are
+                deterministic
+            templates: Template id to English text; TEMPLATES if omitted
+        """
+        self.path = path
+        self.llm_interface = llm_interface
+        self.templates = templates or TEMPLATES
+        self._memory: Dict[Tuple[str, str], str] = {}
+        # Guards _key_locks only; translations run under their entry's own lock
+        self._lock = threading.Lock()
+        self._key_locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._failed = LRUCache(MAX_FAILED_TRANSLATIONS, FAILED_TRANSLATION_TTL_SECONDS)
+        self._schema_ready = False
+        self.logger = logging.getLogger(__name__)
+
+    @contextmanager
+    def _connect(self):
+        # The file is created on first use, not when the catalog is constructed
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            if not self._schema_ready:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS translations (
+                        language TEXT NOT NULL,
+                        template_id TEXT NOT NULL,
+                        source_hash TEXT NOT NULL,
+                        text TEXT NOT NULL,
+                        created_at REAL NOT NULL,
+                        PRIMARY KEY (language, template_id)
+                    )
+                """)
+                self._schema_ready = True
+            yield conn
+        finally:
+            conn.close()
+
+    def render(self, template_id: str, language: str, **params) -> str:
+        """Return a template in a language with its parameters filled in.
+
+        Falls back to translating the filled-in English text directly if the
+        template cannot be translated with its placeholders intact, and to
+        English if translation fails altogether.
+        """
+        english = self.templates[template_id].format(**params)
+        if not language or language.strip().lower() == "english":
+            return english
+
+        template = self.get(template_id, language)
+        if template is not None:
+            return template.format(**params)
+
+        try:
+            return self._translate(english, language) or english
+        except Exception as e:
+            self.logger.error(f"Error translating {template_id} to {language}: {str(e)}")
+            return english
+
+    def get(self, template_id: str, language: str) -> Optional[str]:
+        """Return a template's translation, translating and storing it if needed.
+
+        Returns:
+            The translated template with its placeholders, or None if it could
+            not be translated with them intact
+        """
+        key = (language.strip().lower(), template_id)
+        failed_key = (*key, _source_hash(self.templates[template_id]))
+        template = self._memory.get(key)
+        if template is not None or failed_key in self._failed:
+            return template
+
+        # One translation per entry, even when sessions start together; other
+        # entries are not held up while it runs
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            template = self._memory.get(key)
+            if template is not None or failed_key in self._failed:
+                return template
+            template = self._load(key) or self._fill(key, language.strip())
+            if template is None:
+                self._failed.put(failed_key, True)
+            else:
+                self._memory[key] = template
+        return template
+
+    def warm(self, languages: Iterable[str]):
+        """Translate every template for the given languages ahead of use."""
+        for language in languages:
+            for template_id in self.templates:
+                self.get(template_id, language)
+
+    def _load(self, key: Tuple[str, str]) -> Optional[str]:
+        language, template_id = key
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT source_hash, text FROM translations WHERE language = ? AND template_id = ?",
+                (language, template_id)
+            ).fetchone()
+        # An entry made from an older version of the template is stale
+        if row is None or row[0] != _source_hash(self.templates[template_id]):
+            return None
+        return row[1]
+
+    def _fill(self, key: Tuple[str, str], language: str) -> Optional[str]:
+        source = self.templates[key[1]]
+        try:
+            template = self._translate(source, language, keep_placeholders=_fields(source))
+            if not template or _fields(template) != _fields(source):
+                self.logger.info(f"Translation of {key[1]} to {language} lost its placeholders")
+                return None
+        except Exception as e:
+            self.logger.error(f"Error translating {key[1]} to {language}: {str(e)}")
+            return None
+
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO translations (language, template_id, source_hash, text, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (*key, _source_hash(source), template, time.time())
+            )
+        return template
+
+    def _translate(self, text: str, language: str, keep_placeholders: Set[str] = frozenset()) -> str:
+        if self.llm_interface is None:
+            self.llm_interface = LLMInterface(model_name=TRANSLATION_MODEL, temperature=0)
+        prompt = f"Translate the following text to {language}. Reply with the translation only."
+        if keep_placeholders:
+            names = ", ".join("{" + name + "}" for name in sorted(keep_placeholders))
+            prompt += f" Keep these placeholders exactly as written, untranslated: {names}."
+        response = self.llm_interface.invoke([HumanMessage(content=f"{prompt}\n\n{text}")])
+        return response[-1].content.strip()
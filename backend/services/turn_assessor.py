@@ -0,0 +1,177 @@
+"""
+Per-turn interview assessment.
+
+When enabled, LLMInterviewAgent.next_question hands every answer to a
+TurnAssessor, which scores it on a background thread while the interview
+continues. At the end ChatHistoryService.save_analysis aggregates the per-turn
+results instead of analyzing the whole transcript at once, so final feedback
+latency no longer grows with interview length and LLM load is spread over the
+session.
+"""
+
+import logging
+import os
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional, Tuple
+
+from openai import OpenAI
+
+from services.chat_history_service import (
+    ANALYSIS_CALL_TIMEOUT,
+    DEFAULT_STRENGTHS,
+    DEFAULT_WEAKNESSES,
+    ScoreRubrics,
+)
+from utils.lru_cache import LRUCache
+
+TURN_ASSESSMENT_ENABLED = os.getenv("TURN_ASSESSMENT", "false").lower() == "true"
+TURN_ASSESSMENT_MODEL = "gpt-4o-mini"
+TURN_ASSESSMENT_WORKERS = 4
+
+# Seconds save_analysis waits for assessments still in flight
+TURN_ASSESSMENT_WAIT_SECONDS = 15
+
+# Interviews whose assessments are kept in memory, and for how long
+MAX_TRACKED_INTERVIEWS = 1000
+TRACKED_INTERVIEW_TTL_SECONDS = 4 * 60 * 60
+
+MAX_FEEDBACK_ITEMS = 5
+MAX_WEAK_QUESTIONS = 3
+
+
+class TurnAssessment(ScoreRubrics):
+    strength: str
+    improvement: str
+    weak: bool
+
+
+class _Turn:
+    def __init__(self, question: str, future: Future):
+        self.question = question
+        self.future = future
+
+
+class TurnAssessor:
+    """Scores interview answers in the background and aggregates them."""
+
+    def __init__(self, workers: int = TURN_ASSESSMENT_WORKERS, client: Optional[OpenAI] = None):
+        """
+        Args:
+            workers: Assessments run at the same time
+            client: OpenAI client; created on first use if omitted
+        """
+        self.client = client
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="turn-assessor")
+        self._turns = LRUCache(MAX_TRACKED_INTERVIEWS, TRACKED_INTERVIEW_TTL_SECONDS)
+        self.logger = logging.getLogger(__name__)
+
+    def submit(self, thread_id: str, question: str, answer: str):
+        """Queue one answer for assessment.
+
+        Args:
+            thread_id: Interview thread the answer belongs to
+            question: The question the candidate was answering
+            answer: The candidate's answer
+        """
+        turns = self._turns.get(thread_id)
+        if turns is None:
+            turns = []
+            self._turns.put(thread_id, turns)
+        turns.append(_Turn(question, self._executor.submit(self._assess, question, answer)))
+
+    def _assess(self, question: str, answer: str) -> TurnAssessment:
+        if self.client is None:
+            self.client = OpenAI()
+        response = self.client.beta.chat.completions.parse(
+            model=TURN_ASSESSMENT_MODEL,
+            response_format=TurnAssessment,
+            messages=[
+                {"role": "system", "content": """
+                You are an expert interview analyzer. Assess the candidate's answer to a single interview question.
+
+                Score it (0.0-1.0) on technical, communication, confidence, problem_solving, resume_strength
+                and leadership, judging only what this answer shows.
+                strength: One specific strength shown in the answer.
+                improvement: One specific way the answer could be better.
+                weak: true if the answer was weak or insufficient.
+                """},
+                {"role": "user", "content": f"Question: {question}\n\nAnswer: {answer}"}
+            ],
+            timeout=ANALYSIS_CALL_TIMEOUT
+        )
+        return response.choices[0].message.parsed
+
+    def discard(self, thread_id: str):
+        """Forget an interview's assessments."""
+        self._turns.pop(thread_id)
+
+    def aggregate(self, thread_id: str, expected_turns: int) -> Optional[Dict[str, Any]]:
+        """Combine an interview's per-turn assessments into a full analysis.
+
+        Waits up to TURN_ASSESSMENT_WAIT_SECONDS for assessments still running.
+
+        Args:
+            thread_id: Interview thread
+            expected_turns: Number of candidate answers in the transcript
+
+        Returns:
+            Results in the shape of ChatHistoryService._run_analysis_calls, or
+            None if any answer is missing an assessment
+        """
+        turns: List[_Turn] = self._turns.get(thread_id) or []
+        if expected_turns == 0 or len(turns) < expected_turns:
+            return None
+        turns = turns[:expected_turns]
+
+        wait([turn.future for turn in turns], timeout=TURN_ASSESSMENT_WAIT_SECONDS)
+        assessed = []
+        for turn in turns:
+            if not turn.future.done() or turn.future.exception():
+                self.logger.info(f"Turn assessment missing for thread {thread_id}; using full analysis")
+                return None
+            assessed.append((turn.question, turn.future.result()))
+
+        return aggregate_turns(assessed)
+
+
+def aggregate_turns(assessed: List[Tuple[str, TurnAssessment]]) -> Dict[str, Any]:
+    """Average per-turn scores and collect strengths, improvements and weak questions.
+
+    Args:
+        assessed: (question, TurnAssessment) pairs in interview order
+
+    Returns:
+        Results in the shape of ChatHistoryService._run_analysis_calls
+    """
+    fields = list(ScoreRubrics.model_fields)
+    scores = ScoreRubrics(**{
+        field: sum(getattr(assessment, field) for _, assessment in assessed) / len(assessed)
+        for field in fields
+    })
+
+    def overall(pair) -> float:
+        return sum(getattr(pair[1], field) for field in fields) / len(fields)
+
+    best_first = sorted(assessed, key=overall, reverse=True)
+    strengths = list(dict.fromkeys(a.strength for _, a in best_first if a.strength))[:MAX_FEEDBACK_ITEMS]
+    weaknesses = list(dict.fromkeys(a.improvement for _, a in reversed(best_first) if a.improvement))[:MAX_FEEDBACK_ITEMS]
+    weak_questions = [
+        {"question": question}
+        for question, assessment in reversed(best_first)
+        if assessment.weak and question
+    ][:MAX_WEAK_QUESTIONS]
+
+    average = sum(overall(pair) for pair in assessed) / len(assessed)
+    feedback = f"Across {len(assessed)} answers the candidate scored {average:.0%} on average."
+    if strengths:
+        feedback += f" Strongest point: {strengths[0]}"
+    if weaknesses:
+        feedback += f" Main area to work on: {weaknesses[0]}"
+
+    return {
+        "scores": scores,
+        "strengths": strengths or list(DEFAULT_STRENGTHS),
+        "weaknesses": weaknesses or list(DEFAULT_WEAKNESSES),
+        "specific_feedback": feedback[:500],
+        "weak_questions": weak_questions,
+    }
@@ -0,0 +1,153 @@
+"""
+Unit coverage for AnalysisQueue
+───────────────────────────────
+• enqueue / run_once – job is persisted, run with its payload, marked done
+• retries            – failed runs are retried with backoff, then marked failed
+• requeue            – enqueuing a running job runs it again afterwards
+• leases             – a worker whose lease expired cannot record its result
+• persistence        – a new queue on the same file sees earlier jobs; the
+                       file is only created on first use
+"""
+import os
+import sys
+from unittest.mock import MagicMock
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from services import analysis_queue
+from services.analysis_queue import AnalysisQueue
+
+MESSAGES = [{"sender": "ai", "text": "Q?"}, {"sender": "user", "text": "A"},
+            {"sender": "ai", "text": "Thanks"}]
+
+
+@pytest.fixture
+def queue_path(tmp_path):
+    return str(tmp_path / "queue.db")
+
+
+def test_enqueue_and_run(queue_path):
+    analyze = MagicMock(return_value={"success": True})
+    queue = AnalysisQueue(analyze, path=queue_path)
+
+    job = queue.enqueue(7, "u@x", MESSAGES, "Mock", "cfg-1", session_id="thread-7")
+    assert job["status"] == "queued"
+    assert queue.is_pending(7)
+
+    assert queue.run_once() is True
+    analyze.assert_called_once_with(7, "u@x", MESSAGES, "Mock", "cfg-1", session_id="thread-7")
+    assert queue.status(7)["status"] == "done"
+    assert not queue.is_pending(7)
+    assert queue.run_once() is False
+
+
+def test_failed_job_retries_then_fails(queue_path, monkeypatch):
+    monkeypatch.setattr(analysis_queue, "RETRY_DELAY_SECONDS", 0)
+    analyze = MagicMock(return_value={"success": False, "error": "LLM down"})
+    queue = AnalysisQueue(analyze, path=queue_path, max_attempts=2)
+    queue.enqueue(1, "u@x", MESSAGES)
+
+    queue.run_once()
+    job = queue.status(1)
+    assert (job["status"], job["attempts"], job["error"]) == ("queued", 1, "LLM down")
+
+    analyze.side_effect = Exception("timeout")
+    queue.run_once()
+    job = queue.status(1)
+    assert (job["status"], job["attempts"], job["error"]) == ("failed", 2, "timeout")
+    assert queue.run_once() is False
+
+
+def test_retry_waits_for_backoff(queue_path):
+    queue = AnalysisQueue(MagicMock(return_value={"success": False}), path=queue_path)
+    queue.enqueue(1, "u@x", MESSAGES)
+    queue.run_once()
+    assert queue.status(1)["status"] == "queued"
+    assert queue.run_once() is False   # not available again until the delay passes
+
+
+def test_enqueue_while_running_runs_again(queue_path):
+    queue = None
+    calls = []
+
+    def analyze(interview_id, user_email, messages, *args, **kwargs):
+        calls.append(len(messages))
+        if len(calls) == 1:
+            queue.enqueue(interview_id, user_email, messages + [{"sender": "user", "text": "more"}])
+            assert queue.status(interview_id)["status"] == "running"
+        return {"success": True}
+
+    queue = AnalysisQueue(analyze, path=queue_path)
+    queue.enqueue(3, "u@x", MESSAGES)
+    queue.run_once()
+    assert queue.status(3)["status"] == "queued"
+    queue.run_once()
+    assert calls == [3, 4]
+    assert queue.status(3)["status"] == "done"
+
+
+def test_jobs_survive_restart(queue_path):
+    AnalysisQueue(MagicMock(), path=queue_path).enqueue(9, "u@x", MESSAGES)
+
+    analyze = MagicMock(return_value={"success": True})
+    restarted = AnalysisQueue(analyze, path=queue_path)
+    assert restarted.status(9)["status"] == "queued"
+    restarted.run_once()
+    analyze.assert_called_once()
+
+
+def test_worker_threads_drain_queue(queue_path):
+    import threading
+    done = threading.Event()
+    queue = AnalysisQueue(lambda *a, **k: done.set() or {"success": True}, path=queue_path, workers=1)
+    queue.start()
+    try:
+        queue.enqueue(4, "u@x", MESSAGES)
+        assert done.wait(5)
+    finally:
+        queue.stop()
+
+
+def test_queue_file_is_created_on_first_use(queue_path):
+    queue = AnalysisQueue(MagicMock(), path=queue_path)
+    assert not os.path.exists(queue_path)
+    assert queue.status(1) is None
+    assert os.path.exists(queue_path)
+
+
+def test_expired_claim_cannot_overwrite_newer_run(queue_path, monkeypatch):
+    queue = AnalysisQueue(MagicMock(), path=queue_path)
+    queue.enqueue(5, "u@x", MESSAGES)
+    stale = queue._claim()
+
+    # The lease expires and a second worker takes the job over
+    monkeypatch.setattr(analysis_queue, "LEASE_SECONDS", -1)
+    current = queue._claim()
+    assert current["interview_id"] == 5 and current["claim_token"] != stale["claim_token"]
+
+    assert queue._finish(stale, "timeout") is False
+    assert queue.status(5)["status"] == "running"
+    assert queue._finish(current, None) is True
+    assert queue.status(5)["status"] == "done"
+
+
+def test_old_queue_file_gains_claim_token(queue_path):
+    import sqlite3
+    conn = sqlite3.connect(queue_path)
+    conn.execute("""
+        CREATE TABLE analysis_jobs (
+            interview_id INTEGER PRIMARY KEY, user_email TEXT NOT NULL, payload TEXT NOT NULL,
+            status TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, requeued INTEGER NOT NULL DEFAULT 0,
+            error TEXT, available_at REAL NOT NULL, claimed_at REAL,
+            created_at REAL NOT NULL, updated_at REAL NOT NULL
+        )
+    """)
+    conn.commit()
+    conn.close()
+
+    analyze = MagicMock(return_value={"success": True})
+    queue = AnalysisQueue(analyze, path=queue_path)
+    queue.enqueue(2, "u@x", MESSAGES)
+    queue.run_once()
+    assert queue.status(2)["status"] == "done"
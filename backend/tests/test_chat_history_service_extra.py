@@ -1,9 +1,9 @@
 """
 Extra coverage for ChatHistoryService
 ─────────────────────────────────────
-• save_chat_history – audio_metadata branch & update-when-longer path
-• get_chat_history  – empty-string log ➜ returns []
-• save_analysis     – weak-question insert/update, JSON-parse fallback
+• save_chat_history – append RPC, audio_metadata branch & append-when-longer fallback
+• get_chat_history  – empty-string log ➜ returns []; raw JSON and decoded record reads
+• save_analysis     – batched weak-question upsert, JSON-parse fallback
 """
 
 import json
@@ -33,10 +33,11 @@ def svc(mock_supabase):
 
 # ---------- save_chat_history: audio metadata + update branch -------------------
 def test_save_chat_history_update_longer(svc, mock_supabase):
-    """Existing record has 2 msgs – new list has 4, so we update."""
+    """Existing record has 2 msgs (legacy JSON string) – new list has 4, so the last 2 are appended."""
+    mock_supabase.rpc.side_effect = Exception("function not found")
     old_log = json.dumps([{"sender": "user"}, {"sender": "ai"}])
     mock_supabase.table.return_value.select.return_value.eq.return_value \
-        .execute.return_value.data = [{"id": 55, "log": old_log}]
+        .execute.return_value.data = [{"id": 55, "log": old_log, "message_count": 2}]
 
     # pretend .update succeeds
     mock_supabase.table.return_value.update.return_value.eq.return_value \
@@ -44,19 +45,26 @@ def test_save_chat_history_update_longer(svc, mock_supabase):
 
     # include audioUrl + storagePath to hit audio_metadata branch
     new_msgs = [
-        {"sender": "user", "text": "hi", "audioUrl": "http://...", "storagePath": "s3://a"},
+        {"sender": "user", "text": "hi"},
         {"sender": "ai",   "text": "hello"},
-        {"sender": "user", "text": "more"},
+        {"sender": "user", "text": "more", "audioUrl": "http://...", "storagePath": "s3://a"},
         {"sender": "ai",   "text": "ok"},
     ]
     out = svc.save_chat_history("tid", "me@mail.com", new_msgs)
 
-    assert out == {"success": True, "interview_id": 55}
+    assert {k: out[k] for k in ("success", "interview_id", "message_count", "appended")} == \
+        {"success": True, "interview_id": 55, "message_count": 4, "appended": 2}
+    assert out["data"]["thread_id"] == "tid"
     # update must be called (not insert)
     mock_supabase.table.return_value.update.assert_called_once()
-    # audio_metadata stored as JSON string with length 1
-    saved_json = mock_supabase.table.return_value.update.call_args[0][0]["audio_metadata"]
-    assert json.loads(saved_json)[0]["storagePath"] == "s3://a"
+    saved = mock_supabase.table.return_value.update.call_args[0][0]
+    assert saved["log"][2:] == [
+        {"text": "more", "sender": "user", "audioUrl": "http://...", "storagePath": "s3://a"},
+        {"text": "ok", "sender": "ai"},
+    ]
+    assert saved["message_count"] == 4
+    # audio fields travel with their message; audio_metadata is no longer written
+    assert "audio_metadata" not in saved
 
 
 # ---------------- get_chat_history: empty string log ----------------------------
@@ -67,6 +75,47 @@ def test_get_chat_history_empty_string(svc, mock_supabase):
     assert svc.get_chat_history("tid") == []
 
 
+def test_stream_chat_history_json_passes_bytes_through(svc, mock_supabase):
+    chunks = [b'{"id":5,"thread_id":"tid",', b'"messages":[{"text":"Hi","sender":"ai"}]}']
+    session = mock_supabase.postgrest.session
+    response = MagicMock(status_code=200)
+    response.iter_bytes.return_value = iter(chunks)
+    session.send.return_value = response
+
+    body = svc.stream_chat_history_json("thread_id", "tid")
+
+    assert session.send.call_args.kwargs["stream"] is True
+    kwargs = session.build_request.call_args.kwargs
+    assert kwargs["params"]["thread_id"] == "eq.tid"
+    assert kwargs["params"]["select"] == "id,thread_id,messages:log"
+    assert kwargs["headers"]["Accept"] == "application/vnd.pgrst.object+json"
+    # nothing is read until the body is consumed
+    response.iter_bytes.assert_not_called()
+    assert list(body) == chunks
+    response.close.assert_called_once()
+
+
+def test_stream_chat_history_json_not_found(svc, mock_supabase):
+    response = MagicMock(status_code=406)
+    mock_supabase.postgrest.session.send.return_value = response
+    assert svc.stream_chat_history_json("id", 404) is None
+    response.close.assert_called_once()
+
+
+def test_get_chat_history_record_merges_legacy_audio(svc, mock_supabase):
+    mock_supabase.table.return_value.select.return_value.eq.return_value \
+        .execute.return_value.data = [{
+            "id": 5, "thread_id": "tid",
+            "log": json.dumps([{"text": "Hi", "sender": "ai"}, {"text": "Yo", "sender": "user"}]),
+            "audio_metadata": json.dumps([{"audioUrl": "u1", "storagePath": "p1"}])}]
+
+    record = svc.get_chat_history_record("thread_id", "tid")
+
+    assert record == {"id": 5, "thread_id": "tid", "messages": [
+        {"text": "Hi", "sender": "ai", "audioUrl": "u1", "storagePath": "p1"},
+        {"text": "Yo", "sender": "user"}]}
+
+
 # ---------- save_analysis: weak-question insert vs update & fallback ------------
 
 @pytest.fixture
@@ -85,12 +134,30 @@ def _make_choice(content):
     return choice
 
 
-def test_save_analysis_weak_q_insert_and_update(
+def _by_prompt(strengths, weaknesses, feedback, weak_questions):
+    """side_effect for chat.completions.create that answers by prompt, since
+    save_analysis runs its LLM calls concurrently and their order varies."""
+    def create(*args, messages, **kwargs):
+        system = messages[0]["content"]
+        if "key strengths" in system:
+            content = strengths
+        elif "areas for improvement" in system:
+            content = weaknesses
+        elif "overall assessment" in system:
+            content = feedback
+        else:
+            content = weak_questions
+        return MagicMock(choices=[_make_choice(content)])
+    return create
+
+
+def test_save_analysis_weak_q_single_upsert(
         svc, mock_supabase, patched_openai, monkeypatch):
     """
-    • first weak-questions pass returns new Q → insert
-    • second call (same Q) triggers update path
+    weak questions are written with one upsert_weak_questions RPC,
+    de-duplicated on normalized text
     """
+    svc.elo_service = MagicMock()
     # --- mock the analysis “scores” call -------------
     main_scores = MagicMock()
     main_scores.parsed = MagicMock(
@@ -100,40 +167,44 @@ def test_save_analysis_weak_q_insert_and_update(
         choices=[MagicMock(message=main_scores)])
 
     # --- strengths / weaknesses simple valid JSON ----
-    patched_openai.chat.completions.create.side_effect = [
-        MagicMock(choices=[_make_choice(json.dumps(["s1", "s2"]))]),  # strengths
-        MagicMock(choices=[_make_choice(json.dumps(["w1"]))]),        # weaknesses
-        MagicMock(choices=[_make_choice("Good job")]),                # specific feedback
-        # weak-question list
-        MagicMock(choices=[_make_choice(json.dumps([
-            {"question": "Why our company?"}
-        ]))])
-    ]
-
-    # First call – table 'interview_questions' empty -> insert
-    mock_supabase.table.return_value.select.return_value.eq.return_value \
-        .eq.return_value.eq.return_value.execute.return_value.data = []
-    mock_supabase.table.return_value.insert.return_value.execute.return_value.data = [{"id": 1}]
+    patched_openai.chat.completions.create.side_effect = _by_prompt(
+        json.dumps(["s1", "s2"]),                          # strengths
+        json.dumps(["w1"]),                                # weaknesses
+        "Good job",                                        # specific feedback
+        json.dumps([{"question": "Why our company?"},      # weak-question list
+                    {"question": "why  our Company? "},
+                    {"question": "Biggest failure?"}]),
+    )
 
     messages = [{"sender": "user", "text": "A"}, {"sender": "ai", "text": "B"},
                 {"sender": "user", "text": "C"}]
 
     ok = svc.save_analysis(1, "u@mail.com", messages, session_id="S")
     assert ok["success"] is True
-    mock_supabase.table.return_value.insert.assert_called()          # weak-question insert
+    mock_supabase.rpc.assert_any_call("upsert_weak_questions", {
+        "p_email": "u@mail.com", "p_session_id": "S",
+        "p_questions": ["Why our company?", "Biggest failure?"]})
+    mock_supabase.table.return_value.insert.assert_not_called()
 
-    # Second call – same weak question exists → update path
+
+def test_save_weak_questions_fallback_batches_writes(svc, mock_supabase):
+    """without the RPC: one read, one bulk update, one bulk insert"""
+    mock_supabase.rpc.side_effect = Exception("function not found")
     mock_supabase.table.return_value.select.return_value.eq.return_value \
-        .eq.return_value.eq.return_value.execute.return_value.data = [{"id": 99}]
-    patched_openai.chat.completions.create.side_effect = [
-        MagicMock(choices=[_make_choice(json.dumps(["s1"]))]),
-        MagicMock(choices=[_make_choice(json.dumps(["w1"]))]),
-        MagicMock(choices=[_make_choice("Fine")]),
-        MagicMock(choices=[_make_choice(json.dumps([{"question": "Why our company?"}]))]),
-    ]
-    ok2 = svc.save_analysis(2, "u@mail.com", messages, session_id="S")
-    assert ok2["success"] is True
-    mock_supabase.table.return_value.update.assert_called()          # weak-question update
+        .eq.return_value.execute.return_value.data = [
+            {"id": 99, "question_text": "Why our  company?"}]
+
+    svc._save_weak_questions("u@mail.com", "S", [
+        {"question": "why our company?"}, {"question": "Q1?"},
+        {"question": "Q2?"}, {"question": "  "}])
+
+    table = mock_supabase.table.return_value
+    table.update.assert_called_once_with({"is_weak": True})
+    table.update.return_value.in_.assert_called_once_with("id", [99])
+    table.insert.assert_called_once()
+    rows = table.insert.call_args[0][0]
+    assert [r["question_text"] for r in rows] == ["Q1?", "Q2?"]
+    assert all(r["is_weak"] and r["session_id"] == "S" for r in rows)
 
 
 def test_save_analysis_strengths_parse_fallback(
@@ -150,12 +221,12 @@ def test_save_analysis_strengths_parse_fallback(
         choices=[MagicMock(message=main_scores)])
 
     # strengths returns plain text -> JSONDecodeError path
-    patched_openai.chat.completions.create.side_effect = [
-        MagicMock(choices=[_make_choice("plain text")]),  # strengths bad
-        MagicMock(choices=[_make_choice(json.dumps(["w"]))]),  # weaknesses ok
-        MagicMock(choices=[_make_choice("feedback")]),    # specific
-        MagicMock(choices=[_make_choice("[]")])           # weak questions
-    ]
+    patched_openai.chat.completions.create.side_effect = _by_prompt(
+        "plain text",          # strengths bad
+        json.dumps(["w"]),     # weaknesses ok
+        "feedback",            # specific
+        "[]",                  # weak questions
+    )
 
     mock_supabase.table.return_value.upsert.return_value.execute.return_value.data = [{"ok": 1}]
     messages = [{"sender": "user", "text": "A"}, {"sender": "ai", "text": "B"},
@@ -173,6 +244,7 @@ def test_save_chat_history_welcome_skip(svc):
 # --- save_chat_history existing longer → skip update -------------------------
 
 def test_save_chat_history_existing_longer_skip(svc, mock_supabase):
+    mock_supabase.rpc.side_effect = Exception("function not found")
     existing = json.dumps([1, 2, 3, 4])
     mock_supabase.table.return_value.select.return_value.eq.return_value.execute.return_value.data = [
         {"id": 7, "log": existing}
@@ -187,6 +259,7 @@ def test_save_chat_history_existing_longer_skip(svc, mock_supabase):
 # --- save_chat_history new insert path --------------------------------------
 
 def test_save_chat_history_insert_new(svc, mock_supabase):
+    mock_supabase.rpc.side_effect = Exception("function not found")
     # select returns empty ⇒ new row
     mock_supabase.table.return_value.select.return_value.eq.return_value.execute.return_value.data = []
     # mock insert returning id=99
@@ -195,7 +268,9 @@ def test_save_chat_history_insert_new(svc, mock_supabase):
     ]
     msgs = [{"sender": "user", "text": "hi"}, {"sender": "ai", "text": "hello"}]
     res = svc.save_chat_history("t3", "m@x", msgs)
-    assert res == {"success": True, "interview_id": 99}
+    assert res["interview_id"] == 99
+    assert (res["message_count"], res["appended"]) == (2, 2)
+    assert res["data"]["config_name"] == "Interview Session"
     assert mock_supabase.table.return_value.insert.called
 
 
@@ -228,3 +303,158 @@ def test_save_analysis_skip_too_few_msgs(svc, patched_openai):
 
 # --- save_analysis weak‑questions bad JSON handled --------------------------
 
+
+
+# --- analysis calls run concurrently, slow calls fall back ------------------
+
+def test_analysis_calls_run_concurrently(svc, monkeypatch):
+    import threading
+    barrier = threading.Barrier(5, timeout=5)
+
+    def call(result):
+        def run(*_args):
+            barrier.wait()      # only passes once all five calls are in flight
+            return result
+        return run
+
+    monkeypatch.setattr(svc, "_analyze_scores", call("scores"))
+    monkeypatch.setattr(svc, "_analyze_strengths", call(["s"]))
+    monkeypatch.setattr(svc, "_analyze_weaknesses", call(["w"]))
+    monkeypatch.setattr(svc, "_analyze_specific_feedback", call("fb"))
+    monkeypatch.setattr(svc, "_analyze_weak_questions", call([]))
+
+    out = svc._run_analysis_calls(MagicMock(), "[]", "cfg")
+    assert out == {"scores": "scores", "strengths": ["s"], "weaknesses": ["w"],
+                   "specific_feedback": "fb", "weak_questions": []}
+
+
+def test_analysis_call_timeout_uses_fallback(svc, monkeypatch):
+    import threading
+    from services import chat_history_service as mod
+    monkeypatch.setattr(mod, "ANALYSIS_CALL_TIMEOUT", 0.2)
+    release = threading.Event()
+
+    def slow(*_args):
+        release.wait(5)
+        return ["late"]
+
+    monkeypatch.setattr(svc, "_analyze_scores", lambda *_a: "scores")
+    monkeypatch.setattr(svc, "_analyze_strengths", slow)
+    monkeypatch.setattr(svc, "_analyze_weaknesses", lambda *_a: ["w"])
+    monkeypatch.setattr(svc, "_analyze_specific_feedback", lambda *_a: "fb")
+    monkeypatch.setattr(svc, "_analyze_weak_questions", lambda *_a: [])
+
+    try:
+        out = svc._run_analysis_calls(MagicMock(), "[]", "cfg")
+    finally:
+        release.set()
+    assert out["strengths"] == mod.DEFAULT_STRENGTHS
+    assert out["weaknesses"] == ["w"]
+
+    # a slow score call fails the analysis rather than falling back
+    monkeypatch.setattr(svc, "_analyze_scores", slow)
+    release.clear()
+    try:
+        with pytest.raises(TimeoutError):
+            svc._run_analysis_calls(MagicMock(), "[]", "cfg")
+    finally:
+        release.set()
+
+
+# --- fused analysis mode ----------------------------------------------------
+
+@pytest.fixture
+def fused_svc(mock_supabase):
+    with patch("services.chat_history_service.create_client",
+               return_value=mock_supabase):
+        from services.chat_history_service import ChatHistoryService
+        return ChatHistoryService("url", "key", elo_service=MagicMock(), analysis_mode="fused")
+
+
+def _messages():
+    return [{"sender": "ai", "text": "Q1?"}, {"sender": "user", "text": "A1"},
+            {"sender": "ai", "text": "Q2?"}]
+
+
+def test_fused_analysis_makes_one_call(fused_svc, mock_supabase, patched_openai):
+    from services.chat_history_service import InterviewAnalysis, WeakQuestion
+    parsed = InterviewAnalysis(
+        technical=.8, communication=.7, confidence=.6, problem_solving=.5,
+        resume_strength=.4, leadership=.3, strengths=["s1"], areas_for_improvement=["w1"],
+        specific_feedback="Solid", weak_questions=[WeakQuestion(question="Q2?")])
+    patched_openai.beta.chat.completions.parse.return_value = MagicMock(
+        choices=[MagicMock(message=MagicMock(parsed=parsed))])
+    mock_supabase.table.return_value.select.return_value.eq.return_value \
+        .execute.return_value.data = [{"first_name": "A", "last_name": "B"}]
+
+    res = fused_svc.save_analysis(5, "u@x", _messages())
+
+    assert res["success"] is True
+    patched_openai.beta.chat.completions.parse.assert_called_once()
+    assert patched_openai.beta.chat.completions.parse.call_args.kwargs["response_format"] is InterviewAnalysis
+    patched_openai.chat.completions.create.assert_not_called()
+    saved = mock_supabase.table.return_value.upsert.call_args[0][0]
+    assert saved["technical_accuracy_score"] == .8
+    assert json.loads(saved["strengths"]) == ["s1"]
+    assert saved["specific_feedback"] == "Solid"
+
+
+def test_fused_analysis_failure_falls_back_to_parallel(fused_svc, patched_openai, monkeypatch):
+    patched_openai.beta.chat.completions.parse.side_effect = Exception("bad schema")
+    parallel = MagicMock(side_effect=Exception("stop here"))
+    monkeypatch.setattr(fused_svc, "_run_analysis_calls", parallel)
+
+    res = fused_svc.save_analysis(6, "u@x", _messages())
+
+    parallel.assert_called_once()
+    assert res["success"] is False
+
+
+def test_invalid_analysis_mode_rejected(mock_supabase):
+    with patch("services.chat_history_service.create_client",
+               return_value=mock_supabase):
+        from services.chat_history_service import ChatHistoryService
+        with pytest.raises(ValueError):
+            ChatHistoryService("url", "key", analysis_mode="triple")
+
+
+# --- analysis cache ---------------------------------------------------------
+
+def test_conversation_hash_ignores_formatting():
+    from services.chat_history_service import conversation_hash
+    a = [{"role": "assistant", "content": "Tell me  about yourself."},
+         {"role": "user", "content": "I build\nAPIs "}]
+    b = [{"role": "assistant", "content": "Tell me about yourself."},
+         {"role": "user", "content": ""},
+         {"role": "user", "content": "I build APIs"}]
+    assert conversation_hash(a, "Mock") == conversation_hash(b, "Mock")
+    assert conversation_hash(a, "Mock") != conversation_hash(a, "Other")
+
+
+def test_unchanged_transcript_reuses_analysis(fused_svc, mock_supabase, patched_openai):
+    from services.chat_history_service import InterviewAnalysis
+    parsed = InterviewAnalysis(
+        technical=.5, communication=.5, confidence=.5, problem_solving=.5,
+        resume_strength=.5, leadership=.5, strengths=["s"], areas_for_improvement=["w"],
+        specific_feedback="ok", weak_questions=[])
+    patched_openai.beta.chat.completions.parse.return_value = MagicMock(
+        choices=[MagicMock(message=MagicMock(parsed=parsed))])
+    mock_supabase.table.return_value.select.return_value.eq.return_value \
+        .execute.return_value.data = [{"first_name": "A", "last_name": "B"}]
+
+    from services import chat_history_service as mod
+    with patch.object(mod, "render_transcript", wraps=mod.render_transcript) as render:
+        assert fused_svc.save_analysis(8, "u@x", _messages()) == {"success": True, "cached": False}
+        # same interview, same transcript: nothing to redo
+        assert fused_svc.save_analysis(8, "u@x", _messages()) == {"success": True, "cached": True}
+        assert fused_svc.elo_service.update_elo_score.call_count == 1
+        # identical transcript for another interview: cached analysis, fresh writes
+        assert fused_svc.save_analysis(9, "u@x", _messages()) == {"success": True, "cached": True}
+        assert fused_svc.elo_service.update_elo_score.call_count == 2
+
+    # the transcript is only rendered for the miss
+    assert render.call_count == 1
+
+    patched_openai.beta.chat.completions.parse.assert_called_once()
+    stats = fused_svc.analysis_cache.stats()
+    assert (stats["hits"], stats["misses"]) == (2, 1)
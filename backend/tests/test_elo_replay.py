@@ -0,0 +1,159 @@
+"""
+Unit coverage for EloReplayEngine
+─────────────────────────────────
+• run()         – pages in order, bulk writes scores + history, removes checkpoint
+• history       – only replayed users' history is cleared; a re-applied page
+                  upserts on interview_id instead of duplicating rows
+• determinism   – paging size does not change the final ratings
+• checkpointing – resume picks up ratings/cursor from the journal, which holds
+                  only each page's changes; constant changes are rejected
+• clean state   – users without interviews are reset to BASE_ELO
+"""
+import json
+import os
+import sys
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from services import elo_replay
+from services.elo_replay import EloReplayEngine
+
+
+def _interviews():
+    rows = []
+    for i in range(12):
+        rows.append({
+            "interview_id": i + 1,
+            "user_email": f"u{i % 3}@x",
+            "created_at": f"2025-03-{i + 1:02d}T10:00:00",
+            **{c: (90 if i % 2 else 10) for c in elo_replay.SCORE_COLUMNS},
+        })
+    return rows
+
+
+def _service(rows, page_size):
+    """Fake elo_service whose interview_performance query serves `rows` page by page."""
+    pages = [rows[i:i + page_size] for i in range(0, len(rows), page_size)] + [[]]
+    svc = MagicMock()
+    svc.get_all_users.return_value = [{"id": 5, "name": "Zero", "email": "u0@x", "eloscore": 1300}]
+    svc.next_user_id.return_value = 6
+
+    query = MagicMock()
+    query.or_.return_value = query
+    query.order.return_value = query
+    query.limit.return_value = query
+    query.execute.side_effect = [SimpleNamespace(data=p) for p in pages]
+    svc.supabase.table.return_value.select.return_value = query
+    return svc
+
+
+def _run(tmp_path, page_size):
+    svc = _service(_interviews(), page_size)
+    engine = EloReplayEngine(svc, checkpoint_path=str(tmp_path / "ckpt.json"), page_size=page_size)
+    summary = engine.run()
+    scores = {}
+    for call in svc.bulk_upsert_scores.call_args_list:
+        for row in call.args[0]:
+            scores[row["email"]] = row
+    return svc, summary, scores
+
+
+def test_run_writes_scores_history_and_ranks(tmp_path):
+    svc, summary, scores = _run(tmp_path, page_size=5)
+
+    assert summary == {"interviews": 12, "users": 3, "reset": 0, "resumed": False}
+    assert scores["u0@x"]["id"] == 5 and scores["u0@x"]["name"] == "Zero"
+    assert {scores["u1@x"]["id"], scores["u2@x"]["id"]} == {6, 7}
+    history = [row for call in svc.bulk_upsert_history.call_args_list for row in call.args[0]]
+    assert len(history) == 12
+    assert [row["interview_id"] for row in history] == list(range(1, 13))
+    assert history[-1]["eloscore"] == scores[history[-1]["email"]]["eloscore"]
+    svc.repair_ranks.assert_called_once()
+    assert not (tmp_path / "ckpt.json").exists()
+
+
+def test_page_size_does_not_change_result(tmp_path):
+    _, _, small = _run(tmp_path, page_size=2)
+    _, _, large = _run(tmp_path, page_size=50)
+    assert {e: r["eloscore"] for e, r in small.items()} == {e: r["eloscore"] for e, r in large.items()}
+
+
+def test_resume_from_checkpoint(tmp_path):
+    path = tmp_path / "ckpt.json"
+    path.write_text("\n".join([
+        json.dumps({"config": elo_replay.rating_config()}),
+        json.dumps({"cursor": {"created_at": "2025-03-10T10:00:00", "interview_id": 10},
+                    "processed": 10, "ratings": {"u0@x": 1000, "u1@x": 900}}),
+        json.dumps({"cursor": {"created_at": "2025-03-12T10:00:00", "interview_id": 12},
+                    "processed": 12, "ratings": {"u0@x": 1111}}),
+        '{"cursor": {"created_at": "2025-03-13',  # torn final write
+    ]))
+    svc = _service([], page_size=5)
+    summary = EloReplayEngine(svc, checkpoint_path=str(path)).run()
+
+    assert summary == {"interviews": 12, "users": 2, "reset": 0, "resumed": True}
+    scores = {row["email"]: row["eloscore"] for row in svc.bulk_upsert_scores.call_args.args[0]}
+    assert scores == {"u0@x": 1111, "u1@x": 900}
+    svc.supabase.table.return_value.select.return_value.or_.assert_called_once()
+    svc.delete_history.assert_not_called()
+
+
+def test_only_replayed_users_history_is_cleared(tmp_path):
+    svc, _, _ = _run(tmp_path, page_size=2)
+
+    cleared = [email for call in svc.delete_history.call_args_list for email in call.args[0]]
+    assert sorted(cleared) == ["u0@x", "u1@x", "u2@x"]
+    svc.supabase.table.return_value.delete.assert_not_called()
+
+
+def test_resume_after_crash_rewrites_page_by_interview_id(tmp_path):
+    path = str(tmp_path / "ckpt.json")
+    svc = _service(_interviews(), page_size=5)
+    svc.bulk_upsert_history.side_effect = [None, Exception("connection lost")]
+    with pytest.raises(Exception):
+        EloReplayEngine(svc, checkpoint_path=path, page_size=5).run()
+    written = [row for call in svc.bulk_upsert_history.call_args_list for row in call.args[0]]
+
+    resumed = _service(_interviews()[5:], page_size=5)
+    EloReplayEngine(resumed, checkpoint_path=path, page_size=5).run()
+    rewritten = [row for call in resumed.bulk_upsert_history.call_args_list for row in call.args[0]]
+
+    # The failed page is written again under the same interview ids
+    assert [r["interview_id"] for r in written] == list(range(1, 11))
+    assert [r["interview_id"] for r in rewritten] == list(range(6, 13))
+    assert rewritten[:5] == written[5:]
+    resumed.delete_history.assert_not_called()
+
+
+def test_checkpoint_with_other_constants_is_rejected(tmp_path):
+    path = tmp_path / "ckpt.json"
+    path.write_text(json.dumps({"config": {"base_elo": 1}}) + "\n")
+    with pytest.raises(ValueError):
+        EloReplayEngine(_service([], 5), checkpoint_path=str(path)).run()
+
+
+def test_checkpoint_only_appends_changed_ratings(tmp_path):
+    path = tmp_path / "ckpt.json"
+    svc = _service(_interviews(), page_size=2)
+    engine = EloReplayEngine(svc, checkpoint_path=str(path), page_size=2)
+    saved = []
+    append = engine._save_checkpoint
+    engine._save_checkpoint = lambda changed: saved.append(dict(changed)) or append(changed)
+    engine.run()
+
+    # Each entry holds the two users on its page, not every rating so far
+    assert [sorted(entry) for entry in saved[:3]] == [["u0@x", "u1@x"], ["u0@x", "u2@x"], ["u1@x", "u2@x"]]
+
+
+def test_users_without_interviews_are_reset(tmp_path):
+    svc = _service(_interviews(), page_size=5)
+    svc.get_all_users.return_value.append({"id": 9, "name": "Idle", "email": "idle@x", "eloscore": 1700})
+    summary = EloReplayEngine(svc, checkpoint_path=str(tmp_path / "ckpt.json"), page_size=5).run()
+
+    rows = {row["email"]: row for call in svc.bulk_upsert_scores.call_args_list for row in call.args[0]}
+    assert summary["reset"] == 1
+    assert rows["idle@x"] == {"id": 9, "name": "Idle", "email": "idle@x", "eloscore": elo_replay.BASE_ELO}
+    assert ["idle@x"] in [call.args[0] for call in svc.delete_history.call_args_list]
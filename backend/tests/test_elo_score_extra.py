@@ -112,7 +112,20 @@ def test_calculate_elo_branches(svc, _patch_supabase, cur, score, rel):
         assert abs(new - cur) <= _patch_supabase.K_FACTOR_DEFAULT
 
 
+def _drop_apply_rpc(svc):
+    """Make apply_elo_result look uninstalled so the multi-step path runs."""
+    default = svc.supabase.rpc.return_value
+
+    def rpc(name, *args):
+        if name == "apply_elo_result":
+            raise Exception("function apply_elo_result does not exist")
+        return default
+
+    svc.supabase.rpc.side_effect = rpc
+
+
 def test_update_elo_new_user_flow(svc):
+    _drop_apply_rpc(svc)
     out = svc.update_elo_score("new@x", 90, "New User", difficulty="easy")
     assert out["new_elo"] > out["old_elo"]
     _table("elo_scores").insert.assert_called()
@@ -120,6 +133,7 @@ def test_update_elo_new_user_flow(svc):
 
 
 def test_update_elo_existing_user_flow(svc):
+    _drop_apply_rpc(svc)
     tbl = _table("elo_scores")
     tbl.select.return_value.eq.return_value.execute.return_value.data = [{"id": 1, "eloscore": 1400}]
     out = svc.update_elo_score("vet@x", 20, "Vet", difficulty="hard")
@@ -128,6 +142,25 @@ def test_update_elo_existing_user_flow(svc):
     _table("elo_history").insert.assert_called()
 
 
+def test_update_elo_rpc_missing_by_code_falls_back(svc):
+    class APIError(Exception):
+        code = "PGRST202"
+    svc.supabase.rpc.side_effect = APIError("Could not find apply_elo_result in the schema cache")
+    out = svc.update_elo_score("new@x", 90, "New User")
+    assert out["new_elo"] > out["old_elo"]
+    _table("elo_history").insert.assert_called()
+
+
+def test_update_elo_rpc_error_is_not_applied_twice(svc):
+    # The RPC may have committed before its response was lost
+    svc.supabase.rpc.side_effect = TimeoutError("read timed out")
+    with pytest.raises(TimeoutError):
+        svc.update_elo_score("vet@x", 90, "Vet")
+    _table("elo_scores").update.assert_not_called()
+    _table("elo_scores").insert.assert_not_called()
+    _table("elo_history").insert.assert_not_called()
+
+
 def test_leaderboard(svc):
     tbl = _table("elo_scores")
     tbl.select.return_value.order.return_value.range.return_value.execute.return_value.data = [
@@ -143,4 +176,303 @@ def test_user_history_formatting(svc):
         {"eloscore": 1234, "created_at": "2025-02-28T09:00:00"}
     ]
     hist = svc.get_user_elo_history("user@x", limit=5)
-    assert hist == [{"date": "2025-02-28", "score": 1234}]
\ No newline at end of file
+    assert hist == [{"date": "2025-02-28", "score": 1234}]
+
+def test_compute_ranks_ties_share_rank(_patch_supabase):
+    rows = [{"id": 1, "eloscore": 1500}, {"id": 2, "eloscore": 1400},
+            {"id": 3, "eloscore": 1400}, {"id": 4, "eloscore": 1300}]
+    ranks = [r["rank"] for r in _patch_supabase.compute_ranks(rows)]
+    assert ranks == [1, 2, 2, 4]
+
+
+def test_new_user_tying_a_score_shares_its_rank(svc):
+    _drop_apply_rpc(svc)
+    tbl = _table("elo_scores")
+    # One user is strictly above the new score; users at the same score don't count
+    tbl.select.return_value.gt.return_value.execute.return_value.count = 1
+    out = svc.update_elo_score("new@x", 90, "New User", difficulty="easy")
+    tbl.select.return_value.gt.assert_called_with("eloscore", out["new_elo"])
+    tbl.select.return_value.gte.assert_not_called()
+    assert tbl.insert.call_args[0][0]["rank"] == 2
+    svc.supabase.rpc.assert_any_call("shift_elo_ranks", {
+        "p_user_id": tbl.insert.call_args[0][0]["id"],
+        "p_old_elo": None,
+        "p_new_elo": out["new_elo"],
+    })
+
+
+def test_update_all_ranks_uses_single_rpc(svc):
+    svc._update_all_ranks()
+    svc.supabase.rpc.assert_called_once_with("recompute_elo_ranks")
+    _table("elo_scores").update.assert_not_called()
+    _table("elo_scores").upsert.assert_not_called()
+
+
+def test_update_all_ranks_falls_back_to_bulk_upsert(svc):
+    svc.supabase.rpc.side_effect = Exception("function does not exist")
+    tbl = _table("elo_scores")
+    tbl.select.return_value.order.return_value.range.return_value.execute.return_value.data = [
+        {"id": 3, "name": "B", "email": "b@x", "eloscore": 1200},
+        {"id": 7, "name": "A", "email": "a@x", "eloscore": 1600},
+    ]
+    svc._update_all_ranks()
+
+    tbl.upsert.assert_called_once()
+    rows = tbl.upsert.call_args[0][0]
+    assert [(r["id"], r["rank"]) for r in rows] == [(7, 1), (3, 2)]
+    tbl.update.assert_not_called()
+
+
+def test_update_all_ranks_fallback_pages_reads_and_chunks_writes(svc, _patch_supabase, monkeypatch):
+    monkeypatch.setattr(_patch_supabase, "LEADERBOARD_PAGE_SIZE", 2)
+    monkeypatch.setattr(_patch_supabase, "BULK_CHUNK_SIZE", 2)
+    svc.supabase.rpc.side_effect = Exception("function does not exist")
+    users = [{"id": i, "name": str(i), "email": f"{i}@x", "eloscore": 1000 + i} for i in range(5)]
+    tbl = _table("elo_scores")
+    tbl.select.return_value.order.return_value.range.return_value.execute.side_effect = [
+        SimpleNamespace(data=users[0:2]), SimpleNamespace(data=users[2:4]), SimpleNamespace(data=users[4:]),
+    ]
+    svc._update_all_ranks()
+
+    # Reads past the per-request row cap, writes at most BULK_CHUNK_SIZE rows at a time
+    assert tbl.select.return_value.order.return_value.range.call_count == 3
+    chunks = [c[0][0] for c in tbl.upsert.call_args_list]
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    assert [(r["id"], r["rank"]) for chunk in chunks for r in chunk] == [(4, 1), (3, 2), (2, 3), (1, 4), (0, 5)]
+
+
+def test_rebuild_leaderboard_serves_from_index(svc):
+    tbl = _table("elo_scores")
+    tbl.select.return_value.order.return_value.range.return_value.execute.return_value.data = [
+        {"id": 1, "name": "A", "email": "a@x", "eloscore": 1300},
+        {"id": 2, "name": "B", "email": "b@x", "eloscore": 1500},
+    ]
+    assert svc.rebuild_leaderboard() == 2
+
+    board = svc.get_leaderboard(limit=10)
+    assert [u["email"] for u in board] == ["b@x", "a@x"]
+    assert svc.get_user_rank("a@x")["rank"] == 2
+
+    # a new user's update lands in the index without another DB read
+    _drop_apply_rpc(svc)
+    svc.update_elo_score("c@x", 95, "C", difficulty="hard")
+    assert svc.get_user_rank("c@x") is not None
+
+
+def test_update_keeps_indexed_name_of_existing_user(svc):
+    _table("elo_scores").select.return_value.order.return_value.range.return_value.execute.return_value.data = [
+        {"id": 9, "name": "Vera", "email": "vet@x", "eloscore": 1000}
+    ]
+    svc.rebuild_leaderboard()
+    svc.supabase.rpc.return_value.execute.return_value = SimpleNamespace(data=[{
+        "user_id": 9, "old_elo": 1000, "new_elo": 1016, "rank": 1,
+        "created_at": "2025-03-01T10:00:00+00:00",
+    }])
+    svc.update_elo_score("vet@x", 90)
+    assert svc.get_user_rank("vet@x")["name"] == "Vera"
+
+    # multi-step path: the stored name wins over the default argument
+    _drop_apply_rpc(svc)
+    tbl = _table("elo_scores")
+    tbl.select.return_value.eq.return_value.execute.return_value.data = [{"id": 4, "name": "Stored", "email": "s@x", "eloscore": 1400}]
+    svc.update_elo_score("s@x", 90)
+    assert svc.get_user_rank("s@x")["name"] == "Stored"
+
+
+def test_leaderboard_index_syncs_changes_from_other_processes(svc, _patch_supabase):
+    scores = _table("elo_scores")
+    scores.select.return_value.order.return_value.range.return_value.execute.return_value.data = [
+        {"id": 1, "name": "A", "email": "a@x", "eloscore": 1300},
+        {"id": 2, "name": "B", "email": "b@x", "eloscore": 1500},
+    ]
+    svc.rebuild_leaderboard()
+    assert svc.get_user_rank("a@x")["rank"] == 2
+
+    # another worker raised a@x; its history row is newer than the index
+    history = _table("elo_history")
+    history.select.return_value.order.return_value.limit.return_value.execute.return_value.data = [
+        {"id": 10, "email": "a@x", "created_at": "2025-03-01T10:00:00+00:00"}
+    ]
+    scores.select.return_value.in_.return_value.execute.return_value.data = [
+        {"id": 1, "name": "A", "email": "a@x", "eloscore": 1600}
+    ]
+    assert svc.get_user_rank("a@x")["rank"] == 2  # synced at most every few seconds
+
+    svc._leaderboard_synced_at -= _patch_supabase.LEADERBOARD_SYNC_SECONDS
+    assert svc.get_user_rank("a@x")["rank"] == 1
+    assert svc._leaderboard_mark == "2025-03-01T10:00:00+00:00"
+
+
+def test_leaderboard_sync_catches_tied_and_late_rows(svc, _patch_supabase):
+    scores = _table("elo_scores")
+    scores.select.return_value.order.return_value.range.return_value.execute.return_value.data = [
+        {"id": 1, "name": "A", "email": "a@x", "eloscore": 1300},
+        {"id": 2, "name": "B", "email": "b@x", "eloscore": 1500},
+        {"id": 3, "name": "C", "email": "c@x", "eloscore": 1400},
+    ]
+    history = _table("elo_history")
+    history.select.return_value.order.return_value.limit.return_value.execute.return_value.data = [
+        {"created_at": "2025-03-01T10:00:00+00:00"}
+    ]
+    svc.rebuild_leaderboard()
+    window = history.select.return_value.gte.return_value.order.return_value.limit.return_value.execute
+
+    # b@x's row has the mark's timestamp; c@x's committed late with an older one
+    window.return_value.data = [
+        {"id": 7, "email": "c@x", "created_at": "2025-03-01T09:59:30+00:00"},
+        {"id": 8, "email": "b@x", "created_at": "2025-03-01T10:00:00+00:00"},
+    ]
+    scores.select.return_value.in_.return_value.execute.return_value.data = [
+        {"id": 3, "name": "C", "email": "c@x", "eloscore": 1700},
+        {"id": 2, "name": "B", "email": "b@x", "eloscore": 1200},
+    ]
+    svc._leaderboard_synced_at -= _patch_supabase.LEADERBOARD_SYNC_SECONDS
+    assert svc.get_user_rank("c@x")["rank"] == 1
+    assert svc.get_user_rank("b@x")["rank"] == 3
+    lower_bound = history.select.return_value.gte.call_args.args[1]
+    assert lower_bound == "2025-03-01T09:59:00+00:00"
+
+    # rows already applied are not fetched again
+    svc._leaderboard_synced_at -= _patch_supabase.LEADERBOARD_SYNC_SECONDS
+    scores.select.return_value.in_.reset_mock()
+    svc.get_user_rank("a@x")
+    scores.select.return_value.in_.assert_not_called()
+
+
+def test_update_existing_user_shifts_only_band(svc):
+    _drop_apply_rpc(svc)
+    tbl = _table("elo_scores")
+    tbl.select.return_value.eq.return_value.execute.return_value.data = [{"id": 4, "eloscore": 1400}]
+    out = svc.update_elo_score("vet@x", 90, "Vet", difficulty="hard")
+
+    svc.supabase.rpc.assert_called_with("shift_elo_ranks", {
+        "p_user_id": 4, "p_old_elo": 1400, "p_new_elo": out["new_elo"],
+    })
+
+
+def test_full_rank_mode_recomputes_all(svc):
+    _drop_apply_rpc(svc)
+    svc.rank_mode = "full"
+    tbl = _table("elo_scores")
+    tbl.select.return_value.eq.return_value.execute.return_value.data = [{"id": 4, "eloscore": 1400}]
+    svc.update_elo_score("vet@x", 90, "Vet")
+    svc.supabase.rpc.assert_called_with("recompute_elo_ranks")
+
+
+def test_update_elo_uses_single_rpc(svc, _patch_supabase):
+    svc.supabase.rpc.return_value.execute.return_value = SimpleNamespace(data=[{
+        "user_id": 9, "old_elo": 1000, "new_elo": 1016, "rank": 3,
+        "created_at": "2025-03-01T10:00:00+00:00",
+    }])
+    out = svc.update_elo_score("vet@x", 90, "Vet", difficulty="hard")
+
+    assert out == {"old_elo": 1000, "new_elo": 1016, "elo_change": 16,
+                   "timestamp": "2025-03-01T10:00:00+00:00"}
+    svc.supabase.rpc.assert_called_once()
+    name, params = svc.supabase.rpc.call_args.args
+    assert name == "apply_elo_result"
+    assert params["p_actual_result"] == 1.0
+    assert params["p_benchmark_elo"] == _patch_supabase.BENCHMARK_ELO["hard"]
+    assert params["p_incremental_ranks"] is True
+    svc.supabase.table.assert_not_called()
+
+
+def test_multi_step_update_writes_one_history_row(svc):
+    _drop_apply_rpc(svc)
+    tbl = _table("elo_scores")
+    tbl.select.return_value.eq.return_value.execute.return_value.data = [{"id": 1, "eloscore": 1400}]
+    svc.update_elo_score("vet@x", 20, "Vet")
+    _table("elo_history").insert.assert_called_once()
+
+
+def test_shift_failure_falls_back_to_full_rerank(svc):
+    svc.supabase.rpc.side_effect = [Exception("missing function"), MagicMock()]
+    svc._maintain_ranks(4, 1400, 1450)
+    assert [c.args[0] for c in svc.supabase.rpc.call_args_list] == [
+        "shift_elo_ranks", "recompute_elo_ranks"]
+
+
+def test_calculate_elo_array_matches_scalar(svc, _patch_supabase):
+    mod = _patch_supabase
+    cases = [(800, 80, "easy"), (1600, 30, "hard"), (1200, 60, "medium"), (1000, 75, "medium")]
+    expected = [svc.calculate_elo(c, sc, d) for c, sc, d in cases]
+    got = mod.calculate_elo_array(
+        [c for c, _, _ in cases], [sc for _, sc, _ in cases],
+        [mod.BENCHMARK_ELO[d] for _, _, d in cases])
+    assert got.tolist() == expected
+
+
+def test_occurrence_rounds_keeps_per_user_order(_patch_supabase):
+    rounds = _patch_supabase.occurrence_rounds([0, 1, 0, 2, 0, 1])
+    assert [r.tolist() for r in rounds] == [[0, 1, 3], [2, 5], [4]]
+
+
+def test_update_elo_batch_applies_results_in_order(svc):
+    tbl = _table("elo_scores")
+    tbl.select.return_value.in_.return_value.execute.return_value.data = [
+        {"id": 3, "name": "Old", "email": "old@x", "eloscore": 1400}]
+    tbl.select.return_value.order.return_value.limit.return_value.execute.return_value.data = [{"id": 9}]
+
+    out = svc.update_elo_batch([
+        {"email": "old@x", "score": 90},
+        {"email": "new@x", "score": 20, "difficulty": "easy", "name": "New"},
+        {"email": "old@x", "score": 90},
+        {"email": "bad@x", "score": 101},
+    ])
+
+    assert out["processed"] == 3
+    assert out["errors"] == [{"index": 3, "error": "Score must be between 0 and 100"}]
+    first, _, second = out["results"]
+    assert second["old_elo"] == first["new_elo"]
+    assert second["new_elo"] == svc.calculate_elo(first["new_elo"], 90, "medium")
+
+    upserted = tbl.upsert.call_args[0][0]
+    assert {r["email"]: r["id"] for r in upserted} == {"old@x": 3, "new@x": 10}
+    assert len(_table("elo_history").insert.call_args[0][0]) == 3
+    svc.supabase.rpc.assert_called_once_with("recompute_elo_ranks")
+
+
+def test_bucket_elo_history_day_week_month(_patch_supabase):
+    rows = [
+        {"eloscore": 1200, "created_at": "2025-03-03T09:00:00"},  # Monday
+        {"eloscore": 1180, "created_at": "2025-03-03T12:00:00"},
+        {"eloscore": 1230, "created_at": "2025-03-05T08:00:00"},
+        {"eloscore": 1250, "created_at": "2025-04-01T10:00:00"},
+    ]
+    days = _patch_supabase.bucket_elo_history(rows, "day")
+    assert [d["date"] for d in days] == ["2025-04-01", "2025-03-05", "2025-03-03"]
+    assert days[-1] == {"date": "2025-03-03", "score": 1180, "min": 1180, "max": 1200, "count": 2}
+
+    weeks = _patch_supabase.bucket_elo_history(rows, "week")
+    assert [(w["date"], w["score"], w["count"]) for w in weeks] == [
+        ("2025-03-31", 1250, 1), ("2025-03-03", 1230, 3)]
+
+    months = _patch_supabase.bucket_elo_history(rows, "month")
+    assert [(m["date"], m["min"], m["max"]) for m in months] == [
+        ("2025-04-01", 1250, 1250), ("2025-03-01", 1180, 1230)]
+
+    with pytest.raises(ValueError):
+        _patch_supabase.bucket_elo_history(rows, "hour")
+
+
+def test_bucketed_history_uses_rpc(svc):
+    svc.supabase.rpc.return_value.execute.return_value = SimpleNamespace(data=[
+        {"bucket_date": "2025-03-05", "last_score": 1230, "min_score": 1200,
+         "max_score": 1240, "entries": 3},
+    ])
+    hist = svc.get_user_elo_history("user@x", limit=30, bucket="day")
+    svc.supabase.rpc.assert_called_once_with("elo_history_buckets", {
+        "p_email": "user@x", "p_bucket": "day", "p_limit": 30})
+    assert hist == [{"date": "2025-03-05", "score": 1230, "min": 1200, "max": 1240, "count": 3}]
+
+
+def test_bucketed_history_falls_back_to_local_aggregation(svc):
+    svc.supabase.rpc.side_effect = Exception("function does not exist")
+    tbl = _table("elo_history")
+    tbl.select.return_value.eq.return_value.order.return_value.range.return_value.execute.return_value.data = [
+        {"eloscore": 1210, "created_at": "2025-03-01T09:00:00"},
+        {"eloscore": 1220, "created_at": "2025-03-02T09:00:00"},
+        {"eloscore": 1240, "created_at": "2025-03-03T09:00:00"},
+    ]
+    hist = svc.get_user_elo_history("user@x", limit=2, bucket="day")
+    assert [h["score"] for h in hist] == [1240, 1220]
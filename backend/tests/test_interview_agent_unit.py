@@ -4,9 +4,13 @@ Unit-level coverage for LLMInterviewAgent
 ────────────────────────────────────────
 ▪  initialize()     – verifies system prompt construction
 ▪  greet()          – ensures greeting routed to LLM
-▪  next_question()  – hikes question_count, handles END_INTERVIEW token
+▪  next_question()  – hikes question_count, handles END_INTERVIEW token,
+                      hands each answer to the turn assessor
+▪  stream_question()– yields the question in pieces, never END_INTERVIEW
 ▪  is_end()         – checks both token & threshold logic
-▪  end_interview()  – exercises translation branch when language ≠ English
+▪  end_interview()  – exercises translation branch when language ≠ English,
+                      and the translation catalog when one is given
+▪  to_state()       – state round-trips through from_state()
 All LLM calls are mocked, so the tests run offline & fast.
 """
 import json
@@ -64,13 +68,14 @@ def spanish_interviewer():
 # Tests
 # ---------------------------------------------------------------------------
 def test_initialize_builds_system_prompt(dummy_llm_graph, spanish_interviewer):
-    """initialize() should send ONE SystemMessage with all interviewer fields."""
+    """initialize() should seed ONE SystemMessage with all interviewer fields."""
     agent = LLMInterviewAgent(dummy_llm_graph, question_threshold=3)
     agent.initialize(spanish_interviewer)
 
-    # LLM called exactly once with a SystemMessage
-    assert dummy_llm_graph.invoke.call_count == 1
-    sent_msg = dummy_llm_graph.invoke.call_args[0][0]
+    # Thread seeded exactly once with a SystemMessage, without calling the LLM
+    assert dummy_llm_graph.invoke.call_count == 0
+    assert dummy_llm_graph.seed.call_count == 1
+    (sent_msg,) = dummy_llm_graph.seed.call_args[0][0]
     assert "AI interviewer" in sent_msg.content
     # resume and company name should be embedded
     assert "Acme Corp" in sent_msg.content
@@ -86,8 +91,8 @@ def test_greet_adds_to_conversation(dummy_llm_graph, spanish_interviewer):
     greeting = agent.greet()
     assert greeting.startswith("[AI] "), "Mock LLM should prepend [AI]"
     assert agent.conversation[-1]["content"] == greeting
-    # greet triggers a SECOND LLM call
-    assert dummy_llm_graph.invoke.call_count == 2
+    # greet is the only LLM call
+    assert dummy_llm_graph.invoke.call_count == 1
 
 
 def test_next_question_increments_count(dummy_llm_graph, spanish_interviewer):
@@ -107,6 +112,57 @@ def test_next_question_increments_count(dummy_llm_graph, spanish_interviewer):
     assert agent.question_count == 1  # should not change
 
 
+def test_next_question_submits_turn_assessment(dummy_llm_graph, spanish_interviewer):
+    assessor = MagicMock()
+    agent = LLMInterviewAgent(dummy_llm_graph, thread_id="t-1", turn_assessor=assessor)
+    agent.initialize(spanish_interviewer)
+
+    q1 = agent.next_question("My name is Bob.")
+    agent.next_question("I like Python.")
+
+    welcome = agent.conversation[0]["content"]
+    assert [c.args for c in assessor.submit.call_args_list] == [
+        ("t-1", welcome, "My name is Bob."),
+        ("t-1", q1, "I like Python."),
+    ]
+
+
+def test_first_answer_is_assessed_against_sent_welcome(dummy_llm_graph, spanish_interviewer):
+    assessor = MagicMock()
+    agent = LLMInterviewAgent(dummy_llm_graph, thread_id="t-1", turn_assessor=assessor)
+    agent.initialize(spanish_interviewer)
+    agent.set_welcome("Bienvenido a su entrevista.")
+
+    agent.next_question("Me llamo Bob.")
+
+    assert [m["content"] for m in agent.conversation if m["role"] == "assistant"][0] == "Bienvenido a su entrevista."
+    assert assessor.submit.call_args.args == ("t-1", "Bienvenido a su entrevista.", "Me llamo Bob.")
+
+
+def test_stream_question_yields_pieces(dummy_llm_graph, spanish_interviewer):
+    agent = LLMInterviewAgent(dummy_llm_graph, question_threshold=3)
+    agent.initialize(spanish_interviewer)
+
+    dummy_llm_graph.stream.side_effect = lambda m, thread_id=None: iter(["What did ", "you E", "nd up building?"])
+    pieces = list(agent.stream_question("I built a cache."))
+
+    assert "".join(pieces) == "What did you End up building?"
+    assert agent.last_question() == "What did you End up building?"
+    assert agent.question_count == 1
+
+
+def test_stream_question_hides_end_token(dummy_llm_graph, spanish_interviewer):
+    agent = LLMInterviewAgent(dummy_llm_graph, question_threshold=3)
+    agent.initialize(spanish_interviewer)
+
+    dummy_llm_graph.stream.side_effect = lambda m, thread_id=None: iter(["END_", "INTER", "VIEW"])
+    pieces = list(agent.stream_question("That's all."))
+
+    assert pieces == []
+    assert agent.is_end(agent.last_question())
+    assert agent.question_count == 0
+
+
 def test_is_end_token_and_threshold(dummy_llm_graph, spanish_interviewer):
     agent = LLMInterviewAgent(dummy_llm_graph, question_threshold=1)
     agent.initialize(spanish_interviewer)
@@ -145,3 +201,28 @@ def test_end_interview_translation(dummy_llm_graph, spanish_interviewer, tmp_pat
     assert saved[-1]["content"] == closing
 
 
+def test_end_interview_uses_translation_catalog(dummy_llm_graph, spanish_interviewer):
+    catalog = MagicMock()
+    catalog.render.return_value = "Gracias por su tiempo."
+    agent = LLMInterviewAgent(dummy_llm_graph, translation_catalog=catalog)
+    agent.initialize(spanish_interviewer)
+
+    assert agent.end_interview() == "Gracias por su tiempo."
+    catalog.render.assert_called_once_with("closing", "Spanish")
+    assert dummy_llm_graph.invoke.call_count == 0
+
+
+def test_state_round_trip(dummy_llm_graph, spanish_interviewer):
+    agent = LLMInterviewAgent(dummy_llm_graph, question_threshold=3, thread_id="t-1")
+    agent.initialize(spanish_interviewer)
+    agent.next_question("My name is Bob.")
+
+    state = json.loads(json.dumps(agent.to_state()))
+    restored = LLMInterviewAgent.from_state(state, dummy_llm_graph)
+
+    assert restored.thread_id == "t-1"
+    assert restored.question_threshold == 3
+    assert restored.question_count == 1
+    assert restored.conversation == agent.conversation
+    assert vars(restored.interviewer) == vars(spanish_interviewer)
+    assert dummy_llm_graph.invoke.call_count == 1  # one question; none on restore
@@ -0,0 +1,75 @@
+"""
+Unit coverage for LeaderboardIndex
+──────────────────────────────────
+• top()    – paging across buckets, ties share a rank
+• rank()   – competition ranking, unknown users
+• around() – window clipped at the top of the board
+• upsert() – moving a user keeps counts consistent
+"""
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from services.leaderboard_index import LeaderboardIndex
+from services.elo_calculator import compute_ranks
+
+
+def _users():
+    return [
+        {"id": 1, "name": "A", "email": "a@x", "eloscore": 1500},
+        {"id": 2, "name": "B", "email": "b@x", "eloscore": 1400},
+        {"id": 3, "name": "C", "email": "c@x", "eloscore": 1400},
+        {"id": 4, "name": "D", "email": "d@x", "eloscore": 1200},
+        {"id": 5, "name": "E", "email": "e@x", "eloscore": 900},
+    ]
+
+
+def test_top_pages_and_ties():
+    idx = LeaderboardIndex()
+    idx.load(_users())
+
+    board = idx.top(limit=10)
+    assert [u["email"] for u in board] == ["a@x", "b@x", "c@x", "d@x", "e@x"]
+    assert [u["rank"] for u in board] == [1, 2, 2, 4, 5]
+
+    page = idx.top(limit=2, offset=2)
+    assert [u["email"] for u in page] == ["c@x", "d@x"]
+    assert idx.top(limit=5, offset=10) == []
+
+
+def test_rank_and_unknown_user():
+    idx = LeaderboardIndex()
+    idx.load(_users())
+    assert idx.rank("d@x")["rank"] == 4
+    assert idx.rank("nobody@x") is None
+
+
+def test_around_clips_at_top():
+    idx = LeaderboardIndex()
+    idx.load(_users())
+    assert [u["email"] for u in idx.around("a@x", radius=1)] == ["a@x", "b@x"]
+    assert [u["email"] for u in idx.around("c@x", radius=1)] == ["b@x", "c@x", "d@x"]
+    assert idx.around("nobody@x") == []
+
+
+def test_upsert_moves_user():
+    idx = LeaderboardIndex()
+    idx.load(_users())
+    idx.upsert({"id": 5, "name": "E", "email": "e@x", "eloscore": 1600})
+
+    assert len(idx) == 5
+    assert idx.rank("e@x")["rank"] == 1
+    assert idx.rank("a@x")["rank"] == 2
+    assert idx.top(limit=1)[0]["eloscore"] == 1600
+
+
+def test_matches_full_sort():
+    rng = random.Random(7)
+    users = [{"id": i, "name": str(i), "email": f"{i:04d}@x", "eloscore": rng.randint(800, 1800)}
+             for i in range(500)]
+    idx = LeaderboardIndex()
+    idx.load(users)
+
+    expected = compute_ranks(sorted(users, key=lambda u: (-u["eloscore"], u["email"])))
+    assert idx.top(limit=500) == expected
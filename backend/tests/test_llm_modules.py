@@ -8,7 +8,7 @@ import json
 from llm.interview_agent import LLMInterviewAgent
 from llm.llm_graph import LLMGraph
 from llm.llm_interface import LLMInterface
-from llm.llm_utils import generate_prompt, extract_json_from_response
+from llm.llm_utils import generate_prompt, extract_json_from_response, generate_good_response_prompt, clean_good_response
 from llm.pdf_clean import extract_text_from_pdf
 
 class TestLLMInterviewAgent:
@@ -60,6 +60,159 @@ class TestLLMGraph:
             # Verify the chat_app.invoke was called
             assert graph.chat_app.invoke.called
 
+    def _chat(self, graph, thread_id, turns):
+        from langchain_core.messages import AIMessage, HumanMessage
+        with patch.object(LLMInterface, 'invoke', side_effect=lambda msgs: [AIMessage(content=f"reply {len(msgs)}")]):
+            for i in range(turns):
+                graph.invoke(HumanMessage(content=f"answer {i}"), thread_id)
+
+    def test_latest_mode_keeps_one_checkpoint_per_thread(self):
+        """Test that "latest" mode prunes old checkpoints but keeps the full state"""
+        graph = LLMGraph(checkpoint_mode="latest")
+        self._chat(graph, "t1", 4)
+        self._chat(graph, "t2", 1)
+
+        assert len(graph.memory.storage["t1"][""]) == 1
+        assert len(graph.get_messages("t1")) == 8
+        assert len(graph.get_messages("t2")) == 2
+        # one stored value per channel, not one per step
+        channels = graph.memory.get_tuple({"configurable": {"thread_id": "t1"}}).checkpoint["channel_versions"]
+        assert len([k for k in graph.memory.blobs if k[0] == "t1"]) <= len(channels)
+
+        full = LLMGraph(checkpoint_mode="full")
+        self._chat(full, "t1", 4)
+        assert len(full.memory.storage["t1"][""]) > 4
+
+    def test_release_frees_thread(self):
+        """Test that release drops everything stored for a thread"""
+        graph = LLMGraph(checkpoint_mode="latest")
+        self._chat(graph, "t1", 2)
+        self._chat(graph, "t2", 1)
+
+        graph.release("t1")
+
+        assert graph.get_messages("t1") == []
+        assert not [k for k in graph.memory.blobs if k[0] == "t1"]
+        assert not [k for k in graph.memory.writes if k[0] == "t1"]
+        assert len(graph.get_messages("t2")) == 2
+
+    def test_invalid_checkpoint_mode(self):
+        with pytest.raises(ValueError):
+            LLMGraph(checkpoint_mode="sometimes")
+
+    def _prompts(self, graph, thread_id, turns):
+        """Run a pinned system prompt and some turns; return what each call sent"""
+        from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+        sent = []
+
+        def fake_invoke(msgs):
+            sent.append(list(msgs))
+            if msgs[0].content.startswith("You keep a running summary"):
+                return [AIMessage(content=f"summary {len(sent)}")]
+            return [AIMessage(content=f"reply {len(msgs)}")]
+
+        with patch.object(LLMInterface, 'invoke', side_effect=fake_invoke):
+            graph.invoke(SystemMessage(content="system prompt"), thread_id)
+            graph.invoke(HumanMessage(content="setup"), thread_id, pin=True)
+            for i in range(turns):
+                graph.invoke(HumanMessage(content=f"answer {i}"), thread_id)
+        return sent
+
+    def test_window_memory_sends_pinned_context_and_recent_turns(self):
+        """Test that "window" mode keeps the pinned context and the last turns only"""
+        graph = LLMGraph(memory_mode="window", memory_turns=2)
+        sent = self._prompts(graph, "t1", 5)
+
+        contents = [m.content for m in sent[-1]]
+        assert contents[:4] == ["system prompt", "reply 1", "setup", "reply 3"]
+        assert contents[4] == "answer 3"
+        assert contents[5].startswith("reply")
+        assert contents[6] == "answer 4"
+        assert len(sent[-1]) == 7
+        # The checkpoint still holds the whole conversation
+        assert len(graph.get_messages("t1")) == 4 + 2 * 5
+
+    def test_summary_memory_folds_older_turns(self):
+        """Test that "summary" mode folds older turns into a rolling summary"""
+        graph = LLMGraph(memory_mode="summary", memory_turns=2)
+        sent = self._prompts(graph, "t1", 6)
+
+        summary_calls = [msgs for msgs in sent if msgs[0].content.startswith("You keep a running summary")]
+        assert len(summary_calls) == 2
+        assert "Candidate: answer 0" in summary_calls[0][0].content
+        assert "answer 2" not in summary_calls[0][0].content
+
+        prompt = [m.content for m in sent[-1]]
+        assert prompt[:4] == ["system prompt", "reply 1", "setup", "reply 3"]
+        assert prompt[4].startswith("Summary of the interview so far:")
+        assert [c for c in prompt[5:] if c.startswith("answer")] == ["answer 4", "answer 5"]
+
+        state = graph.chat_app.get_state({"configurable": {"thread_id": "t1"}}).values
+        assert state["summary"] == prompt[4].split("\n", 1)[1]
+        # Prompts stay bounded however long the interview runs
+        assert max(len(msgs) for msgs in sent) <= 4 + 1 + 2 * 2 * 2
+
+    def test_stream_yields_reply_and_checkpoints_it(self):
+        """Test that stream yields the reply and leaves the thread as invoke would"""
+        from langchain_core.messages import AIMessage, HumanMessage
+        graph = LLMGraph()
+        with patch.object(LLMInterface, 'invoke', return_value=[AIMessage(content="Tell me more.")]):
+            pieces = list(graph.stream(HumanMessage(content="hello"), "t1"))
+
+        assert "".join(pieces) == "Tell me more."
+        assert [m.content for m in graph.get_messages("t1")] == ["hello", "Tell me more."]
+
+    def test_seed_adds_pinned_context_without_model_calls(self):
+        """Test that seed writes messages to the thread and pins them"""
+        from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+        graph = LLMGraph(memory_mode="window", memory_turns=1)
+        with patch.object(LLMInterface, 'invoke', return_value=[AIMessage(content="next")]) as mock_invoke:
+            graph.seed([SystemMessage(content="system prompt")], "t1")
+            graph.seed([SystemMessage(content="guidelines"), AIMessage(content="welcome")], "t1")
+            assert mock_invoke.call_count == 0
+
+            graph.invoke(HumanMessage(content="answer 0"), "t1")
+            graph.invoke(HumanMessage(content="answer 1"), "t1")
+
+        prompt = [m.content for m in mock_invoke.call_args[0][0]]
+        assert prompt == ["system prompt", "guidelines", "welcome", "answer 1"]
+
+    @pytest.mark.skipif("LLM_MEMORY_MODE" in os.environ, reason="LLM_MEMORY_MODE overrides the default")
+    def test_full_memory_is_the_default(self):
+        """Test that without LLM_MEMORY_MODE every message is sent and no summary is made"""
+        graph = LLMGraph()
+        sent = self._prompts(graph, "t1", 8)
+
+        assert graph.memory_mode == "full"
+        assert all(not msgs[0].content.startswith("You keep a running summary") for msgs in sent)
+        assert sent[-1] == graph.get_messages("t1")[:-1]
+
+    def test_invalid_memory_mode(self):
+        with pytest.raises(ValueError):
+            LLMGraph(memory_mode="everything")
+
+    @pytest.mark.parametrize("turns", [0, -1, 1.5])
+    def test_invalid_memory_turns(self, turns):
+        with pytest.raises(ValueError):
+            LLMGraph(memory_mode="window", memory_turns=turns)
+
+    def test_sqlite_mode_shares_threads_between_graphs(self, tmp_path):
+        """Test that two graphs on one state file continue the same thread"""
+        path = str(tmp_path / "state.db")
+        first = LLMGraph(checkpoint_mode="sqlite", state_path=path)
+        second = LLMGraph(checkpoint_mode="sqlite", state_path=path)
+
+        self._chat(first, "t1", 2)
+        self._chat(second, "t1", 1)
+        self._chat(second, "t2", 1)
+
+        assert len(first.get_messages("t1")) == 6
+        assert len(list(first.memory.list({"configurable": {"thread_id": "t1"}}))) == 1
+
+        first.release("t1")
+        assert second.get_messages("t1") == []
+        assert len(second.get_messages("t2")) == 2
+
 class TestLLMInterface:
     def test_llm_interface_initialization(self):
         """Test that LLMInterface initializes properly"""
@@ -82,6 +235,24 @@ class TestLLMInterface:
         assert mock_model.invoke.called
         assert messages[0] in mock_model.invoke.call_args[0][0]
 
+class TestGoodResponsePrompt:
+    def test_english_prompt_has_no_language_requirements(self):
+        prompt = generate_good_response_prompt("I used Redis.", "How did you cache?")
+        assert '"I used Redis."' in prompt
+        assert "How did you cache?" in prompt
+        assert "LANGUAGE REQUIREMENTS" not in prompt
+
+    def test_other_languages_are_requested_in_the_prompt(self):
+        prompt = generate_good_response_prompt("I used Redis.", "", "Spanish")
+        assert "Not provided" in prompt
+        assert "entire answer in Spanish" in prompt
+        assert prompt.endswith("Your response:")
+
+    def test_clean_good_response_strips_labels(self):
+        assert clean_good_response("This is a technical question. Improved answer: I cached reads. ") == "I cached reads."
+        assert clean_good_response("Here's an improved answer: Yes.") == "Yes."
+
+
 class TestPDFUtility:
     @pytest.fixture
     def sample_pdf_content(self):
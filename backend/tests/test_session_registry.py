@@ -0,0 +1,176 @@
+"""
+Unit coverage for SessionRegistry
+─────────────────────────────────
+• admit / get / release – sessions are registered, looked up and freed
+• admission control     – a full registry displaces only long-idle sessions
+• expiry                – idle sessions are dropped and on_release is called;
+                          on_evict only for evicted or expired sessions
+• stats                 – live sessions, bytes held and counters
+• shared store          – sessions follow requests across registries
+"""
+import os
+import sys
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from services.session_registry import SessionRegistry, SessionStore, approximate_size
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _registry(**kwargs):
+    kwargs.setdefault("max_sessions", 2)
+    kwargs.setdefault("idle_ttl_seconds", 100)
+    kwargs.setdefault("min_idle_before_eviction", 10)
+    return SessionRegistry(**kwargs)
+
+
+def test_admit_get_and_release():
+    released = []
+    registry = SessionRegistry(max_sessions=5, on_release=lambda tid, agent: released.append(tid))
+
+    assert registry.admit("t1", "agent-1") is True
+    assert registry.get("t1") == "agent-1"
+    assert "t1" in registry
+
+    assert registry.release("t1") is True
+    assert registry.get("t1") is None
+    assert registry.release("t1") is False
+    assert released == ["t1"]
+
+
+def test_full_registry_evicts_only_idle_sessions():
+    clock = _Clock()
+    released = []
+    with patch("utils.lru_cache.time.monotonic", clock):
+        registry = _registry(on_release=lambda tid, agent: released.append(tid))
+        registry.admit("t1", "a1")
+        registry.admit("t2", "a2")
+
+        # Both sessions were just used: the newcomer is refused
+        clock.now = 5
+        assert registry.can_admit() is False
+        assert registry.admit("t3", "a3") is False
+
+        # t1 idle long enough: it makes room
+        clock.now = 12
+        registry.get("t2")
+        assert registry.admit("t3", "a3") is True
+        assert registry.get("t1") is None
+        assert released == ["t1"]
+
+        stats = registry.stats()
+    assert (stats["admitted"], stats["rejected"], stats["evicted"]) == (3, 1, 1)
+
+
+def test_idle_sessions_expire():
+    clock = _Clock()
+    released = []
+    with patch("utils.lru_cache.time.monotonic", clock):
+        registry = _registry(on_release=lambda tid, agent: released.append(tid))
+        registry.admit("t1", "a1")
+        clock.now = 150
+        assert registry.get("t1") is None
+        assert released == ["t1"]
+        assert len(registry) == 0
+
+
+def test_on_evict_skips_released_sessions():
+    clock = _Clock()
+    released, evicted = [], []
+    with patch("utils.lru_cache.time.monotonic", clock):
+        registry = _registry(on_release=lambda tid, agent: released.append(tid),
+                             on_evict=lambda tid, agent: evicted.append(tid))
+        registry.admit("t1", "a1")
+        registry.admit("t2", "a2")
+        registry.release("t1")
+        clock.now = 150
+        assert registry.get("t2") is None
+
+    assert released == ["t1", "t2"]
+    assert evicted == ["t2"]
+
+
+def test_release_callback_errors_are_contained():
+    def boom(tid, agent):
+        raise RuntimeError("graph gone")
+
+    registry = SessionRegistry(max_sessions=2, on_release=boom)
+    registry.admit("t1", "a1")
+    assert registry.release("t1") is True
+
+
+def test_stats_reports_bytes_held():
+    registry = SessionRegistry(max_sessions=3, sizer=lambda agent: len(agent))
+    registry.admit("t1", "x" * 100)
+    registry.admit("t2", "y" * 50)
+
+    stats = registry.stats()
+    assert stats["live_sessions"] == 2
+    assert stats["max_sessions"] == 3
+    assert stats["bytes_held"] == 150
+
+
+def test_approximate_size_follows_containers():
+    text = "z" * 1000
+    assert approximate_size({"messages": [text]}) > 1000
+    shared = [text]
+    # shared objects are counted once
+    assert approximate_size([shared, shared]) < 2 * approximate_size(shared)
+
+
+def _shared(store, released):
+    return SessionRegistry(
+        max_sessions=5,
+        on_release=lambda tid, agent: released.append(tid),
+        store=store,
+        snapshot=lambda agent: dict(agent),
+        restore=lambda state: dict(state)
+    )
+
+
+def test_shared_store_moves_sessions_between_registries(tmp_path):
+    store = SessionStore(str(tmp_path / "state.db"))
+    released = []
+    first, second = _shared(store, released), _shared(store, released)
+
+    agent = {"question_count": 0}
+    first.admit("t1", agent)
+    assert second.get("t1") == {"question_count": 0}
+
+    # A turn served by the second worker is seen by the first
+    moved = second.get("t1")
+    moved["question_count"] = 1
+    second.persist("t1", moved)
+    assert first.get("t1") == {"question_count": 1}
+
+    assert second.release("t1") is True
+    assert first.get("t1") is None
+    assert store.load("t1") is None
+    assert released == ["t1"]
+
+
+def test_shared_store_keeps_sessions_active_elsewhere(tmp_path):
+    store = SessionStore(str(tmp_path / "state.db"))
+    released = []
+    registry = SessionRegistry(
+        max_sessions=1,
+        min_idle_before_eviction=10,
+        on_release=lambda tid, agent: released.append(tid),
+        store=store,
+        snapshot=lambda agent: dict(agent),
+        restore=lambda state: dict(state)
+    )
+    registry.admit("t1", {})
+    # Restoring t2 displaces t1 here, but t1 was just saved so it stays in the store
+    store.save("t2", {"n": 2})
+    assert registry.get("t2") == {"n": 2}
+    assert store.load("t1") is not None
+    assert released == []
+    assert registry.stats()["stored_sessions"] == 2
@@ -0,0 +1,138 @@
+"""
+Unit coverage for TranslationCatalog
+────────────────────────────────────
+• render        – English is filled in directly; other languages are
+                  translated once, then parameters are substituted
+• persistence   – a second catalog on the same file makes no LLM calls
+• fallbacks     – lost placeholders and LLM errors degrade gracefully,
+                  and a failed template is not retried for every session
+• concurrency   – a slow translation does not hold up other entries
+• model         – without an interface, a temperature-0 model is created
+"""
+import os
+import sys
+import threading
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from services.translation_catalog import TRANSLATION_MODEL, TranslationCatalog
+
+TEMPLATES = {
+    "welcome": "Welcome to {interview_name} at {company_name}.",
+    "closing": "Thank you for your time.",
+}
+
+SPANISH = {
+    "Welcome to {interview_name} at {company_name}.": "Bienvenido a {interview_name} en {company_name}.",
+    "Thank you for your time.": "Gracias por su tiempo.",
+}
+
+
+def _llm(translations=SPANISH):
+    llm = MagicMock()
+
+    def invoke(messages):
+        text = messages[0].content.split("\n\n", 1)[1]
+        return [MagicMock(content=translations.get(text, f"[ES] {text}"))]
+
+    llm.invoke.side_effect = invoke
+    return llm
+
+
+def _catalog(tmp_path, llm, templates=TEMPLATES):
+    return TranslationCatalog(path=str(tmp_path / "catalog.db"), llm_interface=llm, templates=templates)
+
+
+def test_english_needs_no_translation(tmp_path):
+    llm = _llm()
+    catalog = _catalog(tmp_path, llm)
+
+    assert catalog.render("welcome", "English", interview_name="SWE", company_name="Acme") == "Welcome to SWE at Acme."
+    assert llm.invoke.call_count == 0
+
+
+def test_template_translated_once_per_language(tmp_path):
+    llm = _llm()
+    catalog = _catalog(tmp_path, llm)
+
+    first = catalog.render("welcome", "Spanish", interview_name="SWE", company_name="Acme")
+    second = catalog.render("welcome", " spanish ", interview_name="Data", company_name="Globex")
+
+    assert first == "Bienvenido a SWE en Acme."
+    assert second == "Bienvenido a Data en Globex."
+    assert llm.invoke.call_count == 1
+    assert "{company_name}" in llm.invoke.call_args[0][0][0].content
+
+
+def test_translations_persist_across_catalogs(tmp_path):
+    _catalog(tmp_path, _llm()).warm(["Spanish"])
+
+    llm = _llm()
+    catalog = _catalog(tmp_path, llm)
+    assert catalog.render("closing", "Spanish") == "Gracias por su tiempo."
+    assert llm.invoke.call_count == 0
+
+    # A changed template is translated again
+    changed = dict(TEMPLATES, closing="Thanks for coming.")
+    assert _catalog(tmp_path, llm, changed).render("closing", "Spanish") == "[ES] Thanks for coming."
+    assert llm.invoke.call_count == 1
+
+
+def test_lost_placeholders_fall_back_to_direct_translation(tmp_path):
+    llm = _llm({"Welcome to {interview_name} at {company_name}.": "Bienvenido."})
+    catalog = _catalog(tmp_path, llm)
+
+    text = catalog.render("welcome", "Spanish", interview_name="SWE", company_name="Acme")
+
+    assert text == "[ES] Welcome to SWE at Acme."
+    assert catalog.get("welcome", "Spanish") is None
+
+
+def test_llm_errors_fall_back_to_english(tmp_path):
+    llm = MagicMock()
+    llm.invoke.side_effect = Exception("rate limited")
+    catalog = _catalog(tmp_path, llm)
+
+    assert catalog.render("closing", "French") == "Thank you for your time."
+
+
+def test_failed_template_is_not_retried(tmp_path):
+    llm = _llm({"Welcome to {interview_name} at {company_name}.": "Bienvenido."})
+    catalog = _catalog(tmp_path, llm)
+
+    with patch.object(catalog, "_translate", wraps=catalog._translate) as translate:
+        catalog.render("welcome", "Spanish", interview_name="SWE", company_name="Acme")
+        catalog.render("welcome", "Spanish", interview_name="Data", company_name="Globex")
+
+    template_calls = [c for c in translate.call_args_list if c.kwargs.get("keep_placeholders")]
+    assert len(template_calls) == 1
+
+
+def test_slow_translation_does_not_block_other_entries(tmp_path):
+    release = threading.Event()
+    llm = _llm()
+    catalog = _catalog(tmp_path, llm)
+    catalog.get("closing", "Spanish")
+
+    def slow(messages):
+        release.wait(5)
+        return [MagicMock(content="Merci pour votre temps.")]
+
+    llm.invoke.side_effect = slow
+    worker = threading.Thread(target=catalog.get, args=("closing", "French"))
+    worker.start()
+    try:
+        # Served from memory while the French translation is still running
+        assert catalog.render("closing", "Spanish") == "Gracias por su tiempo."
+    finally:
+        release.set()
+        worker.join()
+    assert catalog.get("closing", "French") == "Merci pour votre temps."
+
+
+def test_default_model_is_deterministic(tmp_path):
+    catalog = TranslationCatalog(path=str(tmp_path / "catalog.db"), templates=TEMPLATES)
+    with patch("services.translation_catalog.LLMInterface") as interface:
+        interface.return_value.invoke.return_value = [MagicMock(content="Gracias por su tiempo.")]
+        assert catalog.render("closing", "Spanish") == "Gracias por su tiempo."
+    interface.assert_called_once_with(model_name=TRANSLATION_MODEL, temperature=0)
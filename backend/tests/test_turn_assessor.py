@@ -0,0 +1,97 @@
+"""
+Unit coverage for TurnAssessor
+──────────────────────────────
+• submit / aggregate – answers are assessed in the background and averaged
+• aggregate_turns    – strengths, improvements and weak questions ordering
+• fallbacks          – missing or failed turns return None
+• save_analysis      – per-turn results replace the transcript-wide calls
+"""
+import os
+import sys
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from services.turn_assessor import TurnAssessment, TurnAssessor, aggregate_turns
+
+
+def _assessment(score, strength="", improvement="", weak=False):
+    return TurnAssessment(
+        technical=score, communication=score, confidence=score, problem_solving=score,
+        resume_strength=score, leadership=score, strength=strength,
+        improvement=improvement, weak=weak)
+
+
+def _client(*assessments):
+    client = MagicMock()
+    client.beta.chat.completions.parse.side_effect = [
+        MagicMock(choices=[MagicMock(message=MagicMock(parsed=a))]) for a in assessments
+    ]
+    return client
+
+
+def test_aggregate_turns_orders_feedback():
+    out = aggregate_turns([
+        ("Q1", _assessment(.9, "Clear", "More depth")),
+        ("Q2", _assessment(.3, "Honest", "Use STAR", weak=True)),
+        ("Q3", _assessment(.6, "Clear", "Be concise")),
+    ])
+    assert out["scores"].technical == pytest.approx(.6)
+    assert out["strengths"] == ["Clear", "Honest"]
+    assert out["weaknesses"] == ["Use STAR", "Be concise", "More depth"]
+    assert out["weak_questions"] == [{"question": "Q2"}]
+    assert out["specific_feedback"].startswith("Across 3 answers the candidate scored 60% on average.")
+
+
+def test_submit_and_aggregate():
+    assessor = TurnAssessor(client=_client(_assessment(.8, "s1", "i1"), _assessment(.4, "s2", "i2")))
+    assessor.submit("t", "Q1", "A1")
+    assessor.submit("t", "Q2", "A2")
+
+    out = assessor.aggregate("t", expected_turns=2)
+    assert out["scores"].communication == pytest.approx(.6)
+    prompts = [c.kwargs["messages"][1]["content"] for c in assessor.client.beta.chat.completions.parse.call_args_list]
+    assert sorted(prompts) == ["Question: Q1\n\nAnswer: A1", "Question: Q2\n\nAnswer: A2"]
+
+
+def test_aggregate_needs_every_turn():
+    assessor = TurnAssessor(client=_client(_assessment(.8)))
+    assessor.submit("t", "Q1", "A1")
+    assert assessor.aggregate("t", expected_turns=2) is None
+    assert assessor.aggregate("unknown", expected_turns=1) is None
+
+
+def test_failed_turn_falls_back():
+    client = MagicMock()
+    client.beta.chat.completions.parse.side_effect = Exception("rate limited")
+    assessor = TurnAssessor(client=client)
+    assessor.submit("t", "Q1", "A1")
+    assert assessor.aggregate("t", expected_turns=1) is None
+
+
+def test_save_analysis_uses_turn_results(monkeypatch):
+    from services import chat_history_service as mod
+    supabase = MagicMock()
+    supabase.table.return_value.select.return_value.eq.return_value \
+        .execute.return_value.data = [{"first_name": "A", "last_name": "B"}]
+    monkeypatch.setattr(mod, "OpenAI", MagicMock())
+
+    assessor = TurnAssessor(client=_client(_assessment(.7, "s", "i")))
+    assessor.submit("thread-1", "Tell me about yourself", "I build APIs")
+    with patch("services.chat_history_service.create_client", return_value=supabase):
+        svc = mod.ChatHistoryService("url", "key", elo_service=MagicMock(), turn_assessor=assessor)
+    run_calls = MagicMock()
+    monkeypatch.setattr(svc, "_run_analysis_calls", run_calls)
+
+    messages = [{"sender": "ai", "text": "Tell me about yourself"},
+                {"sender": "user", "text": "I build APIs"},
+                {"sender": "ai", "text": "Thanks"}]
+    res = svc.save_analysis(1, "u@x", messages, session_id="thread-1")
+
+    assert res["success"] is True
+    run_calls.assert_not_called()
+    saved = supabase.table.return_value.upsert.call_args[0][0]
+    assert saved["technical_accuracy_score"] == pytest.approx(.7)
+    # the assessments are dropped once used
+    assert assessor.aggregate("thread-1", expected_turns=1) is None
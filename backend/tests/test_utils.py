@@ -11,6 +11,9 @@ from utils.file_utils import extract_text_from_pdf, download_pdf
 from utils.speech_2_text import speech_to_text
 from utils.text_2_speech import text_to_speech
 from utils.validation_utils import validate_file, validate_audio_format, validate_text_input
+from utils.lru_cache import LRUCache
+from utils import transcript
+from utils.transcript import render_transcript
 
 class TestAudioConversion:
     @pytest.fixture
@@ -162,4 +165,97 @@ class TestValidationUtils:
         
         # Should raise BadRequest for text too long
         with pytest.raises(BadRequest):
-            validate_text_input("a" * 1001) 
\ No newline at end of file
+            validate_text_input("a" * 1001) 
+
+
+class TestLRUCache:
+    def test_evicts_least_recently_used(self):
+        """Test that a full cache drops the entry used longest ago"""
+        evicted = []
+        cache = LRUCache(2, on_evict=lambda key, value: evicted.append(key))
+        cache.put("a", 1)
+        cache.put("b", 2)
+        assert cache.get("a") == 1
+        cache.put("c", 3)
+
+        assert evicted == ["b"]
+        assert "b" not in cache
+        assert len(cache) == 2
+
+    def test_entries_expire_after_ttl(self):
+        """Test that idle entries expire and count as misses"""
+        with patch('utils.lru_cache.time.monotonic', side_effect=[0, 5, 20, 20]):
+            cache = LRUCache(10, ttl_seconds=10)
+            cache.put("a", 1)             # t=0
+            assert cache.get("a") == 1    # t=5, refreshes the entry
+            assert cache.get("a") is None # t=20, idle for 15s
+
+    def test_least_recent_reports_idle_time(self):
+        """Test that least_recent returns the oldest entry without refreshing it"""
+        with patch('utils.lru_cache.time.monotonic', side_effect=[0, 4, 9, 9]):
+            cache = LRUCache(10)
+            assert cache.least_recent() is None
+            cache.put("a", 1)   # t=0
+            cache.put("b", 2)   # t=4
+            assert cache.least_recent() == ("a", 1, 9)
+            assert [key for key, _ in cache.items()] == ["a", "b"]
+
+    def test_stats_count_hits_and_misses(self):
+        """Test hit, miss and eviction counters"""
+        cache = LRUCache(1)
+        cache.put("a", 1)
+        cache.get("a")
+        cache.get("missing")
+        cache.put("b", 2)
+
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["evictions"]) == (1, 1, 1)
+        assert stats["hit_rate"] == 0.5
+
+
+class TestTranscript:
+    @pytest.fixture(autouse=True)
+    def estimated_tokens(self, monkeypatch):
+        """Use the length-based token estimate so tests don't need tiktoken data"""
+        monkeypatch.setattr(transcript, "_encoding", None)
+        monkeypatch.setattr(transcript, "_encoding_loaded", True)
+
+    def test_compact_lines_and_deduplicated_boilerplate(self):
+        """Test compact rendering with repeated interviewer messages kept once"""
+        conversation = [
+            {"role": "assistant", "content": "Welcome!  Tell me about yourself."},
+            {"role": "assistant", "content": "Welcome! Tell me about yourself."},
+            {"role": "user", "content": "I build\nAPIs."},
+            {"role": "user", "content": ""},
+            {"role": "assistant", "content": "Thanks."},
+        ]
+        assert render_transcript(conversation) == (
+            "Interviewer: Welcome! Tell me about yourself.\n"
+            "Candidate: I build APIs.\n"
+            "Interviewer: Thanks."
+        )
+
+    def test_long_answers_truncated_to_budget(self):
+        """Test that the longest messages are shortened first"""
+        conversation = [
+            {"role": "assistant", "content": "Question one?"},
+            {"role": "user", "content": "a" * 4000},
+            {"role": "assistant", "content": "Question two?"},
+            {"role": "user", "content": "short answer"},
+        ]
+        text = render_transcript(conversation, token_budget=300)
+        assert transcript.count_tokens(text) <= 300
+        assert "tokens omitted" in text
+        assert "Candidate: short answer" in text
+
+    def test_middle_exchanges_dropped_when_needed(self):
+        """Test that middle turns are dropped once messages hit the minimum size"""
+        conversation = []
+        for i in range(30):
+            conversation.append({"role": "assistant", "content": f"Question {i}? " + "q" * 400})
+            conversation.append({"role": "user", "content": f"Answer {i}. " + "a" * 400})
+        text = render_transcript(conversation, token_budget=800)
+        assert transcript.count_tokens(text) <= 800
+        assert text.startswith("Interviewer: Question 0?")
+        assert "messages omitted for length" in text
+        assert "Answer 29." in text
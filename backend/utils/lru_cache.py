@@ -0,0 +1,141 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+
+class LRUCache:
+    """
+    Thread-safe dictionary bounded by size and age.
+
+    When the cache is full, the least recently used entry is evicted. An entry
+    not used for ttl_seconds expires, and expired entries are dropped as they
+    are found. Hit, miss and eviction counts are kept for stats().
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        ttl_seconds: Optional[float] = None,
+        on_evict: Optional[Callable[[Hashable, Any], None]] = None
+    ):
+        """
+        Args:
+            max_size: Most entries kept at once
+            ttl_seconds: Idle time after which an entry expires; None keeps entries until evicted
+            on_evict: Called with (key, value) for every entry evicted or expired
+        """
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.on_evict = on_evict
+
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _expired(self, touched_at: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - touched_at > self.ttl_seconds
+
+    def _evict(self, key: Hashable) -> Tuple[Hashable, Any]:
+        value, _ = self._entries.pop(key)
+        self.evictions += 1
+        return key, value
+
+    def _notify(self, evicted: List[Tuple[Hashable, Any]]):
+        # Called outside the lock so callbacks may use the cache
+        if self.on_evict:
+            for key, value in evicted:
+                self.on_evict(key, value)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the value for key and mark it as recently used."""
+        evicted = []
+        with self._lock:
+            entry = self._entries.get(key)
+            now = time.monotonic()
+            if entry is not None and self._expired(entry[1], now):
+                evicted.append(self._evict(key))
+                entry = None
+            if entry is None:
+                self.misses += 1
+                value = default
+            else:
+                self.hits += 1
+                self._entries[key] = (entry[0], now)
+                self._entries.move_to_end(key)
+                value = entry[0]
+        self._notify(evicted)
+        return value
+
+    def put(self, key: Hashable, value: Any):
+        """Insert or replace a value, evicting the least recently used entries if full."""
+        evicted = []
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                evicted.append(self._evict(next(iter(self._entries))))
+        self._notify(evicted)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove and return a value without counting it as an eviction."""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        return default if entry is None else entry[0]
+
+    def least_recent(self) -> Optional[Tuple[Hashable, Any, float]]:
+        """Return (key, value, idle_seconds) for the least recently used entry, or None if empty.
+
+        Does not count as a use of the entry.
+        """
+        with self._lock:
+            if not self._entries:
+                return None
+            key, (value, touched_at) = next(iter(self._entries.items()))
+            return key, value, time.monotonic() - touched_at
+
+    def items(self) -> List[Tuple[Hashable, Any]]:
+        """Return a snapshot of (key, value) pairs, least recently used first, without touching them."""
+        with self._lock:
+            return [(key, value) for key, (value, _) in self._entries.items()]
+
+    def expire(self) -> int:
+        """Drop every expired entry.
+
+        Returns:
+            The number of entries dropped
+        """
+        evicted = []
+        with self._lock:
+            now = time.monotonic()
+            for key, (_, touched_at) in list(self._entries.items()):
+                if self._expired(touched_at, now):
+                    evicted.append(self._evict(key))
+        self._notify(evicted)
+        return len(evicted)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and not self._expired(entry[1], time.monotonic())
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return size, hit, miss and eviction counts and the hit rate."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,127 @@
+import math
+import os
+from typing import Dict, List, Optional
+
+# Token budget for the conversation in each analysis prompt
+ANALYSIS_TOKEN_BUDGET = int(os.getenv("ANALYSIS_TOKEN_BUDGET", "6000"))
+
+# Messages are never cut below this many tokens; past that, middle exchanges are dropped
+MIN_MESSAGE_TOKENS = 60
+
+# Allowance for the "[... N tokens omitted ...]" marker in a shortened message
+MARKER_TOKENS = 10
+
+SPEAKERS = {"assistant": "Interviewer", "user": "Candidate"}
+
+_encoding = None
+_encoding_loaded = False
+
+
+def _get_encoding():
+    """Load the tiktoken encoding once; None if tiktoken or its data is unavailable."""
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        _encoding_loaded = True
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("o200k_base")
+        except Exception as e:
+            print(f"tiktoken unavailable, estimating tokens from length: {e}")
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    """Count tokens with tiktoken, or estimate at four characters per token."""
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return math.ceil(len(text) / 4)
+
+
+def _truncate(text: str, max_tokens: int) -> str:
+    """Keep the start and end of text within about max_tokens tokens."""
+    head = max_tokens * 2 // 3
+    tail = max_tokens - head
+    encoding = _get_encoding()
+    if encoding is not None:
+        tokens = encoding.encode(text)
+        if len(tokens) <= max_tokens:
+            return text
+        omitted = len(tokens) - head - tail
+        return f"{encoding.decode(tokens[:head])} [... {omitted} tokens omitted ...] {encoding.decode(tokens[-tail:])}"
+    if len(text) <= max_tokens * 4:
+        return text
+    omitted = math.ceil((len(text) - max_tokens * 4) / 4)
+    return f"{text[:head * 4]} [... {omitted} tokens omitted ...] {text[-tail * 4:]}"
+
+
+def render_transcript(conversation: List[Dict[str, str]], token_budget: Optional[int] = ANALYSIS_TOKEN_BUDGET) -> str:
+    """
+    Render a conversation as compact "Speaker: text" lines within a token budget.
+
+    Whitespace is collapsed, empty messages are dropped and interviewer
+    messages already seen (welcome text, closing remarks) are kept only once.
+    If the result is over budget, the longest messages are shortened to a
+    common cap, keeping their start and end. If that is still not enough,
+    exchanges are dropped from the middle, keeping the opening and the most
+    recent turns.
+
+    Args:
+        conversation: Messages with "role" ("assistant" or "user") and "content"
+        token_budget: Maximum tokens for the rendered text; None for no limit
+
+    Returns:
+        The rendered transcript, one message per line
+    """
+    seen_interviewer = set()
+    lines = []
+    for msg in conversation:
+        text = " ".join((msg.get("content") or "").split())
+        if not text:
+            continue
+        speaker = SPEAKERS.get(msg.get("role"), "Candidate")
+        if speaker == "Interviewer":
+            if text in seen_interviewer:
+                continue
+            seen_interviewer.add(text)
+        lines.append((speaker, text))
+
+    if token_budget is None:
+        return "\n".join(f"{speaker}: {text}" for speaker, text in lines)
+
+    # One extra token per line for the newline
+    counts = [count_tokens(f"{speaker}: {text}") + 1 for speaker, text in lines]
+    if sum(counts) <= token_budget:
+        return "\n".join(f"{speaker}: {text}" for speaker, text in lines)
+
+    def capped(count: int, cap: int) -> int:
+        return count if count <= cap else cap + MARKER_TOKENS
+
+    # Largest per-message cap that fits, found by binary search
+    low, high = MIN_MESSAGE_TOKENS, max(counts)
+    while low < high:
+        cap = (low + high + 1) // 2
+        if sum(capped(count, cap) for count in counts) <= token_budget:
+            low = cap
+        else:
+            high = cap - 1
+    cap = low
+    lines = [
+        (speaker, _truncate(text, cap) if count > cap else text)
+        for (speaker, text), count in zip(lines, counts)
+    ]
+    counts = [capped(count, cap) for count in counts]
+
+    # Still over budget at the minimum cap: drop exchanges after the opening,
+    # leaving room for the note that says so
+    opening = 2
+    dropped = 0
+    if sum(counts) > token_budget:
+        while sum(counts) > token_budget - MARKER_TOKENS and len(lines) > opening + 1:
+            del lines[opening]
+            del counts[opening]
+            dropped += 1
+    if dropped:
+        lines.insert(opening, ("[Note]", f"{dropped} messages omitted for length"))
+
+    return "\n".join(f"{speaker}: {text}" for speaker, text in lines)
@@ -71,7 +71,7 @@ test.describe('GraphPage Tests', () => {
     await setupLocalStorage(page, USER_EMAIL);
 
     // Mock GET /api/elo/history/<email>
-    await page.route(`**/api/elo/history/${USER_EMAIL}`, async (route) => {
+    await page.route(`**/api/elo/history/${USER_EMAIL}?bucket=day`, async (route) => {
       const mockData = {
         success: true,
         data: [
@@ -139,7 +139,7 @@ test.describe('GraphPage Tests', () => {
     await setupLocalStorage(page, USER_EMAIL);
 
     // Mock GET /api/elo/history/<email> (empty)
-    await page.route(`**/api/elo/history/${USER_EMAIL}`, async (route) => {
+    await page.route(`**/api/elo/history/${USER_EMAIL}?bucket=day`, async (route) => {
       await route.fulfill({
         status: 200,
         body: JSON.stringify({ success: true, data: [] }),
@@ -186,7 +186,7 @@ test.describe('GraphPage Tests', () => {
     await setupLocalStorage(page, USER_EMAIL);
 
     // Mock GET /api/elo/history/<email> (error)
-    await page.route(`**/api/elo/history/${USER_EMAIL}`, async (route) => {
+    await page.route(`**/api/elo/history/${USER_EMAIL}?bucket=day`, async (route) => {
       await route.fulfill({
         status: 500,
         body: JSON.stringify({ error: 'Server error' }),
@@ -290,7 +290,7 @@ test.describe('GraphPage Tests', () => {
     await setupLocalStorage(page, USER_EMAIL);
 
     // Mock GET /api/elo/history/<email> (delayed response)
-    await page.route(`**/api/elo/history/${USER_EMAIL}`, async (route) => {
+    await page.route(`**/api/elo/history/${USER_EMAIL}?bucket=day`, async (route) => {
       await new Promise((resolve) => setTimeout(resolve, 1000)); // Simulate delay
       await route.fulfill({
         status: 200,
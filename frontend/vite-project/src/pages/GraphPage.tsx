@@ -109,7 +109,7 @@ const GraphPage = () => {
           return;
         }
 
-        const response = await axios.get(`${API_BASE_URL}/api/elo/history/${currentEmail}`);
+        const response = await axios.get(`${API_BASE_URL}/api/elo/history/${currentEmail}?bucket=day`);
         
         if (response.data && response.data.success) {
           if (response.data.data && response.data.data.length > 0) {
@@ -50,6 +50,30 @@ const formatToEasternTime = (dateStr: string) => {
   }
 };
 
+// Analysis runs in the background after an interview is saved; its results
+// are polled for until they are ready
+const ANALYSIS_POLL_INTERVAL_MS = 2000;
+const ANALYSIS_POLL_ATTEMPTS = 60;
+
+const waitForAnalysis = async (interviewId: number, onPending?: () => void): Promise<string> => {
+  for (let attempt = 0; attempt < ANALYSIS_POLL_ATTEMPTS; attempt++) {
+    const response = await fetch(`${API_BASE_URL}/api/analysis_status/${interviewId}`);
+    if (!response.ok) {
+      return 'unknown';
+    }
+    const result = await response.json();
+    const status = result.data?.status;
+    if (status !== 'queued' && status !== 'running') {
+      return status;
+    }
+    if (attempt === 0 && onPending) {
+      onPending();
+    }
+    await new Promise(resolve => setTimeout(resolve, ANALYSIS_POLL_INTERVAL_MS));
+  }
+  return 'pending';
+};
+
 interface InterviewLog {
   id: number;
   title: string;
@@ -356,6 +380,7 @@ const InterviewHistoryPage: React.FC = () => {
       let performanceScores = null;
       
       try {        
+        await waitForAnalysis(log.id, () => message.info('Waiting for the interview analysis to finish...'));
         const scoresResponse = await fetch(`${API_BASE_URL}/api/interview_scores/${log.id}`);
         if (scoresResponse.ok) {
           const scoresData = await scoresResponse.json();
@@ -441,10 +466,19 @@ const InterviewHistoryPage: React.FC = () => {
     // Fetch performance data when opening the details modal
     setLoadingPerformance(true);
     try {
+      // Wait for the background analysis if it is still queued or running
+      const analysisStatus = await waitForAnalysis(
+        log.id,
+        () => message.info('This interview is still being analyzed. Results will appear shortly.')
+      );
+      if (analysisStatus === 'pending') {
+        throw new Error('Interview analysis is still in progress');
+      }
+
       // Fetch scores
       const scoresResponse = await fetch(`${API_BASE_URL}/api/interview_scores/${log.id}`);
       
-      if (!scoresResponse.ok) {
+      if (!scoresResponse.ok || scoresResponse.status === 202) {
         throw new Error(`Failed to fetch performance data: ${scoresResponse.status}`);
       }
       
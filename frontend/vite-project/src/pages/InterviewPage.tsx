@@ -36,6 +36,8 @@ const InterviewPage: React.FC = () => {
   const hasEndedInterviewRef = useRef(false);
   const hasRealConversationRef = useRef(false);
   const initialLoadRef = useRef(true);
+  // Number of messages the server has stored; saves send only the ones after it
+  const savedCountRef = useRef(0);
   
   const chatContainerRef = useRef<HTMLDivElement>(null);
   const userEmail = localStorage.getItem('user_email') || '';
@@ -51,6 +53,10 @@ const InterviewPage: React.FC = () => {
     }
   }, [messages]);
   
+  useEffect(() => {
+    savedCountRef.current = 0;
+  }, [threadId]);
+
   // Update hasRealConversationRef when there are user messages indicating a real conversation
   useEffect(() => {
     if (messages.length > 1 || (messages.length === 1 && messages[0].sender === 'user')) {
@@ -65,21 +71,35 @@ const InterviewPage: React.FC = () => {
         return true;
       }
             
-      const response = await fetch(`${API_BASE_URL}/api/chat_history`, {
+      const postMessages = (baseCount: number) => fetch(`${API_BASE_URL}/api/chat_history`, {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify({
           thread_id: currentThreadId,
           email: userEmail,
-          messages: chatMessages,
+          messages: chatMessages.slice(baseCount),
+          base_count: baseCount,
           config_name: config_name,
           config_id: config_id
         })
       });
+
+      let response = await postMessages(savedCountRef.current);
+      if (response.status === 409) {
+        // The server has fewer messages than we thought; resend from its count
+        const conflict = await response.json();
+        savedCountRef.current = Math.min(conflict.message_count ?? 0, chatMessages.length);
+        response = await postMessages(savedCountRef.current);
+      }
       
       if (!response.ok) {
         throw new Error(`Failed to save chat history: ${response.status} ${response.statusText}`);
       }
+
+      const saved = await response.json().catch(() => ({}));
+      if (typeof saved.message_count === 'number') {
+        savedCountRef.current = Math.min(saved.message_count, chatMessages.length);
+      }
       
       return true;
     } catch (error) {
@@ -243,8 +263,22 @@ const InterviewPage: React.FC = () => {
     const userInput = input;
     setInput('');
     
+    // The reply is streamed into the message after the user's
+    const aiIndex = updatedMessages.length;
+    const showAiText = (text: string) => {
+      setMessages(prevMessages => {
+        const aiMessage = { text, sender: 'ai' as const };
+        if (prevMessages.length <= aiIndex) {
+          return [...prevMessages, aiMessage];
+        }
+        const next = [...prevMessages];
+        next[aiIndex] = aiMessage;
+        return next;
+      });
+    };
+
     try {
-      const res = await fetch(`${API_BASE_URL}/api/chat`, {
+      const res = await fetch(`${API_BASE_URL}/api/chat/stream`, {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify({ 
@@ -256,18 +290,40 @@ const InterviewPage: React.FC = () => {
         }),
       });
       
-      if (!res.ok) {
+      if (!res.ok || !res.body) {
         throw new Error('Network response was not ok');
       }
       
-      const data = await res.json();
-            
-      const aiMessage = { 
-        text: data.response || "I'm thinking about my response...", 
-        sender: 'ai' as const 
-      };
+      // Server-Sent Events: "data: {json}" blocks separated by blank lines
+      const reader = res.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      let streamed = '';
+      let finished = false;
+      while (!finished) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const events = buffer.split('\n\n');
+        buffer = events.pop() || '';
+        for (const event of events) {
+          if (!event.startsWith('data: ')) continue;
+          const data = JSON.parse(event.slice(6));
+          if (data.type === 'token') {
+            streamed += data.text;
+            showAiText(streamed);
+          } else if (data.type === 'done') {
+            showAiText(data.response || "I'm thinking about my response...");
+            finished = true;
+          } else if (data.type === 'error') {
+            throw new Error(data.error);
+          }
+        }
+      }
       
-      setMessages(prevMessages => [...prevMessages, aiMessage]);
+      if (!finished) {
+        throw new Error('Response stream ended early');
+      }
       
     } catch (error) {
       console.error('Error processing chat:', error);